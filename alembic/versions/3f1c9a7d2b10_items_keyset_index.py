@@ -0,0 +1,26 @@
+"""keyset pagination index on vocabulary.items
+
+Revision ID: 3f1c9a7d2b10
+Revises:
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+
+revision = '3f1c9a7d2b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_items_list_created_item', 'items',
+        ['list_id', 'created_at', 'item_id'],
+        schema='vocabulary'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_items_list_created_item', table_name='items', schema='vocabulary')
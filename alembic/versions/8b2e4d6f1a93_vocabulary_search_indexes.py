@@ -0,0 +1,39 @@
+"""trigram search indexes on vocabulary.items
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1c9a7d2b10
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+
+
+revision = '8b2e4d6f1a93'
+down_revision = '3f1c9a7d2b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is only STABLE, an IMMUTABLE wrapper with a fixed dictionary can be indexed
+    op.execute("""
+        CREATE OR REPLACE FUNCTION vocabulary.f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_items_word_trgm ON vocabulary.items
+        USING gin (vocabulary.f_unaccent(lower(word)) gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_items_definition_trgm ON vocabulary.items
+        USING gin (vocabulary.f_unaccent(lower(definition)) gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS vocabulary.ix_items_definition_trgm")
+    op.execute("DROP INDEX IF EXISTS vocabulary.ix_items_word_trgm")
+    op.execute("DROP FUNCTION IF EXISTS vocabulary.f_unaccent(text)")
@@ -0,0 +1,33 @@
+"""payload snapshot columns on content.questions
+
+Revision ID: a6c3e8f5b210
+Revises: f27b9d4e1c63
+Create Date: 2026-10-19 16:00:00
+
+The payload is built by Python (services/questions.format_question), fill
+the existing rows after upgrading with:
+
+    python -m app.services.questions rebuild
+
+Until then those sets are formatted on read as before.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'a6c3e8f5b210'
+down_revision = 'f27b9d4e1c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('payload', postgresql.JSONB(), nullable=True), schema='content')
+    op.add_column('questions', sa.Column('payload_version', sa.Integer(), nullable=True), schema='content')
+
+
+def downgrade() -> None:
+    op.drop_column('questions', 'payload_version', schema='content')
+    op.drop_column('questions', 'payload', schema='content')
@@ -0,0 +1,34 @@
+"""content.question_signatures for near-duplicate detection
+
+Revision ID: b83d1f7c9e24
+Revises: a6c3e8f5b210
+Create Date: 2026-10-19 17:00:00
+
+Sign the question sets stored before this revision with:
+
+    python -m app.services.dedup build
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'b83d1f7c9e24'
+down_revision = 'a6c3e8f5b210'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'question_signatures',
+        sa.Column('question_id', sa.Integer(),
+                  sa.ForeignKey('content.questions.question_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('practice_type', sa.String(20), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        schema='content'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('question_signatures', schema='content')
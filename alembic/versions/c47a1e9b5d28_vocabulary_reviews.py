@@ -0,0 +1,42 @@
+"""spaced repetition reviews and list learned_words
+
+Revision ID: c47a1e9b5d28
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'c47a1e9b5d28'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('lists', sa.Column('learned_words', sa.Integer(), nullable=False, server_default='0'),
+                  schema='vocabulary')
+    op.create_table(
+        'reviews',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('auth.users.user_id'), primary_key=True),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('vocabulary.items.item_id', ondelete='CASCADE'),
+                  primary_key=True),
+        sa.Column('ease', sa.Float(), nullable=False, server_default='2.5'),
+        sa.Column('interval_days', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('repetitions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lapses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('due_at', sa.DateTime(), nullable=False),
+        sa.Column('last_reviewed_at', sa.DateTime(), nullable=True),
+        schema='vocabulary'
+    )
+    op.create_index('ix_reviews_user_due', 'reviews', ['user_id', 'due_at'], schema='vocabulary')
+    op.create_index('ix_vocabulary_reviews_item_id', 'reviews', ['item_id'], schema='vocabulary')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_vocabulary_reviews_item_id', table_name='reviews', schema='vocabulary')
+    op.drop_index('ix_reviews_user_due', table_name='reviews', schema='vocabulary')
+    op.drop_table('reviews', schema='vocabulary')
+    op.drop_column('lists', 'learned_words', schema='vocabulary')
@@ -0,0 +1,33 @@
+"""readability scores and CEFR level on content.questions
+
+Revision ID: c5d2a9e7f318
+Revises: b83d1f7c9e24
+Create Date: 2026-10-19 18:00:00
+
+Scores are computed in Python (services/readability), score the existing
+question sets and rewrite their payloads with:
+
+    python -m app.services.questions score
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'c5d2a9e7f318'
+down_revision = 'b83d1f7c9e24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('cefr_level', sa.String(length=2), nullable=True), schema='content')
+    op.add_column('questions', sa.Column('readability', postgresql.JSONB(), nullable=True), schema='content')
+    op.add_column('questions', sa.Column('readability_version', sa.Integer(), nullable=True), schema='content')
+
+
+def downgrade() -> None:
+    op.drop_column('questions', 'readability_version', schema='content')
+    op.drop_column('questions', 'readability', schema='content')
+    op.drop_column('questions', 'cefr_level', schema='content')
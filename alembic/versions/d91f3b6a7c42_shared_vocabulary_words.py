@@ -0,0 +1,99 @@
+"""shared vocabulary.words entries, items keep only overrides
+
+Revision ID: d91f3b6a7c42
+Revises: c47a1e9b5d28
+Create Date: 2026-10-19 13:00:00
+
+Existing items are grouped by normalized word (lowercase, single spaced).
+Each word entry takes the most common non-empty value of every shared
+column among public list items (list_id < 0) only, then item values equal
+to it are set to NULL. A user's own values are never copied to the shared
+entry, they stay on the item as overrides; words only found in private
+lists start empty and get filled by `python -m app.services.dictionary
+backfill`. Run VACUUM FULL (or pg_repack) on vocabulary.items afterwards to
+give the space back.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'd91f3b6a7c42'
+down_revision = 'c47a1e9b5d28'
+branch_labels = None
+depends_on = None
+
+SHARED_FIELDS = ("ipa", "definition", "audio_url_us", "audio_url_uk", "image_url")
+WORD_KEY = "lower(regexp_replace(btrim({0}), '\\s+', ' ', 'g'))"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'words',
+        sa.Column('word_id', sa.Integer(), primary_key=True),
+        sa.Column('word', sa.String(), nullable=False, unique=True),
+        sa.Column('definition', sa.String(), nullable=True, server_default=''),
+        sa.Column('ipa', sa.String(), nullable=True, server_default=''),
+        sa.Column('audio_url_us', sa.String(), nullable=True, server_default=''),
+        sa.Column('audio_url_uk', sa.String(), nullable=True, server_default=''),
+        sa.Column('image_url', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        schema='vocabulary'
+    )
+    op.create_index('ix_vocabulary_words_word_id', 'words', ['word_id'], schema='vocabulary')
+    op.add_column('items', sa.Column('word_id', sa.Integer(), sa.ForeignKey('vocabulary.words.word_id'),
+                                     nullable=True), schema='vocabulary')
+    op.alter_column('items', 'definition', nullable=True, schema='vocabulary')
+    # Unset overrides are NULL, not ''
+    for field in ("ipa", "audio_url_us", "audio_url_uk"):
+        op.alter_column('items', field, server_default=None, schema='vocabulary')
+
+    # One entry per distinct word, mode() skips NULLs so empty strings are mapped to NULL first.
+    # Values come from public lists only, private ones would leak to every other user
+    modes = ", ".join(f"coalesce(mode() WITHIN GROUP (ORDER BY nullif({field}, '')) FILTER (WHERE list_id < 0), '')"
+                      for field in SHARED_FIELDS)
+    op.execute(f"""
+        INSERT INTO vocabulary.words (word, {", ".join(SHARED_FIELDS)})
+        SELECT {WORD_KEY.format("word")}, {modes}
+        FROM vocabulary.items
+        WHERE btrim(word) <> ''
+        GROUP BY 1
+    """)
+    op.execute(f"""
+        UPDATE vocabulary.items AS i SET word_id = w.word_id
+        FROM vocabulary.words AS w
+        WHERE w.word = {WORD_KEY.format("i.word")}
+    """)
+    # Drop the item copies that are now stored once on the word
+    assignments = ", ".join(
+        f"{field} = CASE WHEN coalesce(i.{field}, '') IN ('', w.{field}) THEN NULL ELSE i.{field} END"
+        for field in SHARED_FIELDS
+    )
+    op.execute(f"""
+        UPDATE vocabulary.items AS i SET {assignments}
+        FROM vocabulary.words AS w
+        WHERE w.word_id = i.word_id
+    """)
+    op.create_index('ix_vocabulary_items_word_id', 'items', ['word_id'], schema='vocabulary')
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_words_definition_trgm ON vocabulary.words
+        USING gin (vocabulary.f_unaccent(lower(definition)) gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    assignments = ", ".join(f"{field} = coalesce(nullif(i.{field}, ''), w.{field})" for field in SHARED_FIELDS)
+    op.execute(f"""
+        UPDATE vocabulary.items AS i SET {assignments}
+        FROM vocabulary.words AS w
+        WHERE w.word_id = i.word_id
+    """)
+    op.execute("UPDATE vocabulary.items SET definition = '' WHERE definition IS NULL")
+    op.alter_column('items', 'definition', nullable=False, schema='vocabulary')
+    for field in ("ipa", "audio_url_us", "audio_url_uk"):
+        op.alter_column('items', field, server_default='', schema='vocabulary')
+    op.drop_index('ix_vocabulary_items_word_id', table_name='items', schema='vocabulary')
+    op.drop_column('items', 'word_id', schema='vocabulary')
+    op.execute("DROP INDEX IF EXISTS vocabulary.ix_words_definition_trgm")
+    op.drop_index('ix_vocabulary_words_word_id', table_name='words', schema='vocabulary')
+    op.drop_table('words', schema='vocabulary')
@@ -0,0 +1,29 @@
+"""random sampling index on content.questions by practice type alone
+
+Revision ID: e1b7c4a9d350
+Revises: c5d2a9e7f318
+Create Date: 2026-10-19 19:00:00
+
+ix_questions_bucket_random only seeks when topic and difficulty are both
+fixed. This one serves the practice type only buckets, and with topic or
+difficulty alone it is walked in random_key order with the other column
+as a filter, instead of sorting the whole practice type.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'e1b7c4a9d350'
+down_revision = 'c5d2a9e7f318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_questions_type_random', 'questions', ['practice_type', 'random_key'], schema='content',
+                    postgresql_where=sa.text('parent_id IS NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_questions_type_random', table_name='questions', schema='content')
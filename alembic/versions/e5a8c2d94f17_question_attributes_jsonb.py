@@ -0,0 +1,48 @@
+"""question attributes as JSONB instead of question_metadata rows
+
+Revision ID: e5a8c2d94f17
+Revises: d91f3b6a7c42
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'e5a8c2d94f17'
+down_revision = 'd91f3b6a7c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('attributes', postgresql.JSONB(), nullable=False, server_default='{}'),
+                  schema='content')
+    # One object per question from its key/value rows, a repeated key keeps the latest row
+    op.execute("""
+        UPDATE content.questions AS q SET attributes = m.attributes
+        FROM (
+            SELECT question_id, jsonb_object_agg(key, value ORDER BY metadata_id) AS attributes
+            FROM content.question_metadata
+            GROUP BY question_id
+        ) AS m
+        WHERE m.question_id = q.question_id
+    """)
+    op.create_index('ix_questions_attributes', 'questions', ['attributes'], schema='content',
+                    postgresql_using='gin', postgresql_ops={'attributes': 'jsonb_path_ops'})
+
+
+def downgrade() -> None:
+    # Attributes written after the upgrade go back to key/value rows
+    op.execute("""
+        INSERT INTO content.question_metadata (question_id, key, value)
+        SELECT q.question_id, a.key, a.value
+        FROM content.questions AS q, jsonb_each_text(q.attributes) AS a
+        WHERE NOT EXISTS (
+            SELECT 1 FROM content.question_metadata AS m
+            WHERE m.question_id = q.question_id AND m.key = a.key
+        )
+    """)
+    op.drop_index('ix_questions_attributes', table_name='questions', schema='content')
+    op.drop_column('questions', 'attributes', schema='content')
@@ -0,0 +1,42 @@
+"""random_key and bucket indexes on content.questions, content.question_views
+
+Revision ID: f27b9d4e1c63
+Revises: e5a8c2d94f17
+Create Date: 2026-10-19 15:00:00
+
+random() is volatile, so adding the column evaluates it once per existing
+row and every question gets its own key.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f27b9d4e1c63'
+down_revision = 'e5a8c2d94f17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('random_key', sa.Float(), nullable=False,
+                                         server_default=sa.func.random()), schema='content')
+    op.create_index('ix_questions_bucket_random', 'questions',
+                    ['practice_type', 'topic', 'difficulty_level', 'random_key'], schema='content',
+                    postgresql_where=sa.text('parent_id IS NULL'))
+    op.create_index('ix_questions_parent', 'questions', ['parent_id'], schema='content')
+    op.create_table(
+        'question_views',
+        sa.Column('user_id', sa.Integer(), primary_key=True),
+        sa.Column('question_id', sa.Integer(),
+                  sa.ForeignKey('content.questions.question_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('seen_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        schema='content'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('question_views', schema='content')
+    op.drop_index('ix_questions_parent', table_name='questions', schema='content')
+    op.drop_index('ix_questions_bucket_random', table_name='questions', schema='content')
+    op.drop_column('questions', 'random_key', schema='content')
@@ -0,0 +1,30 @@
+"""created_at on content.question_signatures, the LSH index syncs by it
+
+Revision ID: f6a2d8c1e479
+Revises: e1b7c4a9d350
+Create Date: 2026-10-19 20:00:00
+
+Existing rows get the time of the migration, the next sync after it reads
+them all once.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'f6a2d8c1e479'
+down_revision = 'e1b7c4a9d350'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('question_signatures', sa.Column('created_at', sa.DateTime(), nullable=False,
+                                                   server_default=sa.func.clock_timestamp()), schema='content')
+    op.create_index('ix_content_question_signatures_created_at', 'question_signatures', ['created_at'],
+                    schema='content')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_content_question_signatures_created_at', table_name='question_signatures', schema='content')
+    op.drop_column('question_signatures', 'created_at', schema='content')
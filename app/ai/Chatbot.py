@@ -2,7 +2,6 @@ import yaml
 from typing import List, Dict, Literal, Union, Optional
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.messages import HumanMessage, AIMessage,SystemMessage
 from app.ai.LLMFactory import LLMFactory
 from sqlalchemy.orm import Session
@@ -18,17 +17,7 @@ class ChatHistory(BaseModel):
     role: Literal["human", "assistant"]
     content: str
     timestamp: str
-class Chatbot:
-    def __init__(self, config_path: str = "/app/ai/config.yaml", history_limit: int = 20):
-        # Load configuration
-
-        self.config = {}
-        self.history_limit = history_limit
-        self.llm = LLMFactory.create_llm(self.config, provider='google', type='chat')
-        self.parser = JsonOutputParser(pydantic_object=ChatResponse)
-        
-        # Template that includes chat history
-        self.template = """You are a friendly English learning assistant chatbot. Respond naturally like in daily chat messages, using short messages, casual language, and sometimes internet slang/abbreviations when appropriate.
+CHAT_TEMPLATE = """You are a friendly English learning assistant chatbot. Respond naturally like in daily chat messages, using short messages, casual language, and sometimes internet slang/abbreviations when appropriate.
 
 Keep responses conversational and avoid lengthy explanations. Split longer responses into multiple short messages.
 
@@ -45,11 +34,18 @@ Format your response as JSON with:
 
 {format_instructions}
 """
-        self.prompt = ChatPromptTemplate.from_template(
-            template=self.template,
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
-        )
-        self.chain =self.prompt| self.llm | self.parser
+
+class Chatbot:
+    def __init__(self, config_path: str = "/app/ai/config.yaml", history_limit: int = 20):
+        # Load configuration
+
+        self.config = {}
+        self.history_limit = history_limit
+        
+        # Template that includes chat history
+        self.template = CHAT_TEMPLATE
+        self.chain = LLMFactory.create_json_chain(self.template, ChatResponse, provider='google',
+                                                  prompt_class=ChatPromptTemplate, type='chat')
 
     def format_chat_history(self, history) -> str:
         """Format chat history into a string."""
@@ -3,7 +3,9 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import Literal
 from sqlalchemy.orm import Session
-from app.models.content import Question, QuestionContent as DBQuestionContent, Answer, QuestionMetadata as DBQuestionMetadata
+from app.models.content import Question, QuestionContent as DBQuestionContent, Answer
+from app.services.questions import question_attributes, store_payload
+from app.services.dedup import insert_unique, insert_unique_all
 
 class QuestionContent(BaseModel):
     question_text: str = Field(..., description="The text of the question with a blank to fill in")
@@ -38,7 +40,7 @@ conversation_description = '''This exercise helps learners improve their English
 '''
 
 
-def insert_conversation_question(db: Session, question_data: ConversationQuestion):
+def insert_conversation_question(db: Session, question_data: ConversationQuestion, commit: bool = True):
     """Insert a conversation question directly into database using SQLAlchemy"""
     try:
         # Create Question instance
@@ -46,7 +48,11 @@ def insert_conversation_question(db: Session, question_data: ConversationQuestio
             practice_type=question_data.metadata.practice_type,
             question_type=question_data.metadata.question_type,
             topic=question_data.metadata.topic,
-            difficulty_level=question_data.metadata.difficulty_level
+            difficulty_level=question_data.metadata.difficulty_level,
+            attributes=question_attributes(
+                question_data.metadata.dict(),
+                exclude=['practice_type', 'question_type', 'topic', 'difficulty_level']
+            )
         )
         db.add(question)
         db.flush()  # Get the question_id without committing
@@ -70,26 +76,22 @@ def insert_conversation_question(db: Session, question_data: ConversationQuestio
         )
         db.add(answer)
 
-        # Add additional metadata
-        for key, value in question_data.metadata.dict().items():
-            if key not in ['practice_type', 'question_type', 'topic', 'difficulty_level', 'conversation_context']:
-                metadata = DBQuestionMetadata(
-                    question_id=question.question_id,
-                    key=key,
-                    value=str(value)
-                )
-                db.add(metadata)
-
-        db.commit()
+        store_payload(db, question.question_id)
+        if commit:
+            db.commit()
         print(f"Successfully inserted conversation question with ID: {question.question_id}")
         return question.question_id
 
     except Exception as e:
-        db.rollback()
+        if commit:
+            db.rollback()
         print(f"Error inserting data: {e}")
         raise e
 
-def generate_conversation_question(topic, db: Session):
+def conversation_signature_text(question_data: ConversationQuestion) -> str:
+    return question_data.content.question_text
+
+def generate_conversation_question(topic, db: Session = None):
     conversation_question = QuestionGenerator(ConversationQuestion)
     response_dict = conversation_question.generate_question({
         "description": conversation_description,
@@ -100,7 +102,23 @@ def generate_conversation_question(topic, db: Session):
     # OR use this for Pydantic v1
     # response = ConversationQuestion.parse_obj(response_dict)
     
-    question_id = insert_conversation_question(db, response)
-    return question_id
-    
+    if db:
+        question_id = insert_unique(db, response.metadata.practice_type, conversation_signature_text(response),
+                                    lambda: insert_conversation_question(db, response, commit=False))
+        return question_id
+
+    return response
+
+def generate_conversation_questions(topic, count: int = 5, db: Session = None):
+    """count fill-in items from one LLM call, invalid items dropped, the rest stored in one transaction"""
+    conversation_question = QuestionGenerator(ConversationQuestion)
+    responses = conversation_question.generate_questions({
+        "description": conversation_description,
+        "topic": topic
+    }, count)
+
+    if db:
+        return insert_unique_all(db, "conversation", responses, conversation_signature_text,
+                                 insert_conversation_question)
 
+    return responses
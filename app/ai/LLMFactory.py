@@ -1,11 +1,86 @@
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAI
 from langchain_community.llms import HuggingFaceHub
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.json import parse_json_markdown, parse_partial_json
 # from langchain.llms.huggingface_pipeline import HuggingFacePipeline
+from collections import Counter
 from dotenv import load_dotenv
+import json
 import os
+import re
+import threading
 load_dotenv()
 
+# Providers whose chat models take the response schema through the API, and the
+# with_structured_output arguments used for it. Others get it as prompt instructions.
+STRUCTURED_OUTPUT_ARGS = {
+    # langchain-google-genai always sends the schema as a forced function declaration
+    "google": {},
+    "openai": {"method": "json_schema"},
+}
+# Stands in for the JSON schema in templates when the provider receives it natively
+STRUCTURED_OUTPUT_NOTE = "Fill in every field of the response schema."
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+# Counters of the output repair stage since the process started, reported by app.ai.batch
+generation_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def count_stat(key: str, n: int = 1):
+    with _stats_lock:
+        generation_stats[key] += n
+
+
+def repair_json(text: str):
+    """Parse a model reply as JSON, fixing locally what models commonly get wrong:
+    code fences or prose around the object, trailing commas, and a reply cut off
+    at max_tokens (open strings and brackets are closed, the unfinished tail dropped).
+    Raises OutputParserException when nothing can be recovered."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    value = None
+    try:
+        value = parse_json_markdown(text)
+    except Exception:
+        starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+        if starts:
+            candidate = _TRAILING_COMMA.sub(r"\1", text[min(starts):])
+            try:
+                # raw_decode stops after the first complete value, whatever follows is ignored
+                value = json.JSONDecoder(strict=False).raw_decode(candidate)[0]
+            except json.JSONDecodeError:
+                try:
+                    value = parse_partial_json(candidate)
+                except json.JSONDecodeError:
+                    value = None
+    if value is None:
+        raise OutputParserException(f"Invalid json output: {text[:200]}", llm_output=text)
+    count_stat("json_repaired")
+    return value
+
+
+def _json_reply(message):
+    return repair_json(getattr(message, "content", message))
+
+
+def _structured_result(result: dict):
+    """include_raw output -> plain dict. When the schema validation fails (one bad item
+    in a list), the raw arguments are returned so callers can filter item by item."""
+    if result.get("parsed") is not None:
+        return result["parsed"].model_dump()
+    raw = result["raw"]
+    if getattr(raw, "tool_calls", None):
+        return raw.tool_calls[0]["args"]
+    return repair_json(raw.content)
+
+
 class LLMFactory:
     @staticmethod
     def create_llm(config: dict,provider = 'google', model='gemini-2.0-flash' ,type ='chat'):
@@ -40,3 +115,31 @@ class LLMFactory:
         #     return HuggingFacePipeline(pipeline=pipe)
         else:
             raise ValueError(f"Unsupported provider: {provider}")
+
+    @staticmethod
+    def create_json_chain(template: str, schema, provider='google', model='gemini-2.0-flash',
+                          prompt_class=PromptTemplate, structured: bool = True, type='llm'):
+        """prompt | model returning a dict shaped like the pydantic schema.
+
+        The template has a {format_instructions} slot. With structured output it
+        only gets STRUCTURED_OUTPUT_NOTE and the schema goes through the provider
+        API, otherwise it gets the JsonOutputParser instructions as before and
+        type picks the model class. Replies are parsed with repair_json.
+        """
+        if structured and provider in STRUCTURED_OUTPUT_ARGS:
+            llm = LLMFactory.create_llm({}, provider=provider, model=model, type='chat')
+            prompt = prompt_class.from_template(
+                template=template,
+                partial_variables={"format_instructions": STRUCTURED_OUTPUT_NOTE}
+            )
+            return (prompt
+                    | llm.with_structured_output(schema, include_raw=True, **STRUCTURED_OUTPUT_ARGS[provider])
+                    | RunnableLambda(_structured_result))
+        parser = JsonOutputParser(pydantic_object=schema)
+        prompt = prompt_class.from_template(
+            template=template,
+            partial_variables={"format_instructions": parser.get_format_instructions()}
+        )
+        return (prompt
+                | LLMFactory.create_llm({}, provider=provider, model=model, type=type)
+                | RunnableLambda(_json_reply))
@@ -1,8 +1,12 @@
-from QuestionGenerator import QuestionGenerator
+from app.ai.QuestionGenerator import QuestionGenerator
 from langchain_core.output_parsers import  JsonOutputParser
 
 from pydantic import BaseModel, Field
 from typing import Literal,List
+from sqlalchemy.orm import Session
+from app.models.content import Question as DBQuestion, QuestionContent as DBQuestionContent, Answer
+from app.services.questions import question_attributes, store_payload
+from app.services.dedup import insert_unique_all
 import json
 
 class AnswerOption(BaseModel):
@@ -120,6 +124,87 @@ Return a JSON object with:
 '''
 }
 
+def insert_listening_question(db: Session, question_data: TOEICListeningQuestion, commit: bool = True):
+    """Insert a listening item: the transcript as the root, one child per question"""
+    try:
+        audio_question = DBQuestion(
+            practice_type=question_data.metadata.practice_type,
+            question_type='audio',  # Fixed as 'audio' for the transcript
+            topic=question_data.metadata.topic,
+            difficulty_level=question_data.metadata.difficulty_level,
+            attributes=question_attributes(
+                question_data.metadata.dict(),
+                exclude=['practice_type', 'question_type', 'topic', 'difficulty_level']
+            )
+        )
+        db.add(audio_question)
+        db.flush()
+
+        db.add(DBQuestionContent(
+            question_id=audio_question.question_id,
+            question_text="Listening",
+            context=question_data.content.context,
+            passage_text=question_data.content.audio_transcript
+        ))
+
+        for question in question_data.content.questions:
+            child_question = DBQuestion(
+                practice_type=question_data.metadata.practice_type,
+                question_type=question_data.metadata.question_type,
+                topic=question_data.metadata.topic,
+                difficulty_level=question_data.metadata.difficulty_level,
+                parent_id=audio_question.question_id
+            )
+            db.add(child_question)
+            db.flush()
+
+            db.add(DBQuestionContent(
+                question_id=child_question.question_id,
+                question_text=question.question_text,
+                context=question_data.content.context
+            ))
+            for i, option in enumerate(question.options):
+                db.add(Answer(
+                    question_id=child_question.question_id,
+                    content=option.option,
+                    is_correct=option.is_correct,
+                    option_order=i + 1,
+                    hint=question_data.content.hint,
+                    answer_type='option'
+                ))
+
+        store_payload(db, audio_question.question_id)
+        if commit:
+            db.commit()
+        print(f"Successfully inserted listening item with ID: {audio_question.question_id}")
+        return audio_question.question_id
+
+    except Exception as e:
+        if commit:
+            db.rollback()
+        print(f"Error inserting data: {e}")
+        raise e
+
+def listening_signature_text(question_data: TOEICListeningQuestion) -> str:
+    return "\n".join(["Listening", question_data.content.audio_transcript]
+                     + [question.question_text for question in question_data.content.questions])
+
+def generate_listening_questions(topic: str, count: int = 5, part: str = "part2", db: Session = None):
+    """count TOEIC items from one LLM call. Meant for the short Part 2 items, where the
+    prompt and format instructions are most of the tokens of a single-item call."""
+    listening_question = QuestionGenerator(TOEICListeningQuestion)
+    responses = listening_question.generate_questions({
+        "description": TOEIC_PROMPTS[part],
+        "topic": topic
+    }, count)
+    # The model sometimes labels the part itself, keep the one that was asked for
+    responses = [response for response in responses if response.metadata.toeic_part == part]
+
+    if db:
+        return insert_unique_all(db, "listening", responses, listening_signature_text, insert_listening_question)
+
+    return responses
+
 if __name__ == "__main__":
     conservation_question = QuestionGenerator(TOEICListeningQuestion)
     response = conservation_question.generate_question({"description": TOEIC_PROMPTS['part4'],
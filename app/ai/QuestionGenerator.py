@@ -1,20 +1,16 @@
+import copy
+import json
 import yaml
-from app.ai.LLMFactory import LLMFactory
-from typing import List, Dict, Literal, Union
-from langchain_core.prompts import PromptTemplate
+from app.ai.LLMFactory import LLMFactory, count_stat
+from typing import List, Dict, Literal, Union, get_args, get_origin
+from pydantic import BaseModel, Field, ValidationError, create_model
 
+MULTI_ITEM_INSTRUCTION = '''
+- Generate {count} separate, independent items that follow the description above, each on a different situation.
+- Return them in the "items" list.
+'''
 
-from langchain_core.output_parsers import  JsonOutputParser
-from pydantic import BaseModel, Field
-
-class QuestionGenerator:
-    def __init__(self,parser,config_path: str = "config.yaml"):
-        self.config = {}
-
-        self.llm = LLMFactory.create_llm(self.config,provider ='google',type='llm')
-        self.parser = JsonOutputParser(pydantic_object=parser)
-        
-        self.template = '''
+QUESTION_TEMPLATE = '''
 You are a professional assistant specialized in generating English questions for learners. Your task is to create questions based on the provided information.
 
 ## Question Type:  
@@ -32,29 +28,179 @@ You are a professional assistant specialized in generating English questions for
 
 Please return only the result without any explanations.
 '''
-        self.prompt = PromptTemplate.from_template(
-                    template=self.template,
-                    partial_variables={"format_instructions": self.parser.get_format_instructions()}
-                )
-        self.chain = self.prompt | self.llm | self.parser
+
+REASK_TEMPLATE = '''
+You are a professional assistant specialized in generating English questions for learners. Some items of a question set you generated were rejected, write replacements for those items only.
+
+## The question set, rejected items removed:
+{context}
+
+## Rejected items of "{field}" and their problems:
+{rejected}
+
+## Requirements:
+- Generate {count} new items for "{field}" that fit the question set above and avoid the problems listed.
+- Format the output according to the instructions below.
+
+## Output Format:
+{format_instructions}
+
+Please return only the result without any explanations.
+'''
+
+
+def _invalid_items(error: ValidationError):
+    """{list path: {index: [problems]}} of the list items the errors are in, None when
+    an error is outside any list (a wrong metadata field), nothing can be kept then"""
+    invalid = {}
+    for detail in error.errors():
+        loc = detail["loc"]
+        index = next((i for i, part in enumerate(loc) if isinstance(part, int)), None)
+        if index is None:
+            return None
+        invalid.setdefault(loc[:index], {}).setdefault(loc[index], []).append(
+            f"{'.'.join(str(part) for part in loc[index + 1:]) or 'item'}: {detail['msg']}"
+        )
+    return invalid
+
+
+def _list_item_type(schema, path):
+    """Model class of the items of the list field at path, None if they are not models"""
+    annotation = schema
+    for name in path:
+        if not (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+            return None
+        annotation = annotation.model_fields[name].annotation
+        # Optional[X] -> X
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if get_origin(annotation) is Union and len(args) == 1:
+            annotation = args[0]
+    if get_origin(annotation) is not list:
+        return None
+    item_type = get_args(annotation)[0]
+    return item_type if isinstance(item_type, type) and issubclass(item_type, BaseModel) else None
+
+
+class QuestionGenerator:
+    def __init__(self,parser,config_path: str = "config.yaml", provider: str = 'google', structured: bool = True):
+        self.config = {}
+
+        self.provider = provider
+        self.structured = structured
+        self.schema = parser
+        self.list_chain = None
+        self.reask_chains = {}
+        
+        self.template = QUESTION_TEMPLATE
+        self.chain = LLMFactory.create_json_chain(self.template, parser, provider=provider, structured=structured)
 
     def generate_question(self, question_info):
-        try:
-            input_text = self.prompt.format(
-                question_type_description=question_info['description'],
-                topic=question_info['topic']
-            )
+        """One question set as a dict that validates against the schema.
+
+        Invalid items of its lists are replaced through repair(), the rest of the
+        set is kept. Provider errors, replies that are not JSON and sets with a
+        wrong top-level field raise.
+        """
+        # Gọi model để tạo câu hỏi
+        result = self.chain.invoke({
+            "question_type_description": question_info['description'],
+            "topic": question_info['topic']
+        })
+        return self.repair(result).model_dump()
 
+    def repair(self, data):
+        """data validated against the schema. List items that fail validation (a
+        reading question with 3 options) are dropped and asked for again in one
+        small call per list, instead of regenerating the whole set."""
+        count_stat("sets")
+        try:
+            return self.schema.model_validate(data)
+        except ValidationError as e:
+            invalid = _invalid_items(e)
+            if invalid is None:
+                count_stat("sets_failed")
+                raise
+        data = copy.deepcopy(data)
+        for path, rejected in invalid.items():
+            items = data
+            for name in path:
+                items = items[name]
+            rejected_items = [(items[index], problems) for index, problems in sorted(rejected.items())]
+            items[:] = [item for index, item in enumerate(items) if index not in rejected]
+            count_stat("items_rejected", len(rejected_items))
+            items.extend(self._reask(data, path, rejected_items))
+            if not items:
+                count_stat("sets_failed")
+                raise ValueError(f"No valid item left in {'.'.join(path)}")
+        try:
+            result = self.schema.model_validate(data)
+        except ValidationError:
+            count_stat("sets_failed")
+            raise
+        count_stat("sets_repaired")
+        return result
 
-            # Gọi model để tạo câu hỏi
-            result = self.chain.invoke({
-                "question_type_description": question_info['description'],
-                "topic": question_info['topic']
+    def _reask(self, data, path, rejected):
+        """Replacements for the rejected items of the list at path, each validated on its own"""
+        item_type = _list_item_type(self.schema, path)
+        if item_type is None:
+            return []
+        if item_type not in self.reask_chains:
+            wrapper = create_model(
+                f"{item_type.__name__}List",
+                items=(List[item_type], Field(..., description="The replacement items"))
+            )
+            self.reask_chains[item_type] = LLMFactory.create_json_chain(REASK_TEMPLATE, wrapper, provider=self.provider,
+                                                                        structured=self.structured)
+        field = ".".join(path)
+        count_stat("reasks")
+        try:
+            result = self.reask_chains[item_type].invoke({
+                "context": json.dumps(data, ensure_ascii=False, indent=1),
+                "field": field,
+                "rejected": "\n".join(f"- {json.dumps(item, ensure_ascii=False)}\n  problems: {'; '.join(problems)}"
+                                      for item, problems in rejected),
+                "count": len(rejected)
             })
-            return result
         except Exception as e:
-            return 'Error generating question: ' + str(e)
-        
+            print(f"Re-ask for {field} failed: {str(e)}")
+            return []
+        items = result.get("items", []) if isinstance(result, dict) else result
+        replacements = []
+        for item in (items if isinstance(items, list) else [])[:len(rejected)]:
+            try:
+                replacements.append(item_type.model_validate(item).model_dump())
+            except ValidationError as e:
+                print(f"Dropped invalid replacement item: {e.error_count()} errors")
+        count_stat("items_recovered", len(replacements))
+        return replacements
+
+    def _build_list_chain(self):
+        # {"items": [...]}, the schema of one item is the single question schema
+        wrapper = create_model(
+            f"{self.schema.__name__}List",
+            items=(List[self.schema], Field(..., description="The generated items, all different from each other"))
+        )
+        self.list_chain = LLMFactory.create_json_chain(self.template, wrapper, provider=self.provider,
+                                                       structured=self.structured)
 
+    def generate_questions(self, question_info, count: int):
+        """count items from a single call, the prompt and format instructions are paid once.
 
-    
+        Every item is validated on its own, invalid ones are dropped and the
+        rest returned as schema instances. Provider errors raise.
+        """
+        if self.list_chain is None:
+            self._build_list_chain()
+        result = self.list_chain.invoke({
+            "question_type_description": question_info['description'] + MULTI_ITEM_INSTRUCTION.format(count=count),
+            "topic": question_info['topic']
+        })
+        items = result.get("items", []) if isinstance(result, dict) else result
+        valid = []
+        for item in (items if isinstance(items, list) else [])[:count]:
+            try:
+                valid.append(self.schema.model_validate(item))
+            except ValidationError as e:
+                print(f"Dropped invalid generated item: {e.error_count()} errors")
+        return valid
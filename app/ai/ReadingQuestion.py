@@ -1,9 +1,25 @@
 from pydantic import BaseModel, Field, validator
 from typing import Literal, List, Optional, Union
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
+import math
+import re
 from app.ai.QuestionGenerator import QuestionGenerator
 from sqlalchemy.orm import Session
-from app.models.content import Question, QuestionContent as DBQuestionContent, Answer, QuestionMetadata as DBQuestionMetadata
+from app.models.content import Question, QuestionContent as DBQuestionContent, Answer
+from app.services.questions import question_attributes, store_payload
+from app.services.dedup import insert_unique, minhash, similarity
+
+# Long user content is cut into overlapping chunks of whole sentences, one LLM call each
+CHUNK_WORDS = 700
+OVERLAP_WORDS = 100
+QUESTIONS_PER_CHUNK = 4
+CHUNK_CONCURRENCY = 4
+# Questions from overlapping chunks often ask the same thing in other words
+MERGE_THRESHOLD = 0.6
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
 
 # Base metadata model
 class ReadingMetadata(BaseModel):
@@ -19,13 +35,15 @@ class MultipleChoiceOption(BaseModel):
     is_correct: bool = Field(..., description="Whether this option is the correct answer")
 
 class QuestionContent(BaseModel):
+    # First, the validators below only see the fields declared before the one they check
+    question_type: Literal["multiple_choice", "true_false", "short_answer"] = Field(..., description="Type of question")
     options: Optional[List[MultipleChoiceOption]] = Field(None, description="4 options for multiple_choice and 2 options for true_false, null for short_answer")
     question_text: str = Field(..., description="The text of the question")
     sample_answer: Optional[str] = Field(None, description="A sample correct answer only for question_type is short_answer, No more than three words")
     explanation: str = Field(..., description="Explanation for correct answer")
-    question_type: Literal["multiple_choice", "true_false", "short_answer"] = Field(..., description="Type of question")
 
-    @validator('options')
+    # always: an omitted field is checked too, not only an explicit null
+    @validator('options', always=True)
     def validate_options(cls, v, values):
         question_type = values.get('question_type')
         if question_type in ['multiple_choice', 'true_false']:
@@ -41,7 +59,7 @@ class QuestionContent(BaseModel):
             raise ValueError('short_answer questions should not have options')
         return v
 
-    @validator('sample_answer')
+    @validator('sample_answer', always=True)
     def validate_sample_answer(cls, v, values):
         if values.get('question_type') == 'short_answer' and not v:
             raise ValueError('sample_answer is required for short_answer questions')
@@ -67,6 +85,13 @@ class ReadingPractice(BaseModel):
     content: ReadingContent
     user_provided_source: Optional[UserProvidedContent] = Field(None, description="Information about user-provided source if applicable")
 
+# Questions on one chunk of a long user-provided document
+class ReadingChunkQuestions(BaseModel):
+    title: str = Field(..., description="A short title for the whole document")
+    topic: str = Field(..., description="The general topic of the document")
+    difficulty_level: Literal["Beginner", "Intermediate", "Advanced"] = Field(..., description="Estimated difficulty of the text")
+    questions: List[QuestionContent] = Field(..., description="List of questions about this part of the document")
+
 # Prompt templates for generated content
 READING_PROMPTS = {
     "general": '''
@@ -123,12 +148,32 @@ Return a JSON object with:
 4. Questions of the specified type with correct answers and explanations
 5. A summary and learning points
 '''
+,
+
+    "user_provided_chunk": '''
+Reading Comprehension Question Generation
+
+The content below is part {part} of {parts} of a longer document on the topic: {topic}.
+
+Content to analyze:
+```
+{user_content}
+```
+
+Guidelines:
+- Create {num_questions} questions that can be answered from this part alone.
+- Question type can be multiple-choice (4 options), true/false (2 options), short answer (no more than three words)
+- Multiple-choice questions account for about half of the questions.
+- Include an explanation for each correct answer.
+- Estimate the difficulty level of the text, and suggest a short title and topic for the whole document.
+'''
 }
 
 # Implementation sketch of content generator (not fully implemented)
 class ReadingContentGenerator:
     def __init__(self):
         self.question_generator = QuestionGenerator(ReadingPractice)
+        self.chunk_generator = QuestionGenerator(ReadingChunkQuestions)
     
     def generate_from_topic(self, topic, difficulty_level="Intermediate", 
                            content_type="article", 
@@ -162,20 +207,37 @@ class ReadingContentGenerator:
     
     def generate_from_user_content(self, content, content_type, topic=None, 
                                   question_type="multiple_choice", num_questions=5):
-        """Generate reading practice questions from user-provided content"""
-        
+        """Blocking agenerate_from_user_content for sync callers, usable from inside a
+        running event loop too (then it runs on a worker thread with its own loop)"""
+        return _run_sync(self.agenerate_from_user_content(
+            content, content_type, topic=topic, question_type=question_type, num_questions=num_questions
+        ))
+
+    async def agenerate_from_user_content(self, content, content_type, topic=None,
+                                          question_type="multiple_choice", num_questions=5):
+        """Generate reading practice questions from user-provided content.
+
+        Content longer than one chunk goes through generate_from_long_content, so all
+        of it is read.
+        """
+        if len(chunk_passages(content)) > 1:
+            response = await self.generate_from_long_content(
+                content, topic=topic, content_type=content_type, max_questions=num_questions
+            )
+            return response.model_dump()
+
         if topic is None:
             # We could extract a topic from the content using LLM
             topic = "extracted topic"
         
         prompt = READING_PROMPTS["user_provided"].format(
             topic=topic,
-            user_content=content[:8000],  # Limiting content length for LLM context
+            user_content=content,
             num_questions=num_questions
         )
         
         # Here we would call the LLM through QuestionGenerator
-        response = self.question_generator.generate_question({
+        response = await asyncio.to_thread(self.question_generator.generate_question, {
             "description": prompt,
             "topic": topic
         })
@@ -184,6 +246,116 @@ class ReadingContentGenerator:
         
         return response
 
+    async def generate_from_long_content(self, content, topic=None, title=None, content_type="text",
+                                         source_url=None, max_questions=20, concurrency=CHUNK_CONCURRENCY):
+        """Reading practice on the whole of a user-provided document of any length.
+
+        Map: every chunk gets its own call, at most concurrency at a time, so one
+        call's latency does not grow with the document. Reduce: the questions are
+        merged without near-duplicates, the passage is the full original text.
+        Chunks that fail are skipped, it raises only when all of them do.
+        """
+        chunks = chunk_passages(content)
+        if not chunks:
+            raise ValueError("The content has no text")
+        # About 1.5x the questions kept, leaves room for the duplicates dropped in the merge
+        per_chunk = max(1, min(QUESTIONS_PER_CHUNK, math.ceil(max_questions * 1.5 / len(chunks))))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def generate_chunk(index, chunk):
+            prompt = READING_PROMPTS["user_provided_chunk"].format(
+                part=index + 1,
+                parts=len(chunks),
+                topic=topic or "not given, infer it from the content",
+                user_content=chunk,
+                num_questions=per_chunk
+            )
+            async with semaphore:
+                try:
+                    response = await asyncio.to_thread(self.chunk_generator.generate_question, {
+                        "description": prompt,
+                        "topic": topic or "the topic of the content"
+                    })
+                    return ReadingChunkQuestions.model_validate(response)
+                except Exception as e:
+                    print(f"Skipped chunk {index + 1}/{len(chunks)}: {str(e)}")
+                    return None
+
+        results = [result for result in await asyncio.gather(*(generate_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+                   if result is not None]
+        if not results:
+            raise ValueError("No question could be generated from the content")
+
+        difficulty = Counter(result.difficulty_level for result in results).most_common(1)[0][0]
+        return ReadingPractice(
+            metadata=ReadingMetadata(source_type="user_provided", topic=topic or results[0].topic,
+                                     difficulty_level=difficulty),
+            content=ReadingContent(title=title or results[0].title, passage=content,
+                                   questions=merge_questions([result.questions for result in results], max_questions)),
+            user_provided_source=UserProvidedContent(source_url=source_url, content_type=content_type)
+        )
+
+def _run_sync(coroutine):
+    """Run a coroutine to completion from sync code. asyncio.run cannot start inside a
+    running loop, so from there it gets a worker thread and a loop of its own."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+def _sentences(text: str, chunk_words: int):
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        # A run without punctuation (extracted PDF text) is cut every chunk_words words
+        for start in range(0, len(words), chunk_words):
+            yield words[start:start + chunk_words]
+
+def chunk_passages(text: str, chunk_words: int = CHUNK_WORDS, overlap_words: int = OVERLAP_WORDS):
+    """Windows of whole sentences of about chunk_words words. The last overlap_words
+    of a chunk open the next one, a sentence pair cut apart still shares a chunk."""
+    chunks, current, words = [], [], 0
+    carried = 0  # words of current already in the last chunk
+    for sentence in _sentences(text, chunk_words):
+        current.append(sentence)
+        words += len(sentence)
+        if words >= chunk_words:
+            chunks.append(" ".join(" ".join(sentence) for sentence in current))
+            tail, tail_words = [], 0
+            for sentence in reversed(current[1:]):
+                if tail_words >= overlap_words:
+                    break
+                tail.insert(0, sentence)
+                tail_words += len(sentence)
+            current, words, carried = tail, tail_words, tail_words
+    # Whatever is left, unless it is all overlap already in the last chunk
+    if current and words > carried:
+        chunks.append(" ".join(" ".join(sentence) for sentence in current))
+    return chunks
+
+def _answer_text(question: QuestionContent) -> str:
+    if question.question_type == "short_answer":
+        return question.sample_answer or ""
+    return next((option.option for option in question.options or [] if option.is_correct), "")
+
+def merge_questions(chunk_questions, max_questions: int):
+    """Up to max_questions taken round robin from the chunks, so they cover the whole
+    document, skipping near-duplicates of a question already taken"""
+    queues = [list(questions) for questions in chunk_questions]
+    kept, signatures = [], []
+    while len(kept) < max_questions and any(queues):
+        for queue in queues:
+            if not queue or len(kept) >= max_questions:
+                continue
+            question = queue.pop(0)
+            signature = minhash(f"{question.question_text} {_answer_text(question)}")
+            if any(similarity(signature, other) >= MERGE_THRESHOLD for other in signatures):
+                continue
+            kept.append(question)
+            signatures.append(signature)
+    return kept
+
 # Content extraction services (implementation sketch)
 # class ContentExtractor:
 #     def extract_from_url(self, url):
@@ -206,7 +378,7 @@ class ReadingContentGenerator:
 
 # Main API to use the system
 
-def insert_reading_question(db: Session, question_data: ReadingPractice):
+def insert_reading_question(db: Session, question_data: ReadingPractice, commit: bool = True):
     """Insert a reading question directly into database using SQLAlchemy"""
     try:
         # Create main passage question
@@ -214,7 +386,11 @@ def insert_reading_question(db: Session, question_data: ReadingPractice):
             practice_type=question_data.metadata.practice_type,
             question_type='passage',  # Fixed as 'passage' for main reading text
             topic=question_data.metadata.topic,
-            difficulty_level=question_data.metadata.difficulty_level
+            difficulty_level=question_data.metadata.difficulty_level,
+            attributes=question_attributes(
+                question_data.metadata.dict(),
+                exclude=['practice_type', 'topic', 'difficulty_level']
+            )
         )
         db.add(passage_question)
         db.flush()  # Get the passage_question_id
@@ -228,16 +404,6 @@ def insert_reading_question(db: Session, question_data: ReadingPractice):
         )
         db.add(passage_content)
 
-        # Add metadata for passage
-        for key, value in question_data.metadata.dict().items():
-            if key not in ['practice_type', 'topic', 'difficulty_level']:
-                metadata = DBQuestionMetadata(
-                    question_id=passage_question.question_id,
-                    key=key,
-                    value=str(value)
-                )
-                db.add(metadata)
-
         # Add child questions
         for question in question_data.content.questions:
             # Create child question
@@ -282,15 +448,23 @@ def insert_reading_question(db: Session, question_data: ReadingPractice):
                     )
                     db.add(answer)
 
-        db.commit()
+        store_payload(db, passage_question.question_id)
+        if commit:
+            db.commit()
         print(f"Successfully inserted reading passage and {len(question_data.content.questions)} questions")
         return passage_question.question_id
 
     except Exception as e:
-        db.rollback()
+        if commit:
+            db.rollback()
         print(f"Error inserting data: {e}")
         raise e
 
+def reading_signature_text(question_data: ReadingPractice) -> str:
+    """Same text the stored set is signed on: passage title row, passage, then the questions"""
+    return "\n".join(["Reading Passage", question_data.content.passage]
+                     + [question.question_text for question in question_data.content.questions])
+
 def generate_reading_question(topic: str, difficulty_level: str = "Intermediate", 
                             content_type: str = "article", length: str = "medium", 
                             num_questions: int = 8, db: Session = None):
@@ -308,7 +482,32 @@ def generate_reading_question(topic: str, difficulty_level: str = "Intermediate"
     response = ReadingPractice.model_validate(response_dict)
     
     if db:
-        question_id = insert_reading_question(db, response)
+        question_id = insert_unique(db, response.metadata.practice_type, reading_signature_text(response),
+                                    lambda: insert_reading_question(db, response, commit=False))
         return question_id
     
     return response
+
+async def generate_reading_from_content(content: str, topic: str = None, title: str = None,
+                                        content_type: str = "text", source_url: str = None,
+                                        max_questions: int = 20, db: Session = None):
+    """Reading practice on user-provided content of any length, optionally inserted"""
+    generator = ReadingContentGenerator()
+    response = await generator.generate_from_long_content(
+        content,
+        topic=topic,
+        title=title,
+        content_type=content_type,
+        source_url=source_url,
+        max_questions=max_questions
+    )
+
+    if db:
+        # Sync SQLAlchemy, off the event loop like the chunk calls
+        question_id = await asyncio.to_thread(
+            insert_unique, db, response.metadata.practice_type, reading_signature_text(response),
+            lambda: insert_reading_question(db, response, commit=False)
+        )
+        return question_id
+
+    return response
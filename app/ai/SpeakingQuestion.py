@@ -3,7 +3,9 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import Literal, List
 from sqlalchemy.orm import Session
-from app.models.content import Question, QuestionContent as DBQuestionContent, Answer, QuestionMetadata as DBQuestionMetadata
+from app.models.content import Question, QuestionContent as DBQuestionContent, Answer
+from app.services.questions import measured_difficulty, question_attributes, store_payload
+from app.services.dedup import insert_unique
 import random
 
 # Models for IELTS Speaking
@@ -97,12 +99,9 @@ def format_question_with_followups(question_data: SpeakingQuestion) -> str:
     
     return formatted_question
 
-def insert_speaking_question(db: Session, question_data: IELTSSpeakingQuestion):
+def insert_speaking_question(db: Session, question_data: IELTSSpeakingQuestion, commit: bool = True):
     """Insert a speaking question directly into database using SQLAlchemy"""
     try:
-        # Set default difficulty level if not provided
-        difficulty_level = getattr(question_data.metadata, 'difficulty_level', 'Medium')
-        
         # Process each question in the content
         for question in question_data.content.questions:
             # Format the question text to include follow-up questions
@@ -113,7 +112,11 @@ def insert_speaking_question(db: Session, question_data: IELTSSpeakingQuestion):
                 practice_type=question_data.metadata.practice_type,
                 question_type=question_data.metadata.question_type,
                 topic=question_data.metadata.topic,
-                difficulty_level=difficulty_level
+                difficulty_level=measured_difficulty(formatted_question),
+                attributes=question_attributes(
+                    question_data.metadata.dict(),
+                    exclude=['practice_type', 'question_type', 'topic', 'difficulty_level']
+                )
             )
             db.add(db_question)
             db.flush()  # Get the question_id without committing
@@ -140,25 +143,23 @@ def insert_speaking_question(db: Session, question_data: IELTSSpeakingQuestion):
             )
             db.add(answer)
 
-            # Add additional metadata
-            for key, value in question_data.metadata.dict().items():
-                if key not in ['practice_type', 'question_type', 'topic', 'difficulty_level']:
-                    metadata = DBQuestionMetadata(
-                        question_id=db_question.question_id,
-                        key=key,
-                        value=str(value)
-                    )
-                    db.add(metadata)
-
-            db.commit()
+            store_payload(db, db_question.question_id)
+            if commit:
+                db.commit()
             print(f"Successfully inserted speaking question with ID: {db_question.question_id}")
             return db_question.question_id
 
     except Exception as e:
-        db.rollback()
+        if commit:
+            db.rollback()
         print(f"Error inserting data: {e}")
         raise e
 
+def speaking_signature_text(question_data: IELTSSpeakingQuestion) -> str:
+    # Only the first question of the response is stored
+    questions = question_data.content.questions
+    return format_question_with_followups(questions[0]) if questions else ""
+
 def generate_speaking_question(topic: str, part: str = None, db: Session = None):
     """Generate and insert a speaking question"""
     # If part is not specified, randomly choose between part1 and part2
@@ -175,7 +176,8 @@ def generate_speaking_question(topic: str, part: str = None, db: Session = None)
     response = IELTSSpeakingQuestion.model_validate(response_dict)
     
     if db:
-        question_id = insert_speaking_question(db, response)
+        question_id = insert_unique(db, response.metadata.practice_type, speaking_signature_text(response),
+                                    lambda: insert_speaking_question(db, response, commit=False))
         return question_id
     
     return response
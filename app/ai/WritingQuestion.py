@@ -4,7 +4,9 @@ from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import Literal, List, Optional
 from sqlalchemy.orm import Session
-from app.models.content import Question, QuestionContent as DBQuestionContent, Answer, QuestionMetadata as DBQuestionMetadata
+from app.models.content import Question, QuestionContent as DBQuestionContent, Answer
+from app.services.questions import measured_difficulty, question_attributes, store_payload
+from app.services.dedup import insert_unique
 import json
 import random
 
@@ -153,7 +155,7 @@ def format_hints_and_vocabulary(hints: List[str], vocabulary: List[str]) -> str:
     
     return formatted_hint
 
-def insert_writing_question(db: Session, question_data: IELTSWritingQuestion):
+def insert_writing_question(db: Session, question_data: IELTSWritingQuestion, commit: bool = True):
     """Insert a writing question directly into database using SQLAlchemy"""
     try:
         # Create Question instance
@@ -161,7 +163,11 @@ def insert_writing_question(db: Session, question_data: IELTSWritingQuestion):
             practice_type=question_data.metadata.practice_type,
             question_type='writing',  # Fixed as 'writing'
             topic=question_data.metadata.topic,
-            difficulty_level='Medium'  # Default difficulty
+            difficulty_level=measured_difficulty(writing_signature_text(question_data)),
+            attributes=question_attributes(
+                question_data.metadata.dict(),
+                exclude=['practice_type', 'topic', 'difficulty_level']
+            )
         )
         db.add(db_question)
         db.flush()
@@ -193,25 +199,22 @@ def insert_writing_question(db: Session, question_data: IELTSWritingQuestion):
         )
         db.add(answer)
 
-        # Add additional metadata
-        for key, value in question_data.metadata.dict().items():
-            if key not in ['practice_type', 'topic', 'difficulty_level']:
-                metadata = DBQuestionMetadata(
-                    question_id=db_question.question_id,
-                    key=key,
-                    value=str(value)
-                )
-                db.add(metadata)
-
-        db.commit()
+        store_payload(db, db_question.question_id)
+        if commit:
+            db.commit()
         print(f"Successfully inserted writing question with ID: {db_question.question_id}")
         return db_question.question_id
 
     except Exception as e:
-        db.rollback()
+        if commit:
+            db.rollback()
         print(f"Error inserting data: {e}")
         raise e
 
+def writing_signature_text(question_data: IELTSWritingQuestion) -> str:
+    content = question_data.content
+    return "\n".join(part for part in (content.task_description, content.data_source) if part)
+
 def generate_writing_question(topic: str, ielts_type: str = None, task_number: str = None, db: Session = None):
     """Generate and optionally insert a writing question"""
     response_dict = generate_ielts_writing_question(topic, ielts_type, task_number)
@@ -220,7 +223,8 @@ def generate_writing_question(topic: str, ielts_type: str = None, task_number: s
     response = IELTSWritingQuestion.model_validate(response_dict)
     
     if db:
-        question_id = insert_writing_question(db, response)
+        question_id = insert_unique(db, response.metadata.practice_type, writing_signature_text(response),
+                                    lambda: insert_writing_question(db, response, commit=False))
         return question_id
     
     return response
@@ -0,0 +1,289 @@
+# app/ai/batch.py
+"""Offline question bank seeding.
+
+    python -m app.ai.batch --topics "travel,health" --types reading,conversation \
+        --difficulties Easy,Medium,Hard --count 50 --concurrency 8 --rate google=60 \
+        --checkpoint seed.ckpt
+
+Each (practice_type, topic, difficulty) cell gets --count question sets. A
+job is one LLM call: one set, or --items-per-call sets for the short types.
+Jobs run on threads under an asyncio semaphore, each provider paced to its
+requests per minute. Results are inserted in batches, one transaction per
+batch with a savepoint per question set. After each batch the finished job
+keys are appended to the checkpoint file, so a rerun with the same
+arguments and checkpoint skips them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from app.ai.ConversastionQuestion import (
+    generate_conversation_questions, insert_conversation_question, conversation_signature_text
+)
+from app.ai.LLMFactory import generation_stats
+from app.ai.ListeningQuestion import generate_listening_questions, insert_listening_question, listening_signature_text
+from app.ai.ReadingQuestion import generate_reading_question, insert_reading_question, reading_signature_text
+from app.ai.SpeakingQuestion import generate_speaking_question, insert_speaking_question, speaking_signature_text
+from app.ai.WritingQuestion import generate_writing_question, insert_writing_question, writing_signature_text
+from app.db.session import SessionLocal
+from app.services.dedup import find_duplicate, record_signature
+
+
+@dataclass
+class BatchType:
+    generate: Callable  # (topic, difficulty, items per call) -> [validated response]
+    insert: Callable
+    signature_text: Callable
+    provider: str
+    # False: the generator picks the difficulty itself, the matrix has one cell per topic
+    uses_difficulty: bool = False
+    # Short items come several to a call, see QuestionGenerator.generate_questions
+    multi_item: bool = False
+
+
+BATCH_TYPES = {
+    "conversation": BatchType(lambda topic, difficulty, count: generate_conversation_questions(topic, count),
+                              insert_conversation_question, conversation_signature_text, "google",
+                              multi_item=True),
+    "listening": BatchType(lambda topic, difficulty, count: generate_listening_questions(topic, count),
+                           insert_listening_question, listening_signature_text, "google", multi_item=True),
+    "speaking": BatchType(lambda topic, difficulty, count: [generate_speaking_question(topic)],
+                          insert_speaking_question, speaking_signature_text, "google"),
+    "writing": BatchType(lambda topic, difficulty, count: [generate_writing_question(topic)],
+                         insert_writing_question, writing_signature_text, "google"),
+    "reading": BatchType(lambda topic, difficulty, count: [generate_reading_question(topic,
+                                                                                     difficulty_level=difficulty)],
+                         insert_reading_question, reading_signature_text, "google", uses_difficulty=True),
+}
+DEFAULT_RATE_PER_MINUTE = 60
+
+
+class RateLimiter:
+    """Spaces calls to one provider evenly, per_minute at most"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class Checkpoint:
+    """Finished job keys, one JSON line each, appended and fsynced after every committed batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        self.done.add(json.loads(line)["job"])
+
+    def add(self, keys):
+        if not self.path or not keys:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for key in keys:
+                f.write(json.dumps({"job": key}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(keys)
+
+
+def job_matrix(topics, practice_types, difficulties, count: int, items_per_call: int):
+    """One job per LLM call: count sets per cell, items_per_call of them per call where supported"""
+    jobs = []
+    for practice_type in practice_types:
+        batch_type = BATCH_TYPES[practice_type]
+        levels = difficulties if batch_type.uses_difficulty else [None]
+        per_call = items_per_call if batch_type.multi_item else 1
+        for topic in topics:
+            for difficulty in levels:
+                for n, start in enumerate(range(0, count, per_call)):
+                    key = f"{practice_type}|{topic}|{difficulty or ''}|{n}"
+                    jobs.append((key, practice_type, topic, difficulty, min(per_call, count - start)))
+    return jobs
+
+
+def classify_error(error: Exception) -> str:
+    """parse_errors when the model answered but not in the schema, failures otherwise"""
+    # ValidationError, OutputParserException and the repair stage's errors are all ValueErrors
+    return "parse_errors" if isinstance(error, ValueError) else "failures"
+
+
+class BatchRunner:
+    def __init__(self, jobs, concurrency: int, rates: dict, batch_size: int, retries: int, checkpoint: Checkpoint):
+        self.jobs = [job for job in jobs if job[0] not in checkpoint.done]
+        self.skipped = len(jobs) - len(self.jobs)
+        self.concurrency = concurrency
+        self.limiters = {}
+        self.rates = rates
+        self.batch_size = batch_size
+        self.retries = retries
+        self.checkpoint = checkpoint
+        self.pending = []  # (job key, practice_type, response)
+        self.write_lock = asyncio.Lock()
+        self.finished = 0
+        self.stats = {"calls": 0, "generated": 0, "dropped": 0, "inserted": 0, "duplicates": 0,
+                      "parse_errors": 0, "failures": 0}
+        self.started = time.monotonic()
+
+    def _limiter(self, provider: str) -> RateLimiter:
+        if provider not in self.limiters:
+            self.limiters[provider] = RateLimiter(self.rates.get(provider, DEFAULT_RATE_PER_MINUTE))
+        return self.limiters[provider]
+
+    def _write(self, batch) -> list:
+        """Insert one batch on a fresh session, returns the job keys that are done: those
+        whose items were all inserted or duplicates. A job's items always share a batch."""
+        db = SessionLocal()
+        done = []
+        failed = set()
+        pending = []
+        try:
+            for key, practice_type, response in batch:
+                batch_type = BATCH_TYPES[practice_type]
+                signature, duplicate = find_duplicate(db, practice_type, batch_type.signature_text(response), pending)
+                if duplicate is not None:
+                    self.stats["duplicates"] += 1
+                    if key not in done:
+                        done.append(key)
+                    continue
+                try:
+                    with db.begin_nested():
+                        question_id = batch_type.insert(db, response, commit=False)
+                        record_signature(db, question_id, practice_type, signature)
+                except Exception as e:
+                    print(f"Insert failed for {key}: {str(e)}")
+                    self.stats["failures"] += 1
+                    failed.add(key)
+                    continue
+                pending.append((question_id, practice_type, signature))
+                self.stats["inserted"] += 1
+                if key not in done:
+                    done.append(key)
+            db.commit()
+            # A partly written job is generated again on resume, its written items come back as duplicates
+            return [key for key in done if key not in failed]
+        finally:
+            db.close()
+
+    async def _flush(self, force: bool = False):
+        async with self.write_lock:
+            if not self.pending or (not force and len(self.pending) < self.batch_size):
+                return False
+            batch, self.pending = self.pending, []
+            done = await asyncio.to_thread(self._write, batch)
+            self.checkpoint.add(done)
+            self.report()
+            return True
+
+    async def _run_job(self, semaphore: asyncio.Semaphore, job):
+        key, practice_type, topic, difficulty, items = job
+        batch_type = BATCH_TYPES[practice_type]
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                await self._limiter(batch_type.provider).wait()
+                self.stats["calls"] += 1
+                try:
+                    responses = await asyncio.to_thread(batch_type.generate, topic, difficulty, items)
+                    if not responses:
+                        raise ValueError("no valid item in the response")
+                except Exception as e:
+                    kind = classify_error(e)
+                    # Parse errors are retried too, the next sample usually fits the schema
+                    if attempt < self.retries:
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+                    print(f"{kind} on {key}: {str(e)[:200]}")
+                    self.stats[kind] += 1
+                    self.finished += 1
+                    return
+                self.stats["generated"] += len(responses)
+                self.stats["dropped"] += max(items - len(responses), 0)
+                self.pending.extend((key, practice_type, response) for response in responses)
+                self.finished += 1
+                break
+        await self._flush()
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        calls = self.stats["calls"]
+        rates = {
+            "per_minute": round(self.stats["generated"] * 60 / elapsed, 1),
+            "sets_per_call": round(self.stats["generated"] / calls, 2) if calls else 0.0,
+            "failure_rate": round(self.stats["failures"] / self.finished, 3) if self.finished else 0.0,
+            "parse_error_rate": round(self.stats["parse_errors"] / self.finished, 3) if self.finished else 0.0,
+        }
+        print(json.dumps(dict(self.stats, **rates, remaining=len(self.jobs) - self.finished,
+                              skipped=self.skipped, elapsed_seconds=round(elapsed, 1),
+                              repair=dict(generation_stats))))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        # Generation and inserts block, give them one thread per concurrent job plus the writer
+        loop.set_default_executor(ThreadPoolExecutor(self.concurrency + 1))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._run_job(semaphore, job) for job in self.jobs))
+        if not await self._flush(force=True):
+            self.report()
+
+
+def _split(value: str):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _topics(value: str):
+    # A file with one topic per line, or a comma separated list
+    if os.path.isfile(value):
+        with open(value, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    return _split(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.ai.batch", description="Seed the question bank")
+    parser.add_argument("--topics", required=True, help="comma separated topics or a file with one per line")
+    parser.add_argument("--types", default=",".join(BATCH_TYPES), help="practice types")
+    parser.add_argument("--difficulties", default="Easy,Medium,Hard", help="used by the types that take one")
+    parser.add_argument("--count", type=int, default=1, help="question sets per cell")
+    parser.add_argument("--items-per-call", type=int, default=5, help="for conversation and listening")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", action="append", default=[], metavar="PROVIDER=PER_MINUTE")
+    parser.add_argument("--batch-size", type=int, default=20, help="question sets per insert transaction")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--checkpoint", default="question_batch.ckpt")
+    args = parser.parse_args(argv)
+
+    practice_types = _split(args.types)
+    unknown = [practice_type for practice_type in practice_types if practice_type not in BATCH_TYPES]
+    if unknown:
+        parser.error(f"unknown practice types: {', '.join(unknown)}")
+    rates = {}
+    for rate in args.rate:
+        provider, _, per_minute = rate.partition("=")
+        rates[provider] = float(per_minute)
+
+    jobs = job_matrix(_topics(args.topics), practice_types, _split(args.difficulties), args.count,
+                      args.items_per_call)
+    runner = BatchRunner(jobs, args.concurrency, rates, args.batch_size, args.retries, Checkpoint(args.checkpoint))
+    print(f"{len(runner.jobs)} jobs to run, {runner.skipped} already done")
+    asyncio.run(runner.run())
+
+
+if __name__ == "__main__":
+    main()
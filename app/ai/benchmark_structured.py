@@ -0,0 +1,145 @@
+# app/ai/benchmark_structured.py
+"""Prompt tokens and latency per chain, prompt embedded format instructions vs
+provider native structured output.
+
+    python -m app.ai.benchmark_structured              # static token counts only
+    python -m app.ai.benchmark_structured --live 3     # plus 3 real calls per variant
+
+Static counts use tiktoken's cl100k_base as a common yardstick, the structured
+variant is charged for the schema it sends as a tool/response schema too.
+Live runs report the provider's own usage_metadata input tokens and the wall
+time, both variants on the same chat model.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import tiktoken
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
+
+from app.ai.Chatbot import CHAT_TEMPLATE, ChatResponse
+from app.ai.ConversastionQuestion import ConversationQuestion, conversation_description
+from app.ai.ErrorDetection import ERROR_DETECTION_TEMPLATE, SentenceAnalysis
+from app.ai.LLMFactory import LLMFactory, STRUCTURED_OUTPUT_ARGS, STRUCTURED_OUTPUT_NOTE
+from app.ai.ListeningQuestion import TOEICListeningQuestion, TOEIC_PROMPTS
+from app.ai.QuestionGenerator import QUESTION_TEMPLATE
+from app.ai.ReadingQuestion import ReadingPractice, READING_PROMPTS
+from app.ai.SpeakingQuestion import IELTSSpeakingQuestion, IELTS_SPEAKING_PROMPTS
+from app.ai.WritingQuestion import IELTSWritingQuestion, IELTS_WRITING_PROMPTS
+
+TOPIC = "travel"
+
+
+class _CharEstimate:
+    """About 4 characters per token, when the tiktoken encoding cannot be downloaded"""
+
+    def encode(self, text: str):
+        return range((len(text) + 3) // 4)
+
+
+def _encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"tiktoken unavailable ({type(e).__name__}), estimating 4 characters per token")
+        return _CharEstimate()
+
+
+def chains():
+    """name -> (template, schema, prompt class, input values), built without any model client"""
+    reading = READING_PROMPTS["general"].format(
+        topic=TOPIC, difficulty_level="Intermediate", length_guidance="moderate length",
+        word_count="300-500", num_questions=8, content_type="article"
+    )
+    question_inputs = {
+        "conversation": (ConversationQuestion, conversation_description),
+        "speaking": (IELTSSpeakingQuestion, IELTS_SPEAKING_PROMPTS["part2"].format(topic=TOPIC)),
+        "writing": (IELTSWritingQuestion, IELTS_WRITING_PROMPTS["academic_task1"].format(topic=TOPIC)),
+        "reading": (ReadingPractice, reading),
+        "listening_part2": (TOEICListeningQuestion, TOEIC_PROMPTS["part2"]),
+    }
+    result = {
+        name: (QUESTION_TEMPLATE, schema, PromptTemplate,
+               {"question_type_description": description, "topic": TOPIC})
+        for name, (schema, description) in question_inputs.items()
+    }
+    result["error_detection"] = (ERROR_DETECTION_TEMPLATE, SentenceAnalysis, PromptTemplate,
+                                 {"input_sentence": "I stand here từ chiều!"})
+    result["chatbot"] = (CHAT_TEMPLATE, ChatResponse, ChatPromptTemplate,
+                         {"message": "How do I use the present perfect?", "chat_history": ""})
+    return result
+
+
+def render(template, schema, prompt_class, values, structured: bool) -> str:
+    instructions = STRUCTURED_OUTPUT_NOTE if structured else JsonOutputParser(
+        pydantic_object=schema).get_format_instructions()
+    prompt = prompt_class.from_template(template=template, partial_variables={"format_instructions": instructions})
+    return prompt.invoke(values).to_string()
+
+
+def static_tokens(encoding, template, schema, prompt_class, values) -> dict:
+    prompt_only = len(encoding.encode(render(template, schema, prompt_class, values, structured=False)))
+    structured = (len(encoding.encode(render(template, schema, prompt_class, values, structured=True)))
+                  + len(encoding.encode(json.dumps(schema.model_json_schema()))))
+    return {"prompt_tokens": prompt_only, "structured_tokens": structured,
+            "saved": round(1 - structured / prompt_only, 3) if prompt_only else 0.0}
+
+
+def live_run(provider, template, schema, prompt_class, values, structured: bool, runs: int) -> dict:
+    llm = LLMFactory.create_llm({}, provider=provider, type='chat')
+    prompt = prompt_class.from_template(
+        template=template,
+        partial_variables={"format_instructions": STRUCTURED_OUTPUT_NOTE if structured else
+                           JsonOutputParser(pydantic_object=schema).get_format_instructions()}
+    )
+    if structured:
+        chain = prompt | llm.with_structured_output(schema, include_raw=True, **STRUCTURED_OUTPUT_ARGS[provider])
+    else:
+        chain = prompt | llm
+    latencies, input_tokens, failures = [], [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        try:
+            result = chain.invoke(values)
+            message = result["raw"] if structured else result
+            if structured and result.get("parsing_error") is not None:
+                failures += 1
+            elif not structured:
+                JsonOutputParser().parse(message.content)
+        except Exception as e:
+            print(f"  call failed: {str(e)[:120]}")
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage.get("input_tokens"):
+            input_tokens.append(usage["input_tokens"])
+    return {
+        "input_tokens": round(statistics.mean(input_tokens)) if input_tokens else None,
+        "latency_s": round(statistics.median(latencies), 2) if latencies else None,
+        "failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.ai.benchmark_structured")
+    parser.add_argument("--live", type=int, default=0, help="real calls per chain and variant")
+    parser.add_argument("--provider", default="google", choices=sorted(STRUCTURED_OUTPUT_ARGS))
+    args = parser.parse_args(argv)
+
+    encoding = _encoding()
+    print(f"{'chain':<18}{'prompt':>10}{'structured':>12}{'saved':>8}")
+    for name, (template, schema, prompt_class, values) in chains().items():
+        counts = static_tokens(encoding, template, schema, prompt_class, values)
+        print(f"{name:<18}{counts['prompt_tokens']:>10}{counts['structured_tokens']:>12}{counts['saved']:>8.1%}")
+        if args.live:
+            for structured in (False, True):
+                stats = live_run(args.provider, template, schema, prompt_class, values, structured, args.live)
+                print(f"  {'structured' if structured else 'prompt':<10} input_tokens={stats['input_tokens']} "
+                      f"latency_s={stats['latency_s']} failures={stats['failures']}")
+
+
+if __name__ == "__main__":
+    main()
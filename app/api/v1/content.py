@@ -1,21 +1,36 @@
 # app/api/v1/content.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
 from sqlalchemy.orm import Session
 from app.db.session import get_db
+from app.db.router import get_replica_db
 from app.services.auth import get_current_user
 from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 from app.ai.ConversastionQuestion import generate_conversation_question
 from app.ai.SpeakingQuestion import generate_speaking_question
 from app.ai.WritingQuestion import generate_writing_question
-from app.ai.ReadingQuestion import generate_reading_question
+from app.ai.ReadingQuestion import generate_reading_question, generate_reading_from_content
+from app.services.questions import (
+    ATTRIBUTE_KEYS, filter_attributes, sample_question_ids, record_views, question_payloads, join_payloads
+)
+from app.services.dedup import question_index
+from typing import Optional
 import datetime
+import json
 
 # from app.models.auth import User
 from app.models.content import Question
-from app.schemas.content import QuestionSchema
+from app.schemas.content import QuestionSchema, ReadingContentRequest
 
 router = APIRouter()
 
+
+def _payload_response(message: str, data: str) -> Response:
+    """Usual response envelope around question payloads that are already JSON text"""
+    return Response(content=f'{{"status": 200, "message": {json.dumps(message)}, "data": {data}}}',
+                    media_type="application/json")
+
+
 @router.get("/practice/{practice_type}", response_model=dict)
 async def get_practice_questions(practice_type: str,topic: str, db: Session = Depends(get_db)):
     try:
@@ -37,41 +52,140 @@ async def get_practice_questions(practice_type: str,topic: str, db: Session = De
         elif practice_type == "reading":
             question_id = generate_reading_question(topic, db=db)
 
-        questions = db.query(Question).filter(
-            Question.practice_type == practice_type,
-            (Question.parent_id == question_id) | (Question.question_id == question_id)
-        ).all()
-        formatted_questions = []
+        # One indexed fetch of the snapshot written at generation time, sent without re-encoding.
+        # From the primary: the question was just written there, a replica may not have it yet
+        payloads = question_payloads(db, [question_id])
 
-        for q in questions:
-            content = q.content_items[0] if q.content_items else None
-            options = [ans.content for ans in q.answers] if q.answers else None
-            correct =[ans.is_correct for ans in q.answers]  if q.answers else None
-            hint = [ans.hint for ans in q.answers] if q.answers else None
-            explanation = [ans.explanation for ans in q.answers] if q.answers else None
+        return _payload_response("Questions retrieved successfully", join_payloads(payloads.values()))
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
 
-            question_data = {
-                "question_id": q.question_id,
-                "question_type": q.question_type,
-                "question_text": content.question_text if content else "",
-                "question_context": content.context if content else "",
-                "correct_answer": correct, #example: [False, True, False, False], [True], [True,False]
-                "options": options, # example: [option1, option2],[short answer]
-                "hint": hint,   
-                "audio": content.audio_url if content and content.audio_url else None,
-                "question_image": content.image_url if content and content.image_url else None,
-                "explanation": explanation,
-                "practice_type": q.practice_type,
-                "difficulty": q.difficulty_level,
-                "passage_text": content.passage_text if content else None,
-                "parent_id": q.parent_id
-            }
-            formatted_questions.append(question_data)
+@router.post("/practice/reading/user-content", response_model=dict)
+async def create_reading_from_content(body: ReadingContentRequest,
+                                      current_user_id: int = Depends(get_current_user),
+                                      db: Session = Depends(get_db)):
+    """Reading practice on the user's own text, however long: generated chunk by chunk and stored"""
+    if not body.content.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The content has no text"
+        )
+    try:
+        question_id = await generate_reading_from_content(
+            body.content,
+            topic=body.topic,
+            title=body.title,
+            content_type=body.content_type,
+            source_url=body.source_url,
+            max_questions=body.max_questions,
+            db=db
+        )
+        payloads = await run_in_threadpool(question_payloads, db, [question_id])
 
-        return {"status": 200, 
-                "message": "Questions retrieved successfully", 
-                "data": formatted_questions
+        return _payload_response("Reading practice created successfully", join_payloads(payloads.values()))
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/question-bank/{practice_type}", response_model=dict)
+async def get_question_bank(practice_type: str,
+                            request: Request,
+                            topic: Optional[str] = None,
+                            difficulty: Optional[str] = None,
+                            cefr: Optional[str] = None,
+                            limit: int = Query(20, ge=1, le=100),
+                            after_id: Optional[int] = None,
+                            read_db: Session = Depends(get_replica_db)):
+    """Stored root questions, filtered by any mix of attributes, e.g. ?ielts_part=part2&source_type=news"""
+    try:
+        attributes = {key: value for key, value in request.query_params.items() if key in ATTRIBUTE_KEYS}
+        query = read_db.query(Question.question_id, Question.question_type, Question.topic,
+                              Question.difficulty_level, Question.cefr_level, Question.attributes).filter(
+            Question.practice_type == practice_type,
+            Question.parent_id.is_(None)
+        )
+        query = filter_attributes(query, attributes)
+        if topic:
+            query = query.filter(Question.topic == topic)
+        if difficulty:
+            query = query.filter(Question.difficulty_level == difficulty)
+        if cefr:
+            query = query.filter(Question.cefr_level == cefr.upper())
+        if after_id is not None:
+            query = query.filter(Question.question_id > after_id)
+        rows = query.order_by(Question.question_id).limit(limit).all()
+
+        return {"status": 200,
+                "message": "Questions retrieved successfully",
+                "data": [
+                    {
+                        "question_id": row.question_id,
+                        "question_type": row.question_type,
+                        "topic": row.topic,
+                        "difficulty": row.difficulty_level,
+                        "cefr_level": row.cefr_level,
+                        "attributes": row.attributes
+                    }
+                    for row in rows
+                ]
                 }
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        read_db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/question-bank/{practice_type}/sample", response_model=dict)
+async def sample_question_bank(practice_type: str,
+                               request: Request,
+                               topic: Optional[str] = None,
+                               difficulty: Optional[str] = None,
+                               cefr: Optional[str] = None,
+                               count: int = Query(5, ge=1, le=50),
+                               current_user_id: int = Depends(get_current_user),
+                               db: Session = Depends(get_db)):
+    """count random stored root questions the user has not seen yet, each with its children"""
+    try:
+        attributes = {key: value for key, value in request.query_params.items() if key in ATTRIBUTE_KEYS}
+        # All on the primary: served questions are recorded there, and a replica
+        # could still miss the last ones seen and serve them again
+        root_ids = sample_question_ids(db, current_user_id, practice_type, count,
+                                       topic=topic, difficulty=difficulty, attributes=attributes, cefr=cefr)
+        payloads = question_payloads(db, root_ids)
+        record_views(db, current_user_id, root_ids)
+
+        return _payload_response("Questions retrieved successfully",
+                                 join_payloads(payloads[question_id] for question_id in root_ids
+                                               if question_id in payloads))
     except SQLAlchemyError as e:
         print(f"SQLAlchemy error: {str(e)}")
         db.rollback()
@@ -85,3 +199,11 @@ async def get_practice_questions(practice_type: str,topic: str, db: Session = De
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
+
+@router.get("/question-dedup/metrics", response_model=dict)
+async def get_dedup_metrics(current_user_id: int = Depends(get_current_user)):
+    """Near-duplicate checks of generated questions in this process since it started"""
+    return {"status": 200,
+            "message": "Dedup metrics retrieved successfully",
+            "data": question_index.metrics()
+            }
@@ -1,52 +1,78 @@
 # app/api/v1/vocabulary.py
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query, Response, Path, Body, BackgroundTasks
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
+from app.config import settings
 from app.db.session import get_db
+from app.db.router import PRIMARY_COOKIE, get_read_db
 from app.services.auth import get_current_user
+from app.services.images import store_upload, resolve_image, image_url as variant_url, IMAGE_VARIANTS
+from app.services.static_files import public_url, static_path, IMMUTABLE_CACHE_CONTROL
+from app.services.audio import ACCENTS, can_store_audio, ensure_audio, get_synthesizer, save_word_audio, pregenerate_list_audio
+from app.services.public_vocab import public_vocab_cache, format_list
+from app.services.vocab_search import fold, search_user_items, search_public, merge_results
+from app.services.dictionary import normalize_word
+from app.services.words import resolve_words, split_overrides, item_column, join_words
+from app.services.export import EXPORT_FORMATS, MEDIA_TYPES, export_filename, export_list
+from app.services.quiz import QUIZ_TYPES, load_quiz_pool, build_quiz
+from app.services.review import fetch_due_cards, grade_item, is_learned, adjust_learned_words
+from app.services.vocabulary import (
+    adjust_total_words, import_vocab_items, iter_lines, iter_csv_rows, iter_jsonl_rows,
+    parse_fields, decode_cursor, list_validators, is_not_modified, fetch_item_page,
+    copy_items, move_items,
+)
 from sqlalchemy.exc import SQLAlchemyError
+from typing import Optional
+from types import SimpleNamespace
 import datetime
-import base64
-import io
-from PIL import Image
-import uuid
+import mimetypes
 import os
 
 
-from app.models.vocabulary import vocabList, vocabItem
-from app.schemas.vocabulary import VocabListSchema, vocabItemSchema
+from app.models.vocabulary import vocabList, vocabItem, vocabReview
+from app.schemas.vocabulary import VocabListSchema, vocabItemSchema, ReviewGradeSchema, ItemTransferSchema
 
 
 router = APIRouter()
 
+@router.post("/vocabulary-image", response_model=dict)
+async def upload_vocab_image(file: UploadFile = File(...),
+                             current_user_id: int = Depends(get_current_user)):
+    """Multipart image upload, the returned image_id can be sent with a list or an item"""
+    image_id = await store_upload(file)
+    return {
+        "status": 200,
+        "message": "Image uploaded successfully",
+        "data": {
+            "image_id": image_id,
+            "image": variant_url(image_id),
+            "variants": {variant: variant_url(image_id, variant) for variant in IMAGE_VARIANTS}
+        }
+    }
+
 # Vocabulary list
 @router.get("/vocabulary-list", response_model=dict)
-async def getVocabList(current_user_id: int = Depends(get_current_user), db: Session = Depends(get_db)):
+async def getVocabList(current_user_id: int = Depends(get_current_user), db: Session = Depends(get_read_db)):
     try:
 
-        List = db.query(vocabList).filter(or_(
-            vocabList.list_id < 0,  # Điều kiện 1: id = 0
-            vocabList.user_id == current_user_id  # Điều kiện 2: user_id khớp với current_user_id
-        )
-        ).all()
+        # Public lists are shared by every user and come from the process-wide cache
+        vocab_list_public = [
+            dict(vocab, image=public_url(vocab["image"]))
+            for vocab in public_vocab_cache.get(db).lists
+        ]
 
+        # The user's own lists, served by the user_id index
+        user_lists = db.query(vocabList).filter(
+            vocabList.user_id == current_user_id,
+            vocabList.list_id >= 0
+        ).all()
         vocab_list_user = []
-        vocab_list_public = []
-        for item in List:
-            vocab_list = {
-                "list_id": item.list_id,
-                "title": item.title,
-                "category": item.category,
-                "description": item.description,
-                "total_words": item.total_words,
-                "progress": item.progress or 0,
-                "updated_at": item.updated_at,
-                "image": item.image 
-            }
-            if vocab_list['list_id'] < 0:
-               vocab_list_public.append(vocab_list)
-            else: vocab_list_user.append(vocab_list) 
+        for item in user_lists:
+            vocab_list = format_list(item)
+            vocab_list["image"] = public_url(vocab_list["image"])
+            vocab_list_user.append(vocab_list)
 
         return {
             "status": 200,
@@ -70,6 +96,46 @@ async def getVocabList(current_user_id: int = Depends(get_current_user), db: Ses
             detail=f"An unexpected error occurred: {str(e)}"
         )
     
+@router.get("/vocabulary-search", response_model=dict)
+async def search_vocab(q: str = Query(..., min_length=1, max_length=100),
+                       limit: int = Query(10, ge=1, le=50),
+                       scope: str = Query("all", pattern="^(all|mine|public)$"),
+                       in_definition: bool = False,
+                       current_user_id: int = Depends(get_current_user),
+                       db: Session = Depends(get_read_db)):
+    """Autocomplete over the user's words (Postgres trigram index) and the public lists (in-memory trie)"""
+    try:
+        query = fold(q.strip())
+        if not query:
+            return {"status": 200, "message": "Search completed", "data": []}
+        user_results = []
+        public_results = []
+        if scope in ("all", "mine"):
+            user_results = search_user_items(db, current_user_id, query, limit, in_definition)
+        if scope in ("all", "public"):
+            public_results = search_public(public_vocab_cache.get(db), query, limit)
+        results = merge_results(limit, user_results, public_results)
+        for result in results:
+            result["image_url"] = public_url(result["image_url"])
+        return {
+            "status": 200,
+            "message": "Search completed",
+            "data": results
+        }
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+    
 @router.post("/vocabulary", response_model=dict)
 async def create_vocab_list(
     vocab_in: VocabListSchema, 
@@ -87,19 +153,9 @@ async def create_vocab_list(
             category=vocab_in.category,
             description=vocab_in.description,
         )
-        if vocab_in.image_base64:
-            if "base64," in vocab_in.image_base64:
-                base64_data = vocab_in.image_base64.split("base64,")[1]
-            else:
-                base64_data = vocab_in.image_base64
-            img_data = base64.b64decode(base64_data)
-            image = Image.open(io.BytesIO(img_data))
-            file_name = f"{uuid.uuid4()}.png"
-            file_path = os.path.join("static/images", file_name)
-            print(file_path)
-            image.save(file_path)
-            image_url = f"http://localhost:8000/static/images/{file_name}"
-            new_vocab.image = image_url
+        image = await resolve_image(vocab_in.image_id, vocab_in.image_base64)
+        if image:
+            new_vocab.image = image
         
         # print(f"Created vocab object: {new_vocab.__dict__}")
         
@@ -146,19 +202,9 @@ async def edit_vocab_list(
                 detail="Vocabulary list not found"
             )
         
-        if vocab_in.image_base64:
-            if "base64," in vocab_in.image_base64:
-                base64_data = vocab_in.image_base64.split("base64,")[1]
-            else:
-                base64_data = vocab_in.image_base64
-            img_data = base64.b64decode(base64_data)
-            image = Image.open(io.BytesIO(img_data))
-            file_name = f"{uuid.uuid4()}.png"
-            file_path = os.path.join("static/images", file_name)
-            print(file_path)
-            image.save(file_path)
-            image_url = f"http://localhost:8000/static/images/{file_name}"
-            vocab.image = image_url
+        image = await resolve_image(vocab_in.image_id, vocab_in.image_base64)
+        if image:
+            vocab.image = image
         
         # Update the vocabulary list
         vocab.title = vocab_in.title
@@ -169,7 +215,6 @@ async def edit_vocab_list(
         db.commit()
         db.refresh(vocab)
         
-        
         return {
             "status": 200,
             "message": "Vocabulary list updated successfully",
@@ -232,37 +277,68 @@ async def delete_vocab_list(list_id: int,
 
 # Vocabulary item
 @router.get("/vocabulary-item/{list_id}", response_model=dict)
-async def get_list_item(list_id: int, 
+async def get_list_item(list_id: int,
+                        request: Request,
+                        response: Response,
+                        limit: int = Query(100, ge=1, le=500),
+                        cursor: Optional[str] = None,
+                        fields: Optional[str] = None,
                         current_user_id: int = Depends(get_current_user), 
-                        db: Session = Depends(get_db)):
+                        db: Session = Depends(get_read_db)):
     try:
-        # Find the vocabulary list
-        vocab = db.query(vocabList).filter(vocabList.list_id == list_id, vocabList.user_id == current_user_id).first()
+        try:
+            selected_fields = parse_fields(fields)
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        # Find the vocabulary list, public lists (list_id < 0) are readable by everyone
+        public = None
+        if list_id < 0:
+            public = public_vocab_cache.get(db)
+            vocab = public.lists_by_id.get(list_id)
+            if vocab:
+                vocab = SimpleNamespace(**vocab)
+        else:
+            vocab = db.query(vocabList.list_id, vocabList.updated_at, vocabList.total_words).filter(
+                vocabList.list_id == list_id,
+                vocabList.user_id == current_user_id
+            ).first()
         if not vocab:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vocabulary list not found"
             )
+
+        # Revalidation of an unchanged page never loads item rows
+        etag, last_modified = list_validators(vocab.list_id, vocab.updated_at, vocab.total_words,
+                                              limit, cursor, ",".join(selected_fields))
+        headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "private, no-cache"}
+        if is_not_modified(request.headers, etag, vocab.updated_at):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
         # Find the vocabulary items
-        items = db.query(vocabItem).filter(vocabItem.list_id == list_id).all()
-        vocab_items = []
-        for item in items:
-            vocab_items.append({
-                "item_id": item.item_id,
-                "list_id": item.list_id,
-                "word": item.word,
-                "ipa": item.ipa,
-                "definition": item.definition,
-                "example": item.example,
-                "image_url": item.image_url,
-            })
+        if public is not None:
+            vocab_items, next_cursor = public.item_page(list_id, limit, cursor, selected_fields)
+        else:
+            vocab_items, next_cursor = fetch_item_page(db, list_id, limit, cursor, selected_fields)
+        for item in vocab_items:
+            if "image_url" in item:
+                item["image_url"] = public_url(item["image_url"])
         #print(f"Vocabulary items: {vocab_items}")
+        response.headers.update(headers)
         return {
             "status": 200,
             "message": "Vocabulary list retrieved successfully",
-            "data": vocab_items
+            "data": vocab_items,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         print(f"SQLAlchemy error: {str(e)}")
         db.rollback()
@@ -284,50 +360,46 @@ async def create_vocab_item(
     db: Session = Depends(get_db)
 ):
     try:
+        # Decode the image before touching the database
+        image = await resolve_image(vocab_in.image_id, vocab_in.image_base64)
+
         # Find the vocabulary list
-        # print('xxx')
-        # print('vocab_inss', vocab_in)
-        vocab = db.query(vocabList).filter(vocabList.list_id == vocab_in.list_id, vocabList.user_id == current_user_id).first()
+        vocab = db.query(vocabList.list_id).filter(vocabList.list_id == vocab_in.list_id, vocabList.user_id == current_user_id).first()
         if not vocab:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vocabulary list not found"
             )
+        # Shared word entry, created from the dictionary the first time anyone adds the word
+        fields = {"word": vocab_in.word, "definition": vocab_in.definition, "ipa": vocab_in.ipa, "image_url": image}
+        word = resolve_words(db, [fields], public=vocab_in.list_id < 0).get(normalize_word(vocab_in.word), {})
+        if not (vocab_in.definition or word.get("definition")):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Definition is required, the word was not found in the dictionary"
+            )
+        # Create new vocabulary item, it only stores what differs from the shared word
         new_item = vocabItem(
             list_id=vocab_in.list_id,
             word=vocab_in.word,
-            definition=vocab_in.definition,
+            word_id=word.get("word_id"),
             example=vocab_in.example,
-            ipa=vocab_in.ipa,
-        )
-        # print(vocab_in.image_base64,'ccc')
-        if vocab_in.image_base64:
-            if "base64," in vocab_in.image_base64:
-                base64_data = vocab_in.image_base64.split("base64,")[1]
-            else:
-                base64_data = vocab_in.image_base64
-            img_data = base64.b64decode(base64_data)
-            image = Image.open(io.BytesIO(img_data))
-            file_name = f"{uuid.uuid4()}.png"
-            file_path = os.path.join("static/images", file_name)
-            print(file_path)
-            image.save(file_path)
-            image_url = f"http://localhost:8000/static/images/{file_name}"
-            new_item.image_url = image_url
-        vocab.total_words += 1
-        vocab.updated_at = datetime.datetime.utcnow()
-        # Create new vocabulary item
-
-
+            **split_overrides(fields, word)
+        )
         db.add(new_item)
+        db.flush()
+        adjust_total_words(db, vocab_in.list_id, 1)
         db.commit()
-        db.refresh(new_item)
+        if vocab_in.list_id < 0:
+            public_vocab_cache.invalidate()
         
         return {
             "status": 200,
             "message": "Vocabulary item created successfully",
             "data": 0
         }
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         print(f"SQLAlchemy error: {str(e)}")
         db.rollback()
@@ -342,6 +414,57 @@ async def create_vocab_item(
             detail=f"An unexpected error occurred: {str(e)}"
         )   
 
+@router.post("/vocabulary-item/import/{list_id}", response_model=dict)
+async def import_vocab_item(
+    list_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    current_user_id: int = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk import words from a CSV (header: word,definition,example,ipa) or JSONL request body"""
+    try:
+        vocab = db.query(vocabList.list_id).filter(vocabList.list_id == list_id, vocabList.user_id == current_user_id).first()
+        if not vocab:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary list not found"
+            )
+        if format is None:
+            content_type = request.headers.get("content-type", "")
+            format = "jsonl" if "json" in content_type else "csv"
+
+        lines = iter_lines(request.stream())
+        rows = iter_jsonl_rows(lines) if format == "jsonl" else iter_csv_rows(lines)
+        result = await import_vocab_items(db, list_id, rows)
+        if result["inserted"] and can_store_audio():
+            # Pronunciations of the new words are synthesized after the response is sent
+            background_tasks.add_task(pregenerate_list_audio, list_id)
+        if list_id < 0:
+            public_vocab_cache.invalidate()
+
+        return {
+            "status": 200,
+            "message": f"Imported {result['inserted']} vocabulary items",
+            "data": result
+        }
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
 @router.patch("/vocabulary-item", response_model=dict)
 async def edit_vocab_item(
     vocab_in: vocabItemSchema, 
@@ -366,34 +489,33 @@ async def edit_vocab_item(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vocabulary item not found"
             )
-        if vocab_in.image_base64:
-            if "base64," in vocab_in.image_base64:
-                base64_data = vocab_in.image_base64.split("base64,")[1]
-            else:
-                base64_data = vocab_in.image_base64
-            img_data = base64.b64decode(base64_data)
-            image = Image.open(io.BytesIO(img_data))
-            file_name = f"{uuid.uuid4()}.png"
-            file_path = os.path.join("static/images", file_name)
-            print(file_path)
-            image.save(file_path)
-            image_url = f"http://localhost:8000/static/images/{file_name}"
-            vocab.image_url = image_url
+        image = await resolve_image(vocab_in.image_id, vocab_in.image_base64)
+        fields = {"word": vocab_in.word, "definition": vocab_in.definition, "ipa": vocab_in.ipa, "image_url": image}
+        word = resolve_words(db, [fields], public=vocab_in.list_id < 0).get(normalize_word(vocab_in.word), {})
+        overrides = split_overrides(fields, word)
+        if image:
+            vocab.image_url = overrides["image_url"]
         # Update the vocabulary item
         vocab.word = vocab_in.word
-        vocab.definition = vocab_in.definition
+        vocab.word_id = word.get("word_id")
+        if vocab_in.definition:
+            vocab.definition = overrides["definition"]
         vocab.example = vocab_in.example
-        vocab.ipa = vocab_in.ipa
+        vocab.ipa = overrides["ipa"]
         #vocab.updated_at = datetime.datetime.utcnow()
 
         db.commit()
         db.refresh(vocab)
+        if vocab_in.list_id < 0:
+            public_vocab_cache.invalidate()
         
         return {
             "status": 200,
             "message": "Vocabulary item updated successfully",
             "data": 0
         }
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         print(f"SQLAlchemy error: {str(e)}")
         db.rollback()
@@ -414,32 +536,351 @@ async def delete_vocab_item(item_id: int,
                             db: Session = Depends(get_db)):
     try:
 
-        # Find the vocabulary item to delete
-        item = db.query(vocabItem).filter(vocabItem.item_id == item_id).first()
+        # Find the vocabulary item to delete, it must belong to one of the user's lists
+        item = (db.query(vocabItem.item_id, vocabItem.list_id)
+                .join(vocabList, vocabList.list_id == vocabItem.list_id)
+                .filter(vocabItem.item_id == item_id, vocabList.user_id == current_user_id)
+                .first())
         if not item:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vocabulary item not found"
             )
         
-        # Find the vocabulary list
-        vocab = db.query(vocabList).filter(vocabList.list_id == item.list_id, vocabList.user_id == current_user_id).first()
+        # Delete the vocabulary item, only count it if this request actually removed the row
+        learned = db.query(vocabReview.interval_days).filter(
+            vocabReview.user_id == current_user_id, vocabReview.item_id == item_id
+        ).scalar()
+        deleted = db.query(vocabItem).filter(vocabItem.item_id == item_id).delete(synchronize_session=False)
+        if deleted:
+            adjust_total_words(db, item.list_id, -deleted)
+            # Same rule as grade_item: public lists keep no progress
+            if item.list_id >= 0 and learned is not None and is_learned(learned):
+                adjust_learned_words(db, item.list_id, -1)
+        db.commit()
+        if item.list_id < 0:
+            public_vocab_cache.invalidate()
+        
+        return {
+            "status": 200,
+            "message": "Vocabulary item deleted successfully",
+            "data": 0
+        }
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.post("/vocabulary/{list_id}/clone", response_model=dict)
+async def clone_vocab_list(list_id: int,
+                           title: Optional[str] = None,
+                           current_user_id: int = Depends(get_current_user),
+                           db: Session = Depends(get_db)):
+    """Copy a public or own list and all its items into a new personal list, server side"""
+    try:
+        vocab = db.query(vocabList).filter(
+            vocabList.list_id == list_id,
+            (vocabList.list_id < 0) | (vocabList.user_id == current_user_id)
+        ).first()
         if not vocab:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Vocabulary list not found"
             )
-        vocab.total_words -= 1
-        vocab.updated_at = datetime.datetime.utcnow()
-        # Delete the vocabulary item
-        db.delete(item)
+        new_vocab = vocabList(
+            title=title or vocab.title,
+            user_id=current_user_id,
+            category=vocab.category,
+            description=vocab.description,
+            image=vocab.image,
+        )
+        db.add(new_vocab)
+        db.flush()
+        copied = copy_items(db, list_id, new_vocab.list_id)
         db.commit()
-        
+
         return {
             "status": 200,
-            "message": "Vocabulary item deleted successfully",
-            "data": 0
+            "message": "Vocabulary list cloned successfully",
+            "data": {"list_id": new_vocab.list_id, "copied": copied}
+        }
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/vocabulary/{list_id}/export")
+async def export_vocab_list(list_id: int,
+                            request: Request,
+                            format: str = Query("csv", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+                            bundle: bool = False,
+                            current_user_id: int = Depends(get_current_user),
+                            db: Session = Depends(get_read_db)):
+    """Stream a list as CSV, JSONL or Anki text. bundle=true zips it with the stored images and audio"""
+    try:
+        vocab = db.query(vocabList).filter(
+            vocabList.list_id == list_id,
+            (vocabList.list_id < 0) | (vocabList.user_id == current_user_id)
+        ).first()
+        if not vocab:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary list not found"
+            )
+        vocab = format_list(vocab)
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
+    # Items are read inside the response body, batch by batch
+    filename = export_filename(vocab["title"], format, bundle)
+    return StreamingResponse(
+        export_list(vocab, format, bundle, sticky=PRIMARY_COOKIE in request.cookies),
+        media_type=MEDIA_TYPES["zip" if bundle else format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/vocabulary-item/{action}", response_model=dict)
+async def transfer_vocab_items(action: str = Path(..., pattern="^(copy|move)$"),
+                               transfer_in: ItemTransferSchema = Body(...),
+                               current_user_id: int = Depends(get_current_user),
+                               db: Session = Depends(get_db)):
+    """Copy or move item_ids (or the whole source list) into one of the user's lists"""
+    try:
+        if transfer_in.target_list_id < 0 or (action == "move" and transfer_in.source_list_id < 0):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have permission to edit a public vocabulary list"
+            )
+        if transfer_in.source_list_id == transfer_in.target_list_id and action == "move":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Source and target lists are the same"
+            )
+        # Public lists can be copied from, anything else must belong to the user
+        lists = db.query(vocabList.list_id).filter(
+            vocabList.list_id.in_([transfer_in.source_list_id, transfer_in.target_list_id]),
+            (vocabList.list_id < 0) | (vocabList.user_id == current_user_id)
+        ).all()
+        if len(lists) < len({transfer_in.source_list_id, transfer_in.target_list_id}):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary list not found"
+            )
+
+        if action == "copy":
+            count = copy_items(db, transfer_in.source_list_id, transfer_in.target_list_id, transfer_in.item_ids)
+        else:
+            count = move_items(db, current_user_id, transfer_in.source_list_id, transfer_in.target_list_id,
+                               transfer_in.item_ids)
+        db.commit()
+
+        return {
+            "status": 200,
+            "message": f"{count} vocabulary items {'copied' if action == 'copy' else 'moved'} successfully",
+            "data": {"count": count}
+        }
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/vocabulary-quiz/{list_id}", response_model=dict)
+async def get_vocab_quiz(list_id: int,
+                         count: int = Query(20, ge=1, le=100),
+                         types: Optional[str] = None,
+                         seed: Optional[int] = None,
+                         current_user_id: int = Depends(get_current_user),
+                         db: Session = Depends(get_read_db)):
+    """Quiz built locally from the list's words, same question shape as /practice"""
+    try:
+        quiz_types = tuple(t.strip() for t in types.split(",") if t.strip()) if types else QUIZ_TYPES
+        unknown = [t for t in quiz_types if t not in QUIZ_TYPES]
+        if unknown or not quiz_types:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown quiz types: {', '.join(unknown)}, expected {', '.join(QUIZ_TYPES)}"
+            )
+        vocab = db.query(vocabList.list_id).filter(
+            vocabList.list_id == list_id,
+            (vocabList.list_id < 0) | (vocabList.user_id == current_user_id)
+        ).first()
+        if not vocab:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary list not found"
+            )
+
+        items, pool = load_quiz_pool(db, current_user_id, list_id)
+        questions = build_quiz(items, pool, count, quiz_types, seed)
+        return {
+            "status": 200,
+            "message": "Quiz generated successfully",
+            "data": questions
+        }
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.get("/vocabulary-audio/{item_id}")
+async def get_vocab_audio(item_id: int,
+                          accent: str = Query("us", pattern=f"^({'|'.join(ACCENTS)})$"),
+                          current_user_id: int = Depends(get_current_user),
+                          db: Session = Depends(get_db)):
+    """Pronunciation of an item, synthesized on first request and shared by every list with the word.
+    Byte ranges are supported for seeking."""
+    try:
+        item = (join_words(db.query(vocabItem.item_id, vocabItem.word, vocabItem.word_id,
+                                    item_column(f"audio_url_{accent}").label("audio")))
+                .join(vocabList, vocabList.list_id == vocabItem.list_id)
+                .filter(vocabItem.item_id == item_id,
+                        (vocabList.list_id < 0) | (vocabList.user_id == current_user_id))
+                .first())
+        if not item:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary item not found"
+            )
+        if item.audio and static_path(item.audio) is None:
+            # Audio hosted elsewhere, e.g. from the dictionary
+            return RedirectResponse(item.audio)
+
+        key = item.audio
+        if not key or not os.path.isfile(os.path.join(settings.STATIC_DIR, static_path(key))):
+            if get_synthesizer() is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No pronunciation audio for this item"
+                )
+            key = await run_in_threadpool(ensure_audio, item.word, accent)
+            if item.word_id is not None:
+                save_word_audio(db, item.word_id, accent, key)
+                db.commit()
+
+        # Stored under a hash of (synthesizer, voice, accent, word), the bytes never change
+        path = os.path.join(settings.STATIC_DIR, static_path(key))
+        return FileResponse(
+            path,
+            media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        )
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+# Spaced repetition review
+@router.get("/vocabulary-review/due", response_model=dict)
+async def get_due_cards(limit: int = Query(20, ge=1, le=200),
+                        current_user_id: int = Depends(get_current_user),
+                        db: Session = Depends(get_db)):
+    try:
+        cards = fetch_due_cards(db, current_user_id, limit)
+        for card in cards:
+            card["image_url"] = public_url(card["image_url"])
+        return {
+            "status": 200,
+            "message": "Due cards retrieved successfully",
+            "data": cards
+        }
+    except SQLAlchemyError as e:
+        print(f"SQLAlchemy error: {str(e)}")
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}"
+        )
+
+@router.post("/vocabulary-review", response_model=dict)
+async def submit_review(review_in: ReviewGradeSchema,
+                        current_user_id: int = Depends(get_current_user),
+                        db: Session = Depends(get_db)):
+    try:
+        review = grade_item(db, current_user_id, review_in.item_id, review_in.grade)
+        if review is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Vocabulary item not found"
+            )
+        return {
+            "status": 200,
+            "message": "Review saved successfully",
+            "data": {
+                "item_id": review.item_id,
+                "ease": review.ease,
+                "interval_days": review.interval_days,
+                "repetitions": review.repetitions,
+                "due_at": review.due_at
+            }
         }
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         print(f"SQLAlchemy error: {str(e)}")
         db.rollback()
@@ -453,4 +894,3 @@ async def delete_vocab_item(item_id: int,
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An unexpected error occurred: {str(e)}"
         )
-    
\ No newline at end of file
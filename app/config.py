@@ -9,5 +9,32 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     API_V1_STR: str = "/api/v1"
     DATABASE_URL:str = os.getenv('DATABASE_URL')
+    # Comma separated list of read replica URLs, empty = read from primary
+    DATABASE_REPLICA_URLS: str = os.getenv('DATABASE_REPLICA_URLS', '')
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 2.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+    STATIC_DIR: str = "static"
+    STATIC_URL_PATH: str = "/static"
+    # Origin that serves STATIC_URL_PATH, e.g. a CDN in front of this app
+    PUBLIC_BASE_URL: str = os.getenv('PUBLIC_BASE_URL', 'http://localhost:8000')
+    IMAGE_DIR: str = "static/images"
+    # Raw uploads until processed, never under STATIC_DIR. Empty = the system temp directory
+    UPLOAD_TMP_DIR: str = os.getenv('UPLOAD_TMP_DIR', '')
+    PUBLIC_CACHE_TTL_SECONDS: float = 30.0
+    # Built with: python -m app.services.dictionary build <source>
+    DICTIONARY_PATH: str = "data/dictionary.idx"
+    IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+    IMAGE_WORKERS: int = 2
+    AUDIO_DIR: str = "static/audio"
+    # "package.module:ClassName" of a Synthesizer, empty = no synthesis. "tone" is the offline
+    # stand-in for development, served but never stored on the shared words
+    AUDIO_SYNTHESIZER: str = os.getenv('AUDIO_SYNTHESIZER', '')
+    AUDIO_VOICE: str = "default"
+    AUDIO_WORKERS: int = 4
+    # Estimated Jaccard similarity from which a generated question set counts as a duplicate
+    DEDUP_THRESHOLD: float = 0.8
+    # csv of word,level rows (e.g. an English Vocabulary Profile export), empty = levels from word frequency
+    CEFR_WORDLIST: str = os.getenv('CEFR_WORDLIST', '')
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,119 @@
+# app/db/router.py
+import itertools
+import math
+import threading
+import time
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.db.session import SessionLocal
+from app.services.auth import get_current_user
+
+# 0 on the primary or on a replica that is still streaming and has replayed
+# everything it received. Otherwise the age of the last replayed transaction:
+# a replica that stopped receiving also has receive = replay, but it ages.
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())::float8, 'Infinity'::float8)
+    END
+""")
+# Set on the client after a write, its reads go to the primary until it expires.
+# A cookie rather than process memory, so every worker sees it. It is not tied
+# to the user: a client that drops cookies (a bearer-token script, say) gets
+# no read-your-writes and may read replica data up to REPLICA_MAX_LAG_SECONDS old.
+PRIMARY_COOKIE = "read_primary"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.lag = 0.0
+        self.checked_at = None
+
+
+class SessionRouter:
+    """Send read-only sessions to replicas, fall back to the primary when they lag"""
+
+    def __init__(self, replica_urls, max_lag: float, check_interval: float):
+        self.replicas = [Replica(url) for url in replica_urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(self.replicas)
+        self._lock = threading.Lock()
+
+    def replica_lag(self, replica: Replica) -> float:
+        now = time.monotonic()
+        if replica.checked_at is not None and now - replica.checked_at < self.check_interval:
+            return replica.lag
+        try:
+            with replica.engine.connect() as conn:
+                replica.lag = float(conn.execute(REPLICA_LAG_SQL).scalar() or 0)
+        except Exception as e:
+            print(f"Replica lag check failed for {replica.engine.url}: {str(e)}")
+            replica.lag = float("inf")
+        replica.checked_at = now
+        return replica.lag
+
+    def pick_replica(self):
+        """Round-robin over replicas, skipping the ones behind by more than max_lag"""
+        with self._lock:
+            candidates = [next(self._cycle) for _ in self.replicas]
+        for replica in candidates:
+            if self.replica_lag(replica) <= self.max_lag:
+                return replica
+        return None
+
+    def read_session(self, sticky: bool = False):
+        if self.replicas and not sticky:
+            replica = self.pick_replica()
+            if replica is not None:
+                db = replica.SessionLocal()
+                db.info["replica"] = True
+                return db
+        db = SessionLocal()
+        db.info["replica"] = False
+        return db
+
+
+session_router = SessionRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_INTERVAL,
+)
+
+
+async def read_your_writes(request: Request, call_next):
+    """Middleware: a successful write pins the client's reads to the primary for
+    READ_YOUR_WRITES_SECONDS, long enough for the replicas to replay it"""
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        response.set_cookie(PRIMARY_COOKIE, "1", max_age=math.ceil(settings.READ_YOUR_WRITES_SECONDS),
+                            httponly=True, samesite="lax")
+    return response
+
+
+def get_read_db(request: Request, current_user_id: int = Depends(get_current_user)):
+    """Read-only session for an authenticated user (read-your-writes aware)"""
+    db = session_router.read_session(PRIMARY_COOKIE in request.cookies)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_replica_db(request: Request):
+    """Read-only session for endpoints without a user (read-your-writes aware)"""
+    db = session_router.read_session(PRIMARY_COOKIE in request.cookies)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -3,8 +3,13 @@ from fastapi import FastAPI
 #from app.api.v1 import endpoints
 from app.api.v1 import auth, vocabulary, content, messaging
 from app.config import settings
+from app.services.images import shutdown_executor
+from app.services.static_files import CachedStaticFiles, precompress_static
+from app.services.dictionary import offline_dictionary
+from app.services.dedup import question_index
+from app.db.session import SessionLocal
+from app.db.router import read_your_writes
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.config import settings
 
 
@@ -22,10 +27,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
-UPLOAD_FOLDER = "static/images"
+# Reads after a write go to the primary, see app/db/router.py
+app.middleware("http")(read_your_writes)
+
+app.mount(settings.STATIC_URL_PATH, CachedStaticFiles(directory=settings.STATIC_DIR), name="static")
+UPLOAD_FOLDER = settings.IMAGE_DIR
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+@app.on_event("startup")
+def compress_static_assets():
+    precompress_static(settings.STATIC_DIR)
+
+@app.on_event("startup")
+def load_offline_dictionary():
+    offline_dictionary.load(settings.DICTIONARY_PATH)
+
+@app.on_event("startup")
+def load_question_signatures():
+    db = SessionLocal()
+    try:
+        print(f"Loaded {question_index.sync(db)} question signatures")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown_image_workers():
+    shutdown_executor()
+
 # print(os.getcwd())
 
 # Include routers
@@ -1,7 +1,10 @@
+import random
+
 from app.models.base import Base
 from sqlalchemy.ext.declarative import declarative_base
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, TIMESTAMP, func,MetaData, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Boolean, TIMESTAMP, func,MetaData, DateTime, Index, Float, text, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 # Tạo metadata với schema content
 metadata = MetaData(schema="content")
@@ -10,6 +13,18 @@ Base = declarative_base(metadata=metadata)
 # SQLAlchemy Models
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # attributes @> '{"ielts_part": "part2"}', any combination of keys in one index scan
+        Index("ix_questions_attributes", "attributes", postgresql_using="gin",
+              postgresql_ops={"attributes": "jsonb_path_ops"}),
+        # Random sampling of root questions per bucket: seek to random_key >= r, no ORDER BY random()
+        Index("ix_questions_bucket_random", "practice_type", "topic", "difficulty_level", "random_key",
+              postgresql_where=text("parent_id IS NULL")),
+        # Same for buckets without topic and difficulty, the other partial buckets filter along it
+        Index("ix_questions_type_random", "practice_type", "random_key",
+              postgresql_where=text("parent_id IS NULL")),
+        Index("ix_questions_parent", "parent_id"),
+    )
 
     question_id = Column(Integer, primary_key=True, index=True)
     practice_type = Column(String(20), nullable=False)
@@ -19,6 +34,19 @@ class Question(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     parent_id = Column(Integer, ForeignKey("content.questions.question_id"), nullable=True)
+    # ielts_part, toeic_part, source_type, ielts_type, task_number, conversation_context...
+    attributes = Column(JSONB, nullable=False, server_default='{}', default=dict)
+    # Uniform in [0, 1), fixed at insert
+    random_key = Column(Float, nullable=False, server_default=func.random(), default=random.random)
+    # Roots only: the served JSON of the question and its children, see services/questions.store_payload
+    payload = Column(JSONB, nullable=True)
+    payload_version = Column(Integer, nullable=True)
+    # Roots only: local readability scores of the set's text, see services/questions.score_trees.
+    # cefr_level is measured, difficulty_level stays the requested one (measured at insert for
+    # the generators that take none, see services/questions.measured_difficulty)
+    cefr_level = Column(String(2), nullable=True)
+    readability = Column(JSONB, nullable=True)
+    readability_version = Column(Integer, nullable=True)
 
 
     # Relationships
@@ -29,6 +57,7 @@ class Question(Base):
 
 
 class QuestionMetadata(Base):
+    """Legacy key/value attributes, superseded by Question.attributes and no longer written"""
     __tablename__ = "question_metadata"
 
     metadata_id = Column(Integer, primary_key=True, index=True)
@@ -71,3 +100,22 @@ class Answer(Base):
     # Relationship
     question = relationship("Question", back_populates="answers")
 
+
+class QuestionView(Base):
+    """Root questions already served to a user, sampling skips them"""
+    __tablename__ = "question_views"
+
+    user_id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("content.questions.question_id", ondelete="CASCADE"), primary_key=True)
+    seen_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class QuestionSignature(Base):
+    """MinHash signature of a stored root question set, see services/dedup.py"""
+    __tablename__ = "question_signatures"
+
+    question_id = Column(Integer, ForeignKey("content.questions.question_id", ondelete="CASCADE"), primary_key=True)
+    practice_type = Column(String(20), nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+    # Insert time, the LSH index syncs by it: ids are not committed in order across workers
+    created_at = Column(DateTime, nullable=False, server_default=func.clock_timestamp(), index=True)
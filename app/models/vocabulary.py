@@ -1,5 +1,5 @@
 # User model
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Float
 from app.models.base import Base
 import datetime
 class vocabList(Base):
@@ -15,21 +15,61 @@ class vocabList(Base):
     updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     total_words = Column(Integer, nullable=False, server_default='0')
     progress = Column(Integer, nullable=False, server_default='0')
+    # Items of this list the owner has learned, progress = learned_words * 100 / total_words
+    learned_words = Column(Integer, nullable=False, server_default='0')
     image = Column(String, nullable=True, server_default='')
 
+class vocabWord(Base):
+    """One shared entry per distinct word (lowercase, single spaced), items point at it"""
+    __tablename__ = "words"
+    __table_args__ = {'schema': 'vocabulary'}
+
+    word_id = Column(Integer, primary_key=True, index=True)
+    word = Column(String, nullable=False, unique=True)
+    definition = Column(String, nullable=True, server_default='')
+    ipa = Column(String, nullable=True, server_default='')
+    audio_url_us = Column(String, nullable=True, server_default='')
+    audio_url_uk = Column(String, nullable=True, server_default='')
+    image_url = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+
 class vocabItem(Base):
     __tablename__ = "items"
-    __table_args__ = {'schema': 'vocabulary'}
+    __table_args__ = (
+        # Keyset pagination of a list's items
+        Index("ix_items_list_created_item", "list_id", "created_at", "item_id"),
+        {'schema': 'vocabulary'},
+    )
     
     item_id = Column(Integer, primary_key=True, index=True)
     list_id = Column(Integer, ForeignKey("vocabulary.lists.list_id"), nullable=False, index=True)
+    word_id = Column(Integer, ForeignKey("vocabulary.words.word_id"), nullable=True, index=True)
     word = Column(String, nullable=False)
-    definition = Column(String, nullable=False)
+    # definition, ipa, audio and image are per-item overrides, NULL means use the shared word's
+    definition = Column(String, nullable=True)
     example = Column(String, nullable=True, server_default='')
-    ipa = Column(String, nullable=True, server_default='')
-    audio_url_us = Column(String, nullable=True, server_default='')
-    audio_url_uk = Column(String, nullable=True, server_default='')
+    ipa = Column(String, nullable=True)
+    audio_url_us = Column(String, nullable=True)
+    audio_url_uk = Column(String, nullable=True)
     image_url = Column(String, nullable=True )
     difficulty_level = Column(String, nullable=True, server_default='0')
     created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
-    #updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)  
\ No newline at end of file
+    #updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)  
+
+class vocabReview(Base):
+    """Spaced-repetition state of one item for one user (SM-2)"""
+    __tablename__ = "reviews"
+    __table_args__ = (
+        # Due queue: WHERE user_id = :uid AND due_at <= now() ORDER BY due_at
+        Index("ix_reviews_user_due", "user_id", "due_at"),
+        {'schema': 'vocabulary'},
+    )
+
+    user_id = Column(Integer, ForeignKey("auth.users.user_id"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("vocabulary.items.item_id", ondelete="CASCADE"), primary_key=True, index=True)
+    ease = Column(Float, nullable=False, server_default='2.5')
+    interval_days = Column(Float, nullable=False, server_default='0')
+    repetitions = Column(Integer, nullable=False, server_default='0')
+    lapses = Column(Integer, nullable=False, server_default='0')
+    due_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_reviewed_at = Column(DateTime, nullable=True)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class QuestionSchema(BaseModel):
     question_id: int
@@ -16,3 +16,11 @@ class QuestionSchema(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ReadingContentRequest(BaseModel):
+    content: str = Field(..., min_length=1)
+    topic: Optional[str] = None
+    title: Optional[str] = None
+    content_type: Literal["web", "pdf", "text", "document"] = "text"
+    source_url: Optional[str] = None
+    max_questions: int = Field(20, ge=1, le=50)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class VocabListSchema(BaseModel):
@@ -12,6 +12,7 @@ class VocabListSchema(BaseModel):
     total_words: Optional[int] = 0
     progress: Optional[int] = 0
     image: Optional[str] = None
+    image_id: Optional[str] = None
     image_base64:  Optional[str] = None 
 
     class Config:
@@ -21,12 +22,36 @@ class vocabItemSchema(BaseModel):
     item_id: Optional[int] = None
     list_id: int
     word: str
-    definition: str
+    # Filled from the offline dictionary when left empty
+    definition: Optional[str] = None
     example: Optional[str] = None
     ipa: Optional[str] = None
     image_url: Optional[str] = None
+    image_id: Optional[str] = None
     image_base64:  Optional[str] = None
     difficult_level: Optional[str] = '0'
 
     class Config:
         from_attributes = True
+
+class VocabImportRow(BaseModel):
+    word: str = Field(..., min_length=1)
+    definition: Optional[str] = ''
+    example: Optional[str] = ''
+    ipa: Optional[str] = ''
+
+    class Config:
+        str_strip_whitespace = True
+
+
+class ItemTransferSchema(BaseModel):
+    source_list_id: int
+    target_list_id: int
+    # None copies or moves the whole source list
+    item_ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+
+
+class ReviewGradeSchema(BaseModel):
+    item_id: int
+    # SM-2 quality: 0-2 forgotten, 3 hard, 4 good, 5 easy
+    grade: int = Field(..., ge=0, le=5)
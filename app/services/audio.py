@@ -0,0 +1,212 @@
+# app/services/audio.py
+import hashlib
+import importlib
+import io
+import os
+import sys
+import threading
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.vocabulary import vocabItem, vocabWord
+from app.services.dictionary import normalize_word
+from app.services.words import touch_lists
+
+ACCENTS = ("us", "uk")
+AUDIO_BATCH_SIZE = 200
+
+
+class Synthesizer(ABC):
+    """Text to speech backend. name and voice are part of the cache key, so changing
+    either produces new files instead of serving stale ones."""
+
+    name = ""
+    extension = ""
+    media_type = ""
+    # Placeholder output: never recorded on a shared word, real audio must be able to take its place
+    stand_in = False
+
+    @abstractmethod
+    def synthesize(self, text: str, accent: str, voice: str) -> bytes:
+        ...
+
+
+class ToneSynthesizer(Synthesizer):
+    """Offline stand-in: one short tone per letter, deterministic, no network or model"""
+
+    name = "tone"
+    extension = "wav"
+    media_type = "audio/wav"
+    stand_in = True
+    sample_rate = 16000
+    letter_seconds = 0.08
+
+    def synthesize(self, text: str, accent: str, voice: str) -> bytes:
+        pitch = 1.12 if accent == "uk" else 1.0
+        t = np.arange(int(self.sample_rate * self.letter_seconds)) / self.sample_rate
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) * 200)
+        tones = [
+            np.sin(2 * np.pi * (220 + (ord(ch) % 32) * 15) * pitch * t) * fade
+            for ch in text if not ch.isspace()
+        ] or [np.zeros_like(t)]
+        samples = (np.concatenate(tones) * 0.4 * 32767).astype("<i2")
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            out.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+
+SYNTHESIZERS = {"tone": ToneSynthesizer}
+_synthesizer = None
+
+
+def get_synthesizer():
+    """The configured Synthesizer, None when AUDIO_SYNTHESIZER is empty"""
+    global _synthesizer
+    if _synthesizer is None and settings.AUDIO_SYNTHESIZER:
+        name = settings.AUDIO_SYNTHESIZER
+        if name in SYNTHESIZERS:
+            _synthesizer = SYNTHESIZERS[name]()
+        else:
+            module, _, cls = name.partition(":")
+            _synthesizer = getattr(importlib.import_module(module), cls)()
+    return _synthesizer
+
+
+def audio_key(word: str, accent: str, voice: str = None, synthesizer: Synthesizer = None) -> str:
+    """Path relative to the static directory, derived from (synthesizer, voice, accent, word)"""
+    synthesizer = synthesizer or get_synthesizer()
+    source = f"{synthesizer.name}\0{voice or settings.AUDIO_VOICE}\0{accent}\0{normalize_word(word)}"
+    digest = hashlib.sha256(source.encode()).hexdigest()
+    return f"audio/{digest[:2]}/{digest}.{synthesizer.extension}"
+
+
+def audio_path(key: str) -> str:
+    return os.path.join(settings.AUDIO_DIR, key[len("audio/"):])
+
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def ensure_audio(word: str, accent: str, voice: str = None) -> str:
+    """Stored key of the word's audio, synthesized on first use. Blocking, run it in a thread"""
+    synthesizer = get_synthesizer()
+    voice = voice or settings.AUDIO_VOICE
+    key = audio_key(word, accent, voice, synthesizer)
+    path = audio_path(key)
+    if os.path.exists(path):
+        return key
+    # One synthesis per key even when several requests miss at once
+    with _key_locks_guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        try:
+            if not os.path.exists(path):
+                data = synthesizer.synthesize(normalize_word(word), accent, voice)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+        finally:
+            with _key_locks_guard:
+                _key_locks.pop(key, None)
+    return key
+
+
+def can_store_audio() -> bool:
+    """Whether synthesized keys may be recorded on the shared words"""
+    synthesizer = get_synthesizer()
+    return synthesizer is not None and not synthesizer.stand_in
+
+
+def save_word_audio(db: Session, word_id: int, accent: str, key: str):
+    """Record the key on the shared word unless it already has audio (e.g. a dictionary URL)"""
+    if not can_store_audio():
+        return
+    column = getattr(vocabWord, f"audio_url_{accent}")
+    result = db.execute(
+        update(vocabWord)
+        .where(vocabWord.word_id == word_id, or_(column.is_(None), column == ''))
+        .values({column.key: key})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        touch_lists(db, [word_id])
+
+
+def generate_missing_audio(db: Session, accent: str, list_id: int = None, limit: int = None) -> int:
+    """Synthesize audio for shared words that have none, keyset batches with one bulk UPDATE each.
+
+    Each distinct word is done once for every list that contains it. Nothing to do
+    without a synthesizer or with the stand-in one.
+    """
+    if not can_store_audio():
+        return 0
+    column = getattr(vocabWord, f"audio_url_{accent}")
+    missing = or_(column.is_(None), column == '')
+    last_id = 0
+    generated = 0
+    with ThreadPoolExecutor(settings.AUDIO_WORKERS) as pool:
+        while limit is None or generated < limit:
+            query = db.query(vocabWord.word_id, vocabWord.word).filter(vocabWord.word_id > last_id, missing)
+            if list_id is not None:
+                query = query.filter(
+                    vocabWord.word_id.in_(db.query(vocabItem.word_id).filter(vocabItem.list_id == list_id))
+                )
+            batch_size = AUDIO_BATCH_SIZE if limit is None else min(AUDIO_BATCH_SIZE, limit - generated)
+            rows = query.order_by(vocabWord.word_id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].word_id
+            keys = pool.map(lambda row: ensure_audio(row.word, accent), rows)
+            changes = [{"word_id": row.word_id, column.key: key} for row, key in zip(rows, keys)]
+            # Bulk UPDATE by primary key, executemany
+            db.execute(update(vocabWord), changes)
+            touch_lists(db, [change["word_id"] for change in changes])
+            db.commit()
+            generated += len(changes)
+    return generated
+
+
+def pregenerate_list_audio(list_id: int):
+    """Background task after an import: audio for the list's new words, on its own session"""
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        for accent in ACCENTS:
+            generate_missing_audio(db, accent, list_id=list_id)
+    except Exception as e:
+        print(f"Audio pregeneration failed for list {list_id}: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.services.audio generate [us|uk] [limit]
+    if len(sys.argv) < 2 or sys.argv[1] != "generate":
+        print("usage: python -m app.services.audio generate [us|uk] [limit]")
+        sys.exit(1)
+    if not can_store_audio():
+        print("AUDIO_SYNTHESIZER is empty or the stand-in, nothing would be stored")
+        sys.exit(1)
+    from app.db.session import SessionLocal
+    accents = [sys.argv[2]] if len(sys.argv) > 2 else ACCENTS
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    db = SessionLocal()
+    try:
+        for accent in accents:
+            print(f"Generated {generate_missing_audio(db, accent, limit=limit)} {accent} pronunciations")
+    finally:
+        db.close()
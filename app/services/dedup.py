@@ -0,0 +1,256 @@
+# app/services/dedup.py
+import datetime
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.content import Question, QuestionContent, QuestionSignature
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard almost always share a band
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+SIGNATURE_BATCH_SIZE = 500
+# How long a writer may hold a signature row uncommitted and still be picked up by sync
+SYNC_OVERLAP = datetime.timedelta(minutes=1)
+_TOKEN = re.compile(r"\w+")
+
+# Fixed seed, the signatures are stored and must stay comparable across processes and restarts
+_rng = np.random.default_rng(20261019)
+_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str) -> np.ndarray:
+    """crc32 of every run of SHINGLE_WORDS lowercase words"""
+    words = _TOKEN.findall((text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64)
+
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_PERM uint32 minimums of multiply-shift hashes, equal slots estimate Jaccard similarity"""
+    values = shingles(text)
+    if not len(values):
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    # uint64 products wrap, the high 32 bits are a universal hash of the shingle
+    hashed = (values[:, None] * _A + _B) >> np.uint64(32)
+    return hashed.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def question_set_text(contents) -> str:
+    """Text a stored question set is compared on: question texts and passages, root first"""
+    parts = []
+    for content in contents:
+        parts.extend(part for part in (content.question_text, content.passage_text) if part)
+    return "\n".join(parts)
+
+
+class LSHIndex:
+    """Banded MinHash index of the stored root questions, one namespace per practice type.
+
+    Loaded from content.question_signatures and only ever from there: a set enters
+    the index once its transaction has committed, whichever worker stored it.
+    """
+
+    def __init__(self):
+        self.buckets = {}  # (practice_type, band, band bytes) -> [question_id]
+        self.signatures = {}  # question_id -> signature
+        self.synced_at = None  # newest created_at loaded
+        self.checked = 0
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def _bands(self, practice_type: str, signature: np.ndarray):
+        for band in range(BANDS):
+            yield practice_type, band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def add(self, question_id: int, practice_type: str, signature: np.ndarray):
+        with self.lock:
+            if question_id in self.signatures:
+                return
+            self.signatures[question_id] = signature
+            for key in self._bands(practice_type, signature):
+                self.buckets.setdefault(key, []).append(question_id)
+
+    def sync(self, db: Session) -> int:
+        """Add the signatures committed since the last sync, the first call loads everything.
+
+        A lower question_id can commit after a higher one, so there is no id watermark:
+        every sync lists the ids created from SYNC_OVERLAP before the newest one loaded
+        and fetches the signatures of those not indexed yet.
+        """
+        query = db.query(QuestionSignature.question_id, QuestionSignature.created_at)
+        synced_at = self.synced_at
+        if synced_at is not None:
+            query = query.filter(QuestionSignature.created_at >= synced_at - SYNC_OVERLAP)
+        rows = query.all()
+        missing = [row.question_id for row in rows if row.question_id not in self.signatures]
+        for start in range(0, len(missing), SIGNATURE_BATCH_SIZE):
+            for row in (db.query(QuestionSignature)
+                        .filter(QuestionSignature.question_id.in_(missing[start:start + SIGNATURE_BATCH_SIZE]))):
+                self.add(row.question_id, row.practice_type, np.frombuffer(row.signature, dtype=np.uint32))
+        if rows:
+            newest = max(row.created_at for row in rows)
+            with self.lock:
+                self.synced_at = newest if self.synced_at is None else max(self.synced_at, newest)
+        return len(missing)
+
+    def find(self, practice_type: str, signature: np.ndarray, threshold: float, pending=()):
+        """(question_id, similarity) of the closest stored set at or above threshold, or None.
+
+        pending: (question_id, practice_type, signature) of sets inserted by the current,
+        uncommitted transaction, compared too but never added to the index.
+        """
+        with self.lock:
+            candidates = {question_id: self.signatures[question_id] for key in self._bands(practice_type, signature)
+                          for question_id in self.buckets.get(key, ())}
+            candidates.update((question_id, stored) for question_id, kind, stored in pending if kind == practice_type)
+            best = None
+            for question_id, stored in candidates.items():
+                score = similarity(signature, stored)
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (question_id, score)
+            self.checked += 1
+            if best is not None:
+                self.duplicates += 1
+            return best
+
+    def metrics(self) -> dict:
+        return {
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "duplicate_rate": self.duplicates / self.checked if self.checked else 0.0,
+            "indexed": len(self.signatures),
+            "threshold": settings.DEDUP_THRESHOLD,
+        }
+
+
+question_index = LSHIndex()
+
+
+def find_duplicate(db: Session, practice_type: str, text: str, pending=()):
+    """(signature, (question_id, similarity) of a stored near-duplicate or None).
+
+    pending lists what the current transaction already inserted, see LSHIndex.find.
+    """
+    signature = minhash(text)
+    question_index.sync(db)
+    return signature, question_index.find(practice_type, signature, settings.DEDUP_THRESHOLD, pending)
+
+
+def record_signature(db: Session, question_id: int, practice_type: str, signature: np.ndarray):
+    """Store the new set's signature with it. The caller commits, the index picks it up
+    from the table on a later sync, so a rolled back set never gets indexed"""
+    db.add(QuestionSignature(question_id=question_id, practice_type=practice_type, signature=signature.tobytes()))
+
+
+def insert_unique(db: Session, practice_type: str, text: str, insert) -> int:
+    """Run insert() unless a near-duplicate set is already stored, then that one's id is returned.
+
+    insert is the generator's insert_*_question call with commit=False and returns the
+    new root id. The set and its signature are committed together, once.
+    """
+    signature, duplicate = find_duplicate(db, practice_type, text)
+    if duplicate is not None:
+        print(f"Near-duplicate {practice_type} question of {duplicate[0]} "
+              f"(similarity {duplicate[1]:.2f}), not inserted")
+        return duplicate[0]
+    try:
+        question_id = insert()
+        record_signature(db, question_id, practice_type, signature)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return question_id
+
+
+def insert_unique_all(db: Session, practice_type: str, items, signature_text, insert) -> list:
+    """insert_unique for a list of generated sets, stored together in one transaction.
+
+    insert(db, item, commit=False) runs in a savepoint per item, one that fails is
+    skipped without losing the others. Returns the ids of the stored or matched sets.
+    """
+    question_ids = []
+    pending = []
+    try:
+        for item in items:
+            signature, duplicate = find_duplicate(db, practice_type, signature_text(item), pending)
+            if duplicate is not None:
+                question_ids.append(duplicate[0])
+                continue
+            try:
+                with db.begin_nested():
+                    question_id = insert(db, item, commit=False)
+                    record_signature(db, question_id, practice_type, signature)
+            except Exception as e:
+                print(f"Skipped a generated {practice_type} set: {str(e)}")
+                continue
+            pending.append((question_id, practice_type, signature))
+            question_ids.append(question_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return question_ids
+
+
+def build_signatures(db: Session) -> int:
+    """Sign the stored root questions that have no signature yet (rows from before dedup)"""
+    last_id = 0
+    built = 0
+    while True:
+        roots = (db.query(Question.question_id, Question.practice_type)
+                 .outerjoin(QuestionSignature, QuestionSignature.question_id == Question.question_id)
+                 .filter(Question.parent_id.is_(None), Question.question_id > last_id,
+                         QuestionSignature.question_id.is_(None))
+                 .order_by(Question.question_id)
+                 .limit(SIGNATURE_BATCH_SIZE)
+                 .all())
+        if not roots:
+            return built
+        last_id = roots[-1].question_id
+        root_ids = [root.question_id for root in roots]
+        contents = {question_id: [] for question_id in root_ids}
+        rows = (db.query(Question.question_id, Question.parent_id, QuestionContent.question_text,
+                         QuestionContent.passage_text)
+                .join(QuestionContent, QuestionContent.question_id == Question.question_id)
+                .filter(Question.question_id.in_(root_ids) | Question.parent_id.in_(root_ids))
+                .order_by(Question.parent_id.isnot(None), Question.question_id)
+                .all())
+        for row in rows:
+            contents[row.parent_id or row.question_id].append(row)
+        db.add_all(
+            QuestionSignature(question_id=root.question_id, practice_type=root.practice_type,
+                              signature=minhash(question_set_text(contents[root.question_id])).tobytes())
+            for root in roots
+        )
+        db.commit()
+        built += len(roots)
+
+
+if __name__ == "__main__":
+    # python -m app.services.dedup build
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("usage: python -m app.services.dedup build")
+        sys.exit(1)
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        print(f"Signed {build_signatures(db)} stored question sets")
+    finally:
+        db.close()
@@ -0,0 +1,194 @@
+# app/services/dictionary.py
+import json
+import mmap
+import os
+import struct
+import sys
+
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.vocabulary import vocabWord
+
+# File layout (little endian):
+#   header   MAGIC, uint32 entry count, uint32 reserved
+#   offsets  uint64 per entry, records sorted by key bytes
+#   records  key \0 ipa \0 definition \0 audio_url_us \0 audio_url_uk
+MAGIC = b"VDICT01\0"
+HEADER = struct.Struct("<8sII")
+OFFSET = struct.Struct("<Q")
+ENTRY_FIELDS = ("ipa", "definition", "audio_url_us", "audio_url_uk")
+BACKFILL_BATCH_SIZE = 1000
+
+
+def normalize_word(word: str) -> str:
+    return " ".join(word.lower().split())
+
+
+class OfflineDictionary:
+    """Read-only word index, memory mapped once and shared by every request"""
+
+    def __init__(self):
+        self._file = None
+        self._mm = None
+        self.count = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._mm is not None
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            print(f"Offline dictionary not found at {path}, enrichment disabled")
+            return
+        self.close()
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a dictionary index")
+        print(f"Loaded offline dictionary: {self.count} entries")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+        self._file = None
+        self._mm = None
+        self.count = 0
+
+    def _offset(self, index: int) -> int:
+        return OFFSET.unpack_from(self._mm, HEADER.size + index * OFFSET.size)[0]
+
+    def _record_end(self, index: int) -> int:
+        return self._offset(index + 1) if index + 1 < self.count else len(self._mm)
+
+    def lookup(self, word: str):
+        """Binary search over the mapped offsets, a few microseconds per word"""
+        if self._mm is None or not word:
+            return None
+        key = normalize_word(word).encode()
+        mm = self._mm
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            start = self._offset(middle)
+            current = mm[start:mm.find(b"\0", start)]
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle - 1
+            else:
+                values = mm[start:self._record_end(middle)].decode().split("\0")[1:]
+                return dict(zip(ENTRY_FIELDS, values))
+        return None
+
+
+offline_dictionary = OfflineDictionary()
+
+
+def enrich_fields(fields: dict) -> dict:
+    """Fill empty ipa/definition/audio fields in place from the offline dictionary"""
+    if not offline_dictionary.loaded:
+        return fields
+    missing = [field for field in ENTRY_FIELDS if not fields.get(field)]
+    if not missing:
+        return fields
+    entry = offline_dictionary.lookup(fields.get("word") or "")
+    if entry:
+        for field in missing:
+            if entry.get(field):
+                fields[field] = entry[field]
+    return fields
+
+
+def build_index(source_path: str, output_path: str) -> int:
+    """Build the index from TSV (word, ipa, definition, audio_url_us, audio_url_uk) or JSONL"""
+    entries = {}
+    with open(source_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            if source_path.endswith(".jsonl"):
+                data = json.loads(line)
+                word = data.get("word", "")
+                values = [str(data.get(field) or "") for field in ENTRY_FIELDS]
+            else:
+                columns = line.split("\t")
+                word = columns[0]
+                values = (columns[1:] + [""] * len(ENTRY_FIELDS))[:len(ENTRY_FIELDS)]
+            key = normalize_word(word)
+            if key and key not in entries:
+                entries[key] = [value.replace("\0", "").strip() for value in values]
+
+    keys = sorted(entries, key=lambda key: key.encode())
+    records = [b"\0".join([key.encode()] + [value.encode() for value in entries[key]]) for key in keys]
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), 0))
+        offset = HEADER.size + OFFSET.size * len(records)
+        for record in records:
+            f.write(OFFSET.pack(offset))
+            offset += len(record)
+        for record in records:
+            f.write(record)
+    os.replace(tmp_path, output_path)
+    return len(records)
+
+
+def backfill_words(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Fill missing ipa/definition/audio on the shared word entries, keyset batches with
+    one bulk UPDATE each. Items inherit them, so the work scales with distinct words."""
+    # words imports this module
+    from app.services.words import touch_lists
+    if not offline_dictionary.loaded:
+        return 0
+    columns = [vocabWord.word_id, vocabWord.word] + [getattr(vocabWord, field) for field in ENTRY_FIELDS]
+    empty = or_(*[or_(getattr(vocabWord, field).is_(None), getattr(vocabWord, field) == '')
+                  for field in ENTRY_FIELDS])
+    last_id = 0
+    updated = 0
+    while True:
+        rows = (db.query(*columns)
+                .filter(vocabWord.word_id > last_id, empty)
+                .order_by(vocabWord.word_id)
+                .limit(batch_size)
+                .all())
+        if not rows:
+            return updated
+        last_id = rows[-1].word_id
+        changes = []
+        for row in rows:
+            fields = {field: getattr(row, field) for field in ("word",) + ENTRY_FIELDS}
+            before = dict(fields)
+            enrich_fields(fields)
+            if fields != before:
+                fields.pop("word")
+                changes.append(dict(fields, word_id=row.word_id))
+        if changes:
+            # Bulk UPDATE by primary key, executemany
+            db.execute(update(vocabWord), changes)
+            touch_lists(db, [change["word_id"] for change in changes])
+            db.commit()
+            updated += len(changes)
+
+if __name__ == "__main__":
+    # python -m app.services.dictionary build <source.tsv|source.jsonl> [output]
+    # python -m app.services.dictionary backfill
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        output = sys.argv[3] if len(sys.argv) > 3 else settings.DICTIONARY_PATH
+        print(f"Wrote {build_index(sys.argv[2], output)} entries to {output}")
+    elif len(sys.argv) == 2 and sys.argv[1] == "backfill":
+        from app.db.session import SessionLocal
+        offline_dictionary.load(settings.DICTIONARY_PATH)
+        db = SessionLocal()
+        try:
+            print(f"Enriched {backfill_words(db)} shared word entries")
+        finally:
+            db.close()
+    else:
+        print("usage: python -m app.services.dictionary build <source> [output] | backfill")
+        sys.exit(1)
@@ -0,0 +1,235 @@
+# app/services/export.py
+import csv
+import html
+import io
+import json
+import os
+import re
+import zipfile
+
+from app.config import settings
+from app.db.router import session_router
+from app.models.vocabulary import vocabItem
+from app.services.static_files import public_url, static_path
+from app.services.words import item_columns, join_words
+
+EXPORT_FORMATS = ("csv", "jsonl", "anki")
+EXPORT_FIELDS = ("item_id", "word", "definition", "example", "ipa", "audio_url_us", "audio_url_uk", "image_url")
+MEDIA_FIELDS = ("audio_url_us", "audio_url_uk", "image_url")
+# Rows fetched per round trip of the server-side cursor
+EXPORT_BATCH_SIZE = 500
+# Bytes buffered before a chunk is sent
+CHUNK_SIZE = 64 * 1024
+MEDIA_DIR = "media"
+EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "anki": "txt"}
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "anki": "text/plain; charset=utf-8",
+    "zip": "application/zip",
+}
+
+
+def export_filename(title: str, export_format: str, bundle: bool) -> str:
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", title or "").strip("_") or "vocabulary"
+    return f"{name}.{'zip' if bundle else EXTENSIONS[export_format]}"
+
+
+def iter_list_items(list_id: int, sticky: bool = False):
+    """Stream a list's items through a server-side cursor, in list order.
+
+    Opens its own session: the request's session is closed by the time a
+    StreamingResponse body runs. sticky keeps the read on the primary, as the
+    request's own session would be.
+    """
+    db = session_router.read_session(sticky)
+    try:
+        query = (join_words(db.query(*item_columns(EXPORT_FIELDS)))
+                 .filter(vocabItem.list_id == list_id)
+                 .order_by(vocabItem.created_at, vocabItem.item_id)
+                 .yield_per(EXPORT_BATCH_SIZE))
+        for row in query:
+            yield row._asdict()
+    finally:
+        db.close()
+
+
+class MediaLinks:
+    """Public URLs, or file names inside the bundle for media stored in the static directory"""
+
+    def __init__(self, bundle: bool):
+        self.bundle = bundle
+        self.files = {}  # name in the bundle -> path on disk
+
+    def link(self, value):
+        path = static_path(value)
+        if not self.bundle or path is None:
+            return public_url(value) or ""
+        local = os.path.join(settings.STATIC_DIR, path)
+        if not os.path.isfile(local):
+            return public_url(value)
+        # Stored files are content addressed, the base name is already unique
+        name = os.path.basename(path)
+        self.files[name] = local
+        return f"{MEDIA_DIR}/{name}"
+
+
+class CsvWriter:
+    def __init__(self, vocab: dict, media: MediaLinks):
+        self.media = media
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _flush(self) -> str:
+        text = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return text
+
+    def header(self) -> str:
+        # Same header the CSV import reads, plus the media columns
+        self.writer.writerow(EXPORT_FIELDS[1:])
+        return self._flush()
+
+    def row(self, item: dict) -> str:
+        self.writer.writerow([
+            self.media.link(item[field]) if field in MEDIA_FIELDS else (item[field] or "")
+            for field in EXPORT_FIELDS[1:]
+        ])
+        return self._flush()
+
+
+class JsonlWriter:
+    def __init__(self, vocab: dict, media: MediaLinks):
+        self.vocab = vocab
+        self.media = media
+
+    def header(self) -> str:
+        # The import skips this line, so an export can be imported back as is
+        vocab = dict(self.vocab, image=self.media.link(self.vocab.get("image")))
+        return json.dumps({"list": vocab}, ensure_ascii=False, default=str) + "\n"
+
+    def row(self, item: dict) -> str:
+        data = {field: item[field] or "" for field in EXPORT_FIELDS[1:]}
+        for field in MEDIA_FIELDS:
+            data[field] = self.media.link(item[field])
+        return json.dumps(data, ensure_ascii=False) + "\n"
+
+
+class AnkiWriter:
+    """Anki's text import format (File > Import), one Basic note per item"""
+
+    def __init__(self, vocab: dict, media: MediaLinks):
+        self.vocab = vocab
+        self.media = media
+
+    @staticmethod
+    def _text(value) -> str:
+        return html.escape(value or "").replace("\t", " ").replace("\r", "").replace("\n", "<br>")
+
+    def header(self) -> str:
+        deck = (self.vocab.get("title") or "Vocabulary").replace("\n", " ")
+        return f"#separator:tab\n#html:true\n#notetype:Basic\n#deck:{deck}\n#columns:Front\tBack\n"
+
+    def _audio(self, value) -> str:
+        link = self.media.link(value)
+        if not link:
+            return ""
+        if link.startswith(f"{MEDIA_DIR}/"):
+            # Bundled files go to collection.media, Anki plays them by name
+            return f"[sound:{link[len(MEDIA_DIR) + 1:]}]"
+        return f'<a href="{html.escape(link)}">&#9654;</a>'
+
+    def _image(self, value) -> str:
+        link = self.media.link(value)
+        if not link:
+            return ""
+        if link.startswith(f"{MEDIA_DIR}/"):
+            link = link[len(MEDIA_DIR) + 1:]
+        return f'<img src="{html.escape(link)}">'
+
+    def row(self, item: dict) -> str:
+        front = self._text(item["word"])
+        if item["ipa"]:
+            front += f"<br>{self._text(item['ipa'])}"
+        front += self._audio(item["audio_url_us"] or item["audio_url_uk"])
+        back = self._text(item["definition"])
+        if item["example"]:
+            back += f"<br><i>{self._text(item['example'])}</i>"
+        back += self._image(item["image_url"])
+        return f"{front}\t{back}\n"
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "anki": AnkiWriter}
+
+
+def _iter_text(writer, items):
+    """Rows as encoded chunks of about CHUNK_SIZE, the header goes out before any item is read"""
+    yield writer.header().encode()
+    parts = []
+    size = 0
+    for item in items:
+        text = writer.row(item)
+        parts.append(text)
+        size += len(text)
+        if size >= CHUNK_SIZE:
+            yield "".join(parts).encode()
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, unseekable target for ZipFile: whatever it receives is handed out by drain()"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _iter_zip(writer, items, media: MediaLinks, notes_name: str):
+    """The export file then every referenced media file, zipped on the fly"""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(notes_name, "w") as notes:
+            for chunk in _iter_text(writer, items):
+                notes.write(chunk)
+                data = sink.drain()
+                if data:
+                    yield data
+        for name, path in sorted(media.files.items()):
+            # Images and audio are already compressed
+            info = zipfile.ZipInfo(f"{MEDIA_DIR}/{name}")
+            info.compress_type = zipfile.ZIP_STORED
+            with archive.open(info, "w") as target, open(path, "rb") as source:
+                while True:
+                    block = source.read(CHUNK_SIZE)
+                    if not block:
+                        break
+                    target.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    yield sink.drain()
+
+
+def export_list(vocab: dict, export_format: str, bundle: bool = False, sticky: bool = False):
+    """Byte chunks of the export, memory stays flat whatever the list size"""
+    media = MediaLinks(bundle)
+    writer = WRITERS[export_format](vocab, media)
+    items = iter_list_items(vocab["list_id"], sticky)
+    if not bundle:
+        return _iter_text(writer, items)
+    return _iter_zip(writer, items, media, f"notes.{EXTENSIONS[export_format]}")
@@ -0,0 +1,175 @@
+# app/services/images.py
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps
+
+from app.config import settings
+from app.services.static_files import static_url
+
+# Longest side in pixels of every stored variant
+IMAGE_VARIANTS = {"lg": 1024, "md": 512, "sm": 128}
+DEFAULT_VARIANT = "md"
+CHUNK_SIZE = 64 * 1024
+IMAGE_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def image_path(image_id: str, variant: str = DEFAULT_VARIANT, image_dir: str = None) -> str:
+    return os.path.join(image_dir or settings.IMAGE_DIR, image_id[:2], f"{image_id}_{variant}.webp")
+
+
+def image_key(image_id: str, variant: str = DEFAULT_VARIANT) -> str:
+    """Path relative to the static directory, this is what gets stored in the database"""
+    return f"images/{image_id[:2]}/{image_id}_{variant}.webp"
+
+
+def image_url(image_id: str, variant: str = DEFAULT_VARIANT) -> str:
+    return static_url(image_key(image_id, variant))
+
+
+def image_exists(image_id: str) -> bool:
+    return all(os.path.exists(image_path(image_id, variant)) for variant in IMAGE_VARIANTS)
+
+
+def process_image(src_path: str, image_id: str, image_dir: str):
+    """Decode once, then write every WebP variant from the largest to the smallest.
+
+    Runs in a worker process so decoding and encoding never block the event loop.
+    """
+    with Image.open(src_path) as image:
+        largest = max(IMAGE_VARIANTS.values())
+        # JPEG only: let the decoder downscale while decoding
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+
+        os.makedirs(os.path.join(image_dir, image_id[:2]), exist_ok=True)
+        for variant, size in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+            image.thumbnail((size, size), Image.LANCZOS)
+            path = image_path(image_id, variant, image_dir)
+            if os.path.exists(path):
+                continue
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            image.save(tmp_path, "WEBP", quality=80, method=4)
+            os.replace(tmp_path, path)
+
+
+async def _finalize(tmp_path: str, image_id: str) -> str:
+    try:
+        # Same bytes were uploaded before: nothing to decode or store
+        if image_exists(image_id):
+            return image_id
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(get_executor(), process_image, tmp_path, image_id, settings.IMAGE_DIR)
+        except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid image: {str(e)}"
+            )
+        return image_id
+    finally:
+        os.remove(tmp_path)
+
+
+def _open_tmp():
+    # Outside the static mount: an upload is untrusted until process_image has decoded it
+    tmp_dir = settings.UPLOAD_TMP_DIR or None
+    if tmp_dir:
+        os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="upload-", dir=tmp_dir)
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _too_large():
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Image is larger than {settings.IMAGE_MAX_BYTES} bytes"
+    )
+
+
+async def store_upload(upload: UploadFile) -> str:
+    """Stream an uploaded file to disk in chunks, hashing as we go. Returns the image id."""
+    hasher = hashlib.sha256()
+    size = 0
+    tmp_file, tmp_path = _open_tmp()
+    try:
+        with tmp_file:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.IMAGE_MAX_BYTES:
+                    raise _too_large()
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return await _finalize(tmp_path, hasher.hexdigest())
+
+
+async def store_base64(image_base64: str) -> str:
+    """Legacy JSON upload: decode the base64 string chunk by chunk into the same pipeline"""
+    if "base64," in image_base64:
+        image_base64 = image_base64.split("base64,", 1)[1]
+    image_base64 = "".join(image_base64.split())
+    if len(image_base64) * 3 // 4 > settings.IMAGE_MAX_BYTES:
+        raise _too_large()
+
+    hasher = hashlib.sha256()
+    tmp_file, tmp_path = _open_tmp()
+    # Multiple of 4 so every chunk decodes on its own
+    step = CHUNK_SIZE // 3 * 4
+    try:
+        with tmp_file:
+            for start in range(0, len(image_base64), step):
+                chunk = base64.b64decode(image_base64[start:start + step])
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+    except binascii.Error as e:
+        os.remove(tmp_path)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid base64 image: {str(e)}"
+        )
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return await _finalize(tmp_path, hasher.hexdigest())
+
+
+async def resolve_image(image_id: str = None, image_base64: str = None):
+    """Stored image path for a vocabulary payload, from a previous upload or an inline base64 string"""
+    if image_id:
+        if not IMAGE_ID_RE.match(image_id) or not image_exists(image_id):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown image_id"
+            )
+        return image_key(image_id)
+    if image_base64:
+        return image_key(await store_base64(image_base64))
+    return None
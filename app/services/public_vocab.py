@@ -0,0 +1,102 @@
+# app/services/public_vocab.py
+import bisect
+import threading
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.vocabulary import vocabList, vocabItem
+from app.services.vocabulary import ITEM_FIELDS, DEFAULT_ITEM_FIELDS, decode_cursor, encode_cursor
+from app.services.words import item_columns, join_words
+
+
+def format_list(row) -> dict:
+    return {
+        "list_id": row.list_id,
+        "title": row.title,
+        "category": row.category,
+        "description": row.description,
+        "total_words": row.total_words,
+        "progress": row.progress or 0,
+        "updated_at": row.updated_at,
+        "image": row.image
+    }
+
+
+class PublicSnapshot:
+    def __init__(self, version, lists, items):
+        self.version = version
+        self.lists = lists
+        self.lists_by_id = {vocab["list_id"]: vocab for vocab in lists}
+        # list_id -> items ordered by (created_at, item_id), plus the keys for bisect
+        self.items = items
+        self.keys = {
+            list_id: [(item["created_at"], item["item_id"]) for item in list_items]
+            for list_id, list_items in items.items()
+        }
+
+    def item_page(self, list_id: int, limit: int, cursor: str = None, fields=DEFAULT_ITEM_FIELDS):
+        """Same result as vocabulary.fetch_item_page, served from memory"""
+        items = self.items.get(list_id, [])
+        start = bisect.bisect_right(self.keys.get(list_id, []), decode_cursor(cursor)) if cursor else 0
+        page = items[start:start + limit + 1]
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["item_id"])
+        return [{field: item[field] for field in fields} for item in page], next_cursor
+
+
+class PublicVocabCache:
+    """Process-wide copy of the public lists (list_id < 0) and their items.
+
+    The public lists are the same for every user. Within ttl seconds a request
+    costs no database work at all; after that one aggregate query compares the
+    version (max updated_at, list count, word count) and reloads only if it moved.
+    Every item write bumps its list's updated_at, so the version always changes.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    def get(self, db: Session) -> PublicSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.ttl:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.ttl:
+                return self._snapshot
+            version = tuple(db.execute(
+                select(func.max(vocabList.updated_at), func.count(vocabList.list_id), func.sum(vocabList.total_words))
+                .where(vocabList.list_id < 0)
+            ).one())
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = self._load(db, version)
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _load(self, db: Session, version) -> PublicSnapshot:
+        lists = [
+            format_list(row) for row in
+            db.query(vocabList).filter(vocabList.list_id < 0).order_by(vocabList.list_id.desc()).all()
+        ]
+        items = {vocab["list_id"]: [] for vocab in lists}
+        rows = (join_words(db.query(*item_columns(ITEM_FIELDS)))
+                .filter(vocabItem.list_id < 0)
+                .order_by(vocabItem.list_id, vocabItem.created_at, vocabItem.item_id)
+                .yield_per(1000))
+        for row in rows:
+            items.setdefault(row.list_id, []).append({field: getattr(row, field) for field in ITEM_FIELDS})
+        print(f"Loaded public vocabulary cache: {len(lists)} lists, {sum(len(v) for v in items.values())} items")
+        return PublicSnapshot(version, lists, items)
+
+
+public_vocab_cache = PublicVocabCache(settings.PUBLIC_CACHE_TTL_SECONDS)
@@ -0,0 +1,284 @@
+# app/services/questions.py
+import json
+import random
+import sys
+
+from sqlalchemy import Text, cast, exists, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.content import Question, QuestionView
+from app.services.dedup import question_set_text
+from app.services.readability import score_text, score_texts
+
+# Keys the generators store in Question.attributes
+ATTRIBUTE_KEYS = ("ielts_part", "toeic_part", "source_type", "ielts_type", "task_number", "conversation_context")
+# Probe rounds before the already seen questions are allowed back
+SAMPLE_ROUNDS = 3
+# Bump when format_question changes, then run: python -m app.services.questions rebuild
+PAYLOAD_VERSION = 2
+PAYLOAD_BATCH_SIZE = 200
+# Bump when services/readability changes, then run: python -m app.services.questions score
+SCORES_VERSION = 1
+# Bucket of the sets whose generator takes no difficulty (writing, speaking),
+# from the CEFR level of their text: A1-A2, B1-B2, C1-C2
+MEASURED_DIFFICULTY = ("Easy", "Medium", "Hard")
+
+
+def question_attributes(metadata: dict, exclude=()) -> dict:
+    """Generator metadata -> Question.attributes, values are strings as in the old key/value rows"""
+    return {key: str(value) for key, value in metadata.items() if key not in exclude and value is not None}
+
+
+def filter_attributes(query, attributes: dict):
+    """attributes @> :attributes, served by the GIN (jsonb_path_ops) index whatever the keys"""
+    if attributes:
+        query = query.filter(Question.attributes.contains(attributes))
+    return query
+
+
+def format_question(q: Question) -> dict:
+    """Question row (with its content and answers) -> the payload the practice pages render"""
+    content = q.content_items[0] if q.content_items else None
+    options = [ans.content for ans in q.answers] if q.answers else None
+    correct = [ans.is_correct for ans in q.answers] if q.answers else None
+    hint = [ans.hint for ans in q.answers] if q.answers else None
+    explanation = [ans.explanation for ans in q.answers] if q.answers else None
+
+    return {
+        "question_id": q.question_id,
+        "question_type": q.question_type,
+        "question_text": content.question_text if content else "",
+        "question_context": content.context if content else "",
+        "correct_answer": correct, #example: [False, True, False, False], [True], [True,False]
+        "options": options, # example: [option1, option2],[short answer]
+        "hint": hint,
+        "audio": content.audio_url if content and content.audio_url else None,
+        "question_image": content.image_url if content and content.image_url else None,
+        "explanation": explanation,
+        "practice_type": q.practice_type,
+        "difficulty": q.difficulty_level,
+        "cefr_level": q.cefr_level,
+        "passage_text": content.passage_text if content else None,
+        "parent_id": q.parent_id,
+        "attributes": q.attributes
+    }
+
+
+def _bucket(practice_type: str, topic: str = None, difficulty: str = None, attributes: dict = None,
+            cefr: str = None):
+    conditions = [Question.practice_type == practice_type, Question.parent_id.is_(None)]
+    if topic:
+        conditions.append(Question.topic == topic)
+    if difficulty:
+        conditions.append(Question.difficulty_level == difficulty)
+    if cefr:
+        conditions.append(Question.cefr_level == cefr.upper())
+    if attributes:
+        conditions.append(Question.attributes.contains(attributes))
+    return conditions
+
+
+def sample_question_ids(db: Session, user_id: int, practice_type: str, count: int,
+                        topic: str = None, difficulty: str = None, attributes: dict = None,
+                        cefr: str = None) -> list:
+    """Up to count random root question ids of a bucket, unseen by the user first.
+
+    Every question has a fixed random_key in [0, 1). One probe per wanted question
+    seeks to the first key >= a fresh random point and reads in random_key order,
+    LIMIT 1, all probes in one UNION ALL round trip. A probe past the last key
+    wraps around to the first one. Collisions are retried with new points, the
+    last round reads a run of consecutive keys so a nearly exhausted bucket still
+    fills up. No probe sorts the bucket as ORDER BY random() does.
+
+    What a probe reads depends on the filters:
+    - topic and difficulty, or neither: a seek on ix_questions_bucket_random or
+      ix_questions_type_random, rows read do not depend on the bucket size.
+    - topic or difficulty alone, cefr or attributes: ix_questions_type_random is walked
+      from the point with the rest as a filter, about 1 / (matching share of the
+      practice type) rows per probe. Cheap for common values, close to a scan of
+      the practice type for rare ones.
+    Unseen rounds also skip the user's seen questions along the way, so a user who
+    has seen most of a bucket pays for it until the seen round takes over.
+    """
+    conditions = _bucket(practice_type, topic, difficulty, attributes, cefr)
+    seen = exists().where(QuestionView.user_id == user_id, QuestionView.question_id == Question.question_id)
+    picked = []
+
+    def probe(conditions, point: float, limit: int = 1):
+        seek = (select(Question.question_id).where(*conditions, Question.random_key >= point)
+                .order_by(Question.random_key).limit(limit).subquery())
+        return select(seek.c.question_id)
+
+    for include_seen in (False, True):
+        bucket = conditions if include_seen else conditions + [~seen]
+        for attempt in range(SAMPLE_ROUNDS):
+            missing = count - len(picked)
+            if missing <= 0:
+                return picked
+            if attempt < SAMPLE_ROUNDS - 1:
+                # The point 0 probe is the wrap-around for points past the last key
+                probes = [probe(bucket, random.random()) for _ in range(missing)] + [probe(bucket, 0.0)]
+            else:
+                # Thin bucket, probes keep colliding: take a run of consecutive keys instead
+                run = bucket + [Question.question_id.notin_(picked)] if picked else bucket
+                point = random.random()
+                probes = [probe(run, point, missing), probe(run, 0.0, missing)]
+            found = db.execute(union_all(*probes)).scalars().all()
+            if not found:
+                break
+            for question_id in found:
+                if question_id not in picked and len(picked) < count:
+                    picked.append(question_id)
+    return picked
+
+
+def _question_trees(db: Session, root_ids: list) -> dict:
+    """root id -> [root, children by id], content and answers loaded in two extra queries"""
+    trees = {question_id: [] for question_id in root_ids}
+    questions = (db.query(Question)
+                 .options(selectinload(Question.content_items), selectinload(Question.answers))
+                 .filter(Question.question_id.in_(root_ids) | Question.parent_id.in_(root_ids))
+                 .order_by(Question.question_id)
+                 .all())
+    for q in questions:
+        if q.parent_id is None:
+            trees[q.question_id].insert(0, q)
+        elif q.parent_id in trees:
+            trees[q.parent_id].append(q)
+    return trees
+
+
+def measured_difficulty(text: str) -> str:
+    """difficulty_level for a set generated without one, from the CEFR level of its text"""
+    level = score_text(text)["cefr_level"]
+    return MEASURED_DIFFICULTY["ABC".index(level[0])] if level else MEASURED_DIFFICULTY[1]
+
+
+def score_trees(trees: dict):
+    """Score the text of each question set and store the scores and CEFR level on its root.
+    difficulty_level stays the one the set was generated for (the batch CLI's --difficulties),
+    cefr_level is a separate axis to filter on. One vectorized scoring call for all the sets. The caller commits."""
+    sets = [tree for tree in trees.values() if tree]
+    scores = score_texts([question_set_text(q.content_items[0] for q in tree if q.content_items) for tree in sets])
+    for tree, score in zip(sets, scores):
+        root = tree[0]
+        # Sets without text keep no scores, but are done until SCORES_VERSION changes
+        root.readability_version = SCORES_VERSION
+        if score["cefr_level"] is None:
+            continue
+        root.readability = score
+        root.cefr_level = score["cefr_level"]
+
+
+def store_payload(db: Session, root_id: int):
+    """Score the new question set, then snapshot it formatted on its root row. Generated
+    questions never change afterwards, so reads serve this as is. The caller commits."""
+    db.flush()
+    trees = _question_trees(db, [root_id])
+    tree = trees[root_id]
+    if tree:
+        score_trees(trees)
+        tree[0].payload = [format_question(q) for q in tree]
+        tree[0].payload_version = PAYLOAD_VERSION
+
+
+def question_payloads(db: Session, root_ids: list) -> dict:
+    """root id -> payload as JSON text, ready to be written to a response.
+
+    One indexed fetch of the root rows; sets without a current snapshot are
+    formatted from their rows instead (until the rebuild job has run).
+    """
+    if not root_ids:
+        return {}
+    rows = (db.query(Question.question_id, cast(Question.payload, Text).label("payload"))
+            .filter(Question.question_id.in_(root_ids), Question.parent_id.is_(None),
+                    Question.payload_version == PAYLOAD_VERSION)
+            .all())
+    payloads = {row.question_id: row.payload for row in rows}
+    stale = [question_id for question_id in root_ids if question_id not in payloads]
+    if stale:
+        for question_id, tree in _question_trees(db, stale).items():
+            if tree:
+                payloads[question_id] = json.dumps([format_question(q) for q in tree], default=str)
+    return payloads
+
+
+def join_payloads(payloads: list) -> str:
+    """Concatenate payload arrays (JSON text) into one array without decoding them"""
+    return "[" + ",".join(payload[1:-1] for payload in payloads if payload[1:-1].strip()) + "]"
+
+
+def rebuild_payloads(db: Session, rebuild_all: bool = False) -> int:
+    """Rewrite the snapshots older than PAYLOAD_VERSION (or every one), keyset batches of roots"""
+    last_id = 0
+    rebuilt = 0
+    while True:
+        query = db.query(Question.question_id).filter(Question.parent_id.is_(None), Question.question_id > last_id)
+        if not rebuild_all:
+            query = query.filter(Question.payload_version.is_distinct_from(PAYLOAD_VERSION))
+        root_ids = [row.question_id for row in query.order_by(Question.question_id).limit(PAYLOAD_BATCH_SIZE)]
+        if not root_ids:
+            break
+        last_id = root_ids[-1]
+        for tree in _question_trees(db, root_ids).values():
+            if tree:
+                tree[0].payload = [format_question(q) for q in tree]
+                tree[0].payload_version = PAYLOAD_VERSION
+        db.commit()
+        db.expunge_all()
+        rebuilt += len(root_ids)
+    return rebuilt
+
+
+def score_questions(db: Session, rescore_all: bool = False) -> int:
+    """Backfill: score the sets older than SCORES_VERSION (or every one) in keyset batches
+    of roots and rewrite their payloads with the CEFR level"""
+    last_id = 0
+    scored = 0
+    while True:
+        query = db.query(Question.question_id).filter(Question.parent_id.is_(None), Question.question_id > last_id)
+        if not rescore_all:
+            query = query.filter(Question.readability_version.is_distinct_from(SCORES_VERSION))
+        root_ids = [row.question_id for row in query.order_by(Question.question_id).limit(PAYLOAD_BATCH_SIZE)]
+        if not root_ids:
+            break
+        last_id = root_ids[-1]
+        trees = _question_trees(db, root_ids)
+        score_trees(trees)
+        for tree in trees.values():
+            if tree:
+                tree[0].payload = [format_question(q) for q in tree]
+                tree[0].payload_version = PAYLOAD_VERSION
+        db.commit()
+        db.expunge_all()
+        scored += len(root_ids)
+    return scored
+
+
+def record_views(db: Session, user_id: int, question_ids: list):
+    """Mark root questions as seen, re-serving one is a no-op"""
+    if question_ids:
+        db.execute(
+            insert(QuestionView)
+            .values([{"user_id": user_id, "question_id": question_id} for question_id in question_ids])
+            .on_conflict_do_nothing(index_elements=["user_id", "question_id"])
+        )
+        db.commit()
+
+
+if __name__ == "__main__":
+    # python -m app.services.questions rebuild [--all]
+    # python -m app.services.questions score [--all]
+    if len(sys.argv) < 2 or sys.argv[1] not in ("rebuild", "score"):
+        print("usage: python -m app.services.questions rebuild|score [--all]")
+        sys.exit(1)
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        if sys.argv[1] == "score":
+            print(f"Scored {score_questions(db, rescore_all='--all' in sys.argv[2:])} question sets")
+        else:
+            print(f"Rebuilt {rebuild_payloads(db, rebuild_all='--all' in sys.argv[2:])} question payloads")
+    finally:
+        db.close()
@@ -0,0 +1,210 @@
+# app/services/quiz.py
+import json
+import re
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.vocabulary import vocabList, vocabItem
+from app.schemas.content import QuestionSchema
+from app.services.static_files import public_url
+from app.services.vocab_search import fold
+from app.services.words import item_columns, join_words
+
+QUIZ_TYPES = ("multiple_choice", "definition_choice", "fill_in", "matching")
+QUIZ_FIELDS = ("item_id", "list_id", "word", "definition", "example", "ipa", "audio_url_us", "image_url")
+OPTION_COUNT = 4
+MATCHING_SIZE = 4
+# Distractor candidates, the list itself first, then the user's other lists, then public ones
+MAX_POOL = 3000
+BIGRAM_DIM = 512
+# Weights of the distractor score: spelling, length, part of speech, random jitter
+WEIGHTS = (0.5, 0.25, 0.2, 0.05)
+BLANK = "_____"
+
+# No part of speech is stored, a suffix guess is enough to keep distractors plausible
+POS_OTHER, POS_ADVERB, POS_ADJECTIVE, POS_VERB, POS_NOUN, POS_PHRASE = range(6)
+POS_SUFFIXES = (
+    (POS_ADVERB, ("ly",)),
+    (POS_ADJECTIVE, ("ful", "ous", "ive", "able", "ible", "less", "al", "ic")),
+    (POS_VERB, ("ize", "ise", "ify", "ate")),
+    (POS_NOUN, ("tion", "sion", "ment", "ness", "ity", "ship", "ism", "er")),
+)
+
+
+def guess_pos(key: str, definition: str) -> int:
+    if " " in key:
+        return POS_PHRASE
+    if definition[:3].lower() == "to ":
+        return POS_VERB
+    if len(key) > 4:
+        for pos, suffixes in POS_SUFFIXES:
+            if key.endswith(suffixes):
+                return pos
+    return POS_OTHER
+
+
+class WordFeatures:
+    """Per-word features as arrays, computed once per quiz for the whole pool"""
+
+    def __init__(self, words, definitions):
+        definitions = [(definition or "").strip() for definition in definitions]
+        self.keys = [_key(word) for word in words]
+        self.lengths = np.array([len(key) for key in self.keys], dtype=np.float32)
+        self.pos = np.array([guess_pos(key, definition) for key, definition in zip(self.keys, definitions)])
+        # Hashed character bigrams of " key ", their cosine tracks edit distance closely and
+        # the whole pool is compared with one matmul. Built over the joined keys, no per-word loop.
+        text = np.frombuffer(f" {' '.join(self.keys)} ".encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        pairs = self.lengths.astype(np.int64) + 1
+        rows = np.repeat(np.arange(len(self.keys)), pairs)
+        offsets = np.arange(len(rows))
+        buckets = (text[offsets] * 31 + text[offsets + 1]) % BIGRAM_DIM
+        bigrams = np.bincount(rows * BIGRAM_DIM + buckets, minlength=len(self.keys) * BIGRAM_DIM)
+        bigrams = bigrams.reshape(len(self.keys), BIGRAM_DIM).astype(np.float32)
+        norms = np.linalg.norm(bigrams, axis=1, keepdims=True)
+        self.bigrams = bigrams / np.maximum(norms, 1e-6)
+        self.word_ids = _codes(self.keys)
+        self.definition_ids = _codes([definition.lower() for definition in definitions])
+
+
+def _key(word: str) -> str:
+    key = word.strip().lower()
+    return key if key.isascii() else fold(key)
+
+
+def _codes(values):
+    codes = {}
+    return np.array([codes.setdefault(value, len(codes)) for value in values])
+
+
+def pick_distractors(features: WordFeatures, targets, count: int, rng: np.random.Generator):
+    """Indices of the count most similar other words for every target index, one matrix op for all"""
+    targets = np.asarray(targets)
+    spelling = features.bigrams[targets] @ features.bigrams.T
+    target_lengths = features.lengths[targets][:, None]
+    length = 1 - np.abs(target_lengths - features.lengths) / np.maximum(np.maximum(target_lengths, features.lengths), 1)
+    same_pos = features.pos[targets][:, None] == features.pos
+    w_spelling, w_length, w_pos, w_jitter = WEIGHTS
+    score = (w_spelling * spelling + w_length * length + w_pos * same_pos
+             + w_jitter * rng.random(spelling.shape, dtype=np.float32))
+    # Never offer the answer again, under another spelling or with the same definition
+    score[features.word_ids[targets][:, None] == features.word_ids] = -np.inf
+    score[features.definition_ids[targets][:, None] == features.definition_ids] = -np.inf
+
+    count = min(count, score.shape[1] - 1)
+    if count <= 0:
+        return [[] for _ in targets]
+    best = np.argpartition(-score, count - 1, axis=1)[:, :count]
+    picked = []
+    for row, candidates in enumerate(best):
+        candidates = candidates[np.argsort(-score[row, candidates])]
+        # Pools of near-duplicates can leave fewer than count real candidates
+        picked.append([int(index) for index in candidates if np.isfinite(score[row, index])])
+    return picked
+
+
+def load_quiz_pool(db: Session, user_id: int, list_id: int):
+    """The list's items (the quiz subjects) and the distractor pool they are an index prefix of"""
+    columns = item_columns(QUIZ_FIELDS)
+    items = [
+        row._asdict() for row in
+        join_words(db.query(*columns)).filter(vocabItem.list_id == list_id).limit(MAX_POOL).all()
+    ]
+    pool = list(items)
+    if len(pool) < MAX_POOL:
+        others = (join_words(db.query(*columns))
+                  .join(vocabList, vocabList.list_id == vocabItem.list_id)
+                  .filter(vocabItem.list_id != list_id,
+                          (vocabList.user_id == user_id) | (vocabList.list_id < 0))
+                  # The user's own lists before the public ones
+                  .order_by(vocabList.list_id.desc())
+                  .limit(MAX_POOL - len(pool))
+                  .all())
+        pool.extend(row._asdict() for row in others)
+    return items, pool
+
+
+def _question(item: dict, question_type: str, question_text: str, correct_answer: str, **extra) -> dict:
+    question = QuestionSchema(
+        question_id=item["item_id"],
+        question_text=question_text,
+        question_type=question_type,
+        practice_type="vocabulary",
+        question_image=public_url(item["image_url"]),
+        correct_answer=correct_answer,
+        audio=public_url(item["audio_url_us"]) or None,
+        **extra
+    )
+    return question.model_dump()
+
+
+def _blank_example(item: dict):
+    example = item["example"] or ""
+    pattern = re.compile(rf"\b{re.escape(item['word'].strip())}\w*", re.IGNORECASE)
+    if not item["word"].strip() or not pattern.search(example):
+        return None
+    return pattern.sub(BLANK, example)
+
+
+def build_quiz(items, pool, count: int, types=QUIZ_TYPES, seed: int = None):
+    """Questions in QuestionSchema shape built from the items, distractors come from the pool.
+
+    multiple_choice   definition -> pick the word
+    definition_choice word -> pick the definition
+    fill_in           example with the word blanked (or the definition), answer typed
+    matching          MATCHING_SIZE words, options are their definitions shuffled and
+                      correct_answer is the JSON list of option indices in word order
+    """
+    rng = np.random.default_rng(seed)
+    if not items:
+        return []
+    features = WordFeatures([item["word"] for item in pool], [item["definition"] for item in pool])
+    order = rng.permutation(len(items))
+    plan = []
+    position = 0
+    while len(plan) < count and position < len(order):
+        question_type = types[len(plan) % len(types)]
+        size = MATCHING_SIZE if question_type == "matching" else 1
+        if question_type == "matching" and len(order) - position < 2:
+            question_type, size = "fill_in", 1
+        plan.append((question_type, [int(index) for index in order[position:position + size]]))
+        position += size
+
+    targets = [indices[0] for _, indices in plan]
+    distractors = pick_distractors(features, targets, OPTION_COUNT - 1, rng)
+
+    questions = []
+    for (question_type, indices), others in zip(plan, distractors):
+        item = items[indices[0]]
+        if question_type in ("multiple_choice", "definition_choice") and not others:
+            question_type = "fill_in"
+
+        if question_type == "multiple_choice":
+            options = [item["word"]] + [pool[index]["word"] for index in others]
+            rng.shuffle(options)
+            questions.append(_question(
+                item, question_type, f"Which word means: {item['definition']}?", item["word"],
+                options=options, hint=item["ipa"] or None, explanation=item["example"] or None))
+        elif question_type == "definition_choice":
+            options = [item["definition"]] + [pool[index]["definition"] for index in others]
+            rng.shuffle(options)
+            questions.append(_question(
+                item, question_type, f"What does \"{item['word']}\" mean?", item["definition"],
+                options=options, hint=item["ipa"] or None, explanation=item["example"] or None))
+        elif question_type == "fill_in":
+            blanked = _blank_example(item)
+            text = f"Fill in the blank: {blanked}" if blanked else f"Type the word that means: {item['definition']}"
+            questions.append(_question(
+                item, question_type, text, item["word"],
+                hint=f"{item['word'].strip()[:1]}... ({len(item['word'].strip())} letters)",
+                explanation=item["definition"]))
+        else:
+            group = [items[index] for index in indices]
+            shuffled = rng.permutation(len(group))
+            options = [group[index]["definition"] for index in shuffled]
+            answer = [int(np.where(shuffled == index)[0][0]) for index in range(len(group))]
+            questions.append(_question(
+                item, question_type,
+                "Match each word with its definition: " + ", ".join(entry["word"] for entry in group),
+                json.dumps(answer), options=options))
+    return questions
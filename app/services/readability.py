@@ -0,0 +1,175 @@
+# app/services/readability.py
+import bisect
+import csv
+import re
+from functools import lru_cache
+
+import numpy as np
+from wordfreq import top_n_list
+
+from app.config import settings
+
+CEFR_LEVELS = ("A1", "A2", "B1", "B2", "C1", "C2")
+# Without a CEFR word list, a word's level comes from its frequency rank: the
+# vocabulary sizes usually quoted per level (A1 1000 words ... C1 8000), C2 beyond
+CEFR_RANKS = (1000, 2000, 3250, 5000, 8000)
+# K-bands of the frequency list: top 1000, 2000, 3000, 5000, 10000 words, then off-list
+FREQUENCY_BANDS = (1000, 2000, 3000, 5000, 10000)
+BAND_NAMES = ("K1", "K2", "K3", "K5", "K10", "off_list")
+# Flesch-Kincaid grade up to which a text reads as each level, C2 above
+GRADE_BOUNDS = (3, 5, 8, 11, 14)
+# Share of the running words a reader must know to follow a text. 95% is the usual
+# figure for word families, ranks of single word forms ("organise", "stressful")
+# undercount what a reader knows, so a little lower
+COVERAGE = 0.9
+# Below this the readability formulas are noise, the level is the lexical one alone
+MIN_READABILITY_WORDS = 100
+
+_WORD = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_VOWEL_GROUP = re.compile(r"[aeiouy]+")
+# Inflections stripped to look a word up by its base form
+_SUFFIXES = (("'s", ""), ("ies", "y"), ("es", ""), ("s", ""), ("ied", "y"), ("ed", ""), ("ed", "e"),
+             ("ing", ""), ("ing", "e"), ("ly", ""))
+
+
+@lru_cache(maxsize=1)
+def _ranks() -> dict:
+    return {word: rank for rank, word in enumerate(top_n_list("en", FREQUENCY_BANDS[-1]), 1)}
+
+
+@lru_cache(maxsize=1)
+def _cefr_list() -> dict:
+    """word -> level index from settings.CEFR_WORDLIST (csv rows: word,level), {} when not set"""
+    levels = {}
+    if not settings.CEFR_WORDLIST:
+        return levels
+    with open(settings.CEFR_WORDLIST, encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[1].strip().upper() not in CEFR_LEVELS:
+                continue
+            word, level = row[0].strip().lower(), CEFR_LEVELS.index(row[1].strip().upper())
+            levels[word] = min(level, levels.get(word, level))
+    return levels
+
+
+def syllables(word: str) -> int:
+    count = len(_VOWEL_GROUP.findall(word))
+    # Silent final e: "make", but not "table" or "free"
+    if count > 1 and word.endswith("e") and not word.endswith(("le", "ee")):
+        count -= 1
+    return max(count, 1)
+
+
+def _base_forms(word: str):
+    yield word
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            base = word[:-len(suffix)]
+            yield base + replacement
+            # "travelling", "stopped"
+            if suffix in ("ing", "ed") and base[-1] == base[-2]:
+                yield base[:-1]
+
+
+@lru_cache(maxsize=65536)
+def _word_info(word: str) -> tuple:
+    """(syllables, letters, frequency band, CEFR level index) of a lowercase word"""
+    ranks = _ranks()
+    # An inflected form is as easy as its base form
+    rank = min((ranks[form] for form in _base_forms(word) if form in ranks), default=None)
+    band = bisect.bisect_left(FREQUENCY_BANDS, rank) if rank else len(FREQUENCY_BANDS)
+    level = None
+    listed = _cefr_list()
+    if listed:
+        level = next((listed[form] for form in _base_forms(word) if form in listed), None)
+    if level is None:
+        level = bisect.bisect_left(CEFR_RANKS, rank) if rank else len(CEFR_RANKS)
+    return syllables(word), sum(1 for char in word if char.isalpha()), band, level
+
+
+def tokenize(text: str) -> list:
+    """Lowercase words, less the capitalized ones inside a sentence: names are not
+    vocabulary the reader has to know"""
+    text = (text or "").replace("’", "'")
+    words = []
+    for match in _WORD.finditer(text):
+        word = match.group()
+        if word[0].isupper() and word != "I" and not word.startswith("I'"):
+            before = text[max(0, match.start() - 4):match.start()].rstrip()
+            if before and before[-1] not in ".!?:\"“(\n":
+                continue
+        words.append(word.lower())
+    return words
+
+
+def sentence_count(text: str) -> int:
+    return sum(1 for part in _SENTENCE_END.split(text or "") if tokenize(part))
+
+
+def score_texts(texts) -> list:
+    """Readability indices, frequency band shares and CEFR coverage of many texts at once.
+
+    Each distinct word is looked up once, every per-text sum and formula is one
+    NumPy operation over the whole batch. The level is the first one whose
+    words cover COVERAGE of the text, weighted 3:2 with the level of its
+    Flesch-Kincaid grade when the text is long enough for the formula. Shorter
+    ones (a cue card, a writing prompt) get the lexical level alone and a
+    readability_level of None, a rougher estimate from a few dozen words.
+    Texts without words get a cefr_level of None.
+    """
+    tokens = [tokenize(text) for text in texts]
+    n = len(tokens)
+    if not n:
+        return []
+    lengths = np.fromiter((len(words) for words in tokens), dtype=np.int64, count=n)
+    text_ids = np.repeat(np.arange(n), lengths)
+    vocabulary = {}
+    inverse = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for words in tokens for word in words),
+                          dtype=np.int64, count=int(lengths.sum()))
+    info = np.array([_word_info(word) for word in vocabulary], dtype=np.int64).reshape(-1, 4)[inverse]
+
+    words = lengths.astype(np.float64)
+    sentences = np.maximum(np.fromiter((sentence_count(text) for text in texts), dtype=np.float64, count=n), 1.0)
+    syllable_counts = np.bincount(text_ids, weights=info[:, 0], minlength=n)
+    letters = np.bincount(text_ids, weights=info[:, 1], minlength=n)
+    bands = np.zeros((n, len(BAND_NAMES)))
+    np.add.at(bands, (text_ids, info[:, 2]), 1)
+    levels = np.zeros((n, len(CEFR_LEVELS)))
+    np.add.at(levels, (text_ids, info[:, 3]), 1)
+
+    per_word = np.maximum(words, 1.0)
+    words_per_sentence = words / sentences
+    syllables_per_word = syllable_counts / per_word
+    reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+    grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+    coleman_liau = 0.0588 * (letters / per_word * 100) - 0.296 * (sentences / per_word * 100) - 15.8
+    band_shares = bands / per_word[:, None]
+    coverage = np.cumsum(levels, axis=1) / per_word[:, None]
+    # Off-list words count as C2, so the C2 column is always 1.0 and argmax finds a level
+    lexical = np.argmax(coverage >= COVERAGE, axis=1)
+    by_grade = np.searchsorted(GRADE_BOUNDS, grade, side="left")
+    level = np.where(words >= MIN_READABILITY_WORDS, np.rint(0.6 * lexical + 0.4 * by_grade), lexical).astype(np.int64)
+
+    results = []
+    for i in range(n):
+        if not lengths[i]:
+            results.append({"words": 0, "sentences": 0, "cefr_level": None})
+            continue
+        results.append({
+            "words": int(lengths[i]),
+            "sentences": int(sentences[i]),
+            "flesch_reading_ease": round(float(reading_ease[i]), 1),
+            "flesch_kincaid_grade": round(float(grade[i]), 1),
+            "coleman_liau": round(float(coleman_liau[i]), 1),
+            "bands": {name: round(float(share), 3) for name, share in zip(BAND_NAMES, band_shares[i])},
+            "cefr_coverage": {name: round(float(share), 3) for name, share in zip(CEFR_LEVELS, coverage[i])},
+            "lexical_level": CEFR_LEVELS[lexical[i]],
+            "readability_level": CEFR_LEVELS[by_grade[i]] if words[i] >= MIN_READABILITY_WORDS else None,
+            "cefr_level": CEFR_LEVELS[level[i]],
+        })
+    return results
+
+
+def score_text(text: str) -> dict:
+    return score_texts([text])[0]
@@ -0,0 +1,146 @@
+# app/services/review.py
+import datetime
+
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.vocabulary import vocabList, vocabItem, vocabReview
+from app.services.words import item_columns, join_words
+
+# An item counts as learned once its interval reaches this many days
+LEARNED_INTERVAL_DAYS = 21
+RELEARN_DELAY = datetime.timedelta(minutes=10)
+MIN_EASE = 1.3
+CARD_FIELDS = ("item_id", "list_id", "word", "ipa", "definition", "example", "image_url")
+
+
+def schedule(ease: float, interval_days: float, repetitions: int, lapses: int, grade: int, now: datetime.datetime):
+    """SM-2: returns (ease, interval_days, repetitions, lapses, due_at)"""
+    if grade < 3:
+        repetitions = 0
+        interval_days = 0
+        lapses += 1
+        due_at = now + RELEARN_DELAY
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval_days = 1
+        elif repetitions == 2:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease, 2)
+        due_at = now + datetime.timedelta(days=interval_days)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+    return ease, interval_days, repetitions, lapses, due_at
+
+
+def adjust_learned_words(db: Session, list_id: int, delta: int):
+    """learned_words += delta and progress from it, in SQL like adjust_total_words"""
+    learned = vocabList.learned_words + delta
+    db.execute(
+        update(vocabList)
+        .where(vocabList.list_id == list_id)
+        .values(learned_words=learned,
+                progress=learned * 100 // func.greatest(vocabList.total_words, 1))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def is_learned(interval_days: float) -> bool:
+    return interval_days >= LEARNED_INTERVAL_DAYS
+
+
+def _card(row, review=None) -> dict:
+    card = {field: getattr(row, field) for field in CARD_FIELDS}
+    card["due_at"] = review.due_at if review is not None else None
+    card["repetitions"] = review.repetitions if review is not None else 0
+    card["new"] = review is None
+    return card
+
+
+def fetch_due_cards(db: Session, user_id: int, limit: int, now: datetime.datetime = None):
+    """Due cards first (ix_reviews_user_due), then never-reviewed items from the user's lists"""
+    now = now or datetime.datetime.utcnow()
+    columns = item_columns(CARD_FIELDS)
+    due = (join_words(db.query(vocabReview, *columns)
+                      .join(vocabItem, vocabItem.item_id == vocabReview.item_id))
+           .filter(vocabReview.user_id == user_id, vocabReview.due_at <= now)
+           .order_by(vocabReview.due_at)
+           .limit(limit)
+           .all())
+    cards = [_card(row, row.vocabReview) for row in due]
+
+    remaining = limit - len(cards)
+    if remaining > 0:
+        reviewed = exists().where(and_(vocabReview.user_id == user_id, vocabReview.item_id == vocabItem.item_id))
+        new_items = (join_words(db.query(*columns))
+                     .join(vocabList, vocabList.list_id == vocabItem.list_id)
+                     .filter(vocabList.user_id == user_id, vocabList.list_id >= 0, ~reviewed)
+                     .order_by(vocabItem.list_id, vocabItem.created_at, vocabItem.item_id)
+                     .limit(remaining)
+                     .all())
+        cards.extend(_card(row) for row in new_items)
+    return cards
+
+
+def grade_item(db: Session, user_id: int, item_id: int, grade: int, now: datetime.datetime = None):
+    """Apply one review and update the owner's list progress incrementally. None if the item is not visible."""
+    now = now or datetime.datetime.utcnow()
+    item = (db.query(vocabItem.item_id, vocabItem.list_id, vocabList.user_id)
+            .join(vocabList, vocabList.list_id == vocabItem.list_id)
+            .filter(vocabItem.item_id == item_id)
+            .first())
+    if not item or (item.list_id >= 0 and item.user_id != user_id):
+        return None
+
+    # Create-or-lock in one statement: the no-op DO UPDATE row-locks an existing review
+    # and returns it, two first reviews of an item can't both insert
+    review = db.scalars(
+        insert(vocabReview)
+        .values(user_id=user_id, item_id=item_id, ease=2.5, interval_days=0, repetitions=0, lapses=0, due_at=now)
+        .on_conflict_do_update(index_elements=["user_id", "item_id"], set_={"user_id": user_id})
+        .returning(vocabReview),
+        execution_options={"populate_existing": True},
+    ).one()
+    was_learned = is_learned(review.interval_days)
+
+    (review.ease, review.interval_days, review.repetitions,
+     review.lapses, review.due_at) = schedule(review.ease, review.interval_days, review.repetitions,
+                                              review.lapses, grade, now)
+    review.last_reviewed_at = now
+
+    # Progress belongs to the list owner, public lists are shared and have none
+    delta = int(is_learned(review.interval_days)) - int(was_learned)
+    if delta and item.user_id == user_id and item.list_id >= 0:
+        adjust_learned_words(db, item.list_id, delta)
+    db.commit()
+    return review
+
+
+def reconcile_progress(db: Session, list_ids=None) -> int:
+    """Recompute learned_words/progress from the owner's review rows, for repair jobs.
+    Public lists (negative ids) are shared and come out at 0, as grade_item keeps them."""
+    learned = (
+        select(func.count())
+        .select_from(vocabReview)
+        .join(vocabItem, vocabItem.item_id == vocabReview.item_id)
+        .where(vocabItem.list_id == vocabList.list_id,
+               vocabReview.user_id == vocabList.user_id,
+               vocabList.list_id >= 0,
+               vocabReview.interval_days >= LEARNED_INTERVAL_DAYS)
+        .scalar_subquery()
+    )
+    progress = learned * 100 // func.greatest(vocabList.total_words, 1)
+    stmt = (
+        update(vocabList)
+        # progress goes stale on its own when only total_words changed
+        .where(or_(vocabList.learned_words != learned, vocabList.progress != progress))
+        .values(learned_words=learned, progress=progress)
+        .execution_options(synchronize_session=False)
+    )
+    if list_ids:
+        stmt = stmt.where(vocabList.list_id.in_(list_ids))
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,128 @@
+# app/services/static_files.py
+import gzip
+import mimetypes
+import os
+import re
+
+import zstandard
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+from app.config import settings
+
+# Uploaded images/audio are named after their sha256, so their bytes never change
+CONTENT_HASH_RE = re.compile(r"(?<![0-9a-f])[0-9a-f]{64}(?![0-9a-f])")
+TEXT_EXTENSIONS = {".css", ".js", ".mjs", ".json", ".map", ".svg", ".html", ".txt", ".xml"}
+# Preferred order when the client accepts several
+PRECOMPRESSED = [("zstd", ".zst"), ("gzip", ".gz")]
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Absolute URLs written to the database before PUBLIC_BASE_URL existed
+LEGACY_STATIC_PREFIXES = ("http://localhost:8000/static/",)
+
+
+def static_url(path: str) -> str:
+    """Public URL of a file under the static directory, e.g. 'images/ab/ab..._md.webp'"""
+    return f"{settings.PUBLIC_BASE_URL.rstrip('/')}{settings.STATIC_URL_PATH}/{path.lstrip('/')}"
+
+
+def static_path(value):
+    """Path under the static directory of a stored value, None for external URLs"""
+    if not value:
+        return None
+    for prefix in LEGACY_STATIC_PREFIXES:
+        if value.startswith(prefix):
+            return value[len(prefix):]
+    if value.startswith(("http://", "https://", "data:")):
+        return None
+    return value.lstrip("/")
+
+
+def public_url(value):
+    """Turn a stored static path (or a legacy absolute localhost URL) into a public URL"""
+    path = static_path(value)
+    return static_url(path) if path is not None else value
+
+
+def accepted_encodings(headers: Headers) -> set:
+    encodings = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with immutable caching for content-hashed files and precompressed text assets"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        base_name, extension = os.path.splitext(os.path.basename(full_path))
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+
+        serve_path, serve_stat, encoding = full_path, stat_result, None
+        is_text = extension.lower() in TEXT_EXTENSIONS
+        if is_text:
+            accepted = accepted_encodings(request_headers)
+            for name, suffix in PRECOMPRESSED:
+                if name not in accepted:
+                    continue
+                try:
+                    candidate_stat = os.stat(full_path + suffix)
+                except OSError:
+                    continue
+                # A stale sibling would serve old content under the new ETag
+                if candidate_stat.st_mtime >= stat_result.st_mtime:
+                    serve_path, serve_stat, encoding = full_path + suffix, candidate_stat, name
+                    break
+
+        response = FileResponse(serve_path, status_code=status_code, stat_result=serve_stat, media_type=media_type)
+        if encoding:
+            response.headers["content-encoding"] = encoding
+        if is_text:
+            response.headers["vary"] = "Accept-Encoding"
+
+        if CONTENT_HASH_RE.search(base_name):
+            # Strong validator: the name is the hash, one per representation
+            etag = base_name if encoding is None else f"{base_name}-{encoding}"
+            response.headers["etag"] = f'"{etag}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            if encoding:
+                response.headers["etag"] = response.headers["etag"][:-1] + f'-{encoding}"'
+            response.headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress_static(directory: str):
+    """Write .gz and .zst siblings for text assets that are missing or out of date"""
+    compressor = zstandard.ZstdCompressor(level=19)
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            if os.path.splitext(file_name)[1].lower() not in TEXT_EXTENSIONS:
+                continue
+            path = os.path.join(root, file_name)
+            mtime = os.stat(path).st_mtime
+            for suffix, compress in ((".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+                                     (".zst", compressor.compress)):
+                target = path + suffix
+                if os.path.exists(target) and os.stat(target).st_mtime >= mtime:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                compressed = compress(data)
+                # Not worth a Content-Encoding round trip
+                if len(compressed) >= len(data):
+                    continue
+                with open(target + ".tmp", "wb") as f:
+                    f.write(compressed)
+                os.replace(target + ".tmp", target)
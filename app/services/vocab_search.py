@@ -0,0 +1,183 @@
+# app/services/vocab_search.py
+import threading
+import unicodedata
+
+from sqlalchemy import Integer, any_, case, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models.vocabulary import vocabList, vocabItem, vocabWord
+from app.services.public_vocab import PublicSnapshot
+from app.services.words import item_column, item_columns, join_words
+
+SEARCH_FIELDS = ("item_id", "list_id", "word", "ipa", "definition", "image_url")
+# pg_trgm similarity() floor for the database side, matches pg_trgm.similarity_threshold
+MIN_SIMILARITY = 0.3
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, same as vocabulary.f_unaccent(lower(...)) in Postgres"""
+    text = unicodedata.normalize("NFKD", text.lower()).replace("đ", "d")
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def max_typos(query: str) -> int:
+    if len(query) <= 2:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+def rank(query: str, key: str, distance: int = None) -> float:
+    """exact > prefix (longer overlap first) > fuzzy (fewer edits first)"""
+    if key == query:
+        return 1.0
+    if key.startswith(query):
+        return 0.8 + 0.15 * len(query) / len(key)
+    if distance is None:
+        return 0.0
+    return 0.6 * (1 - distance / max(len(query), len(key)))
+
+
+class TrieNode:
+    __slots__ = ("children", "items")
+
+    def __init__(self):
+        self.children = {}
+        self.items = []
+
+
+class VocabTrie:
+    """Prefix tree over folded words, with bounded edit-distance lookup for typos"""
+
+    def __init__(self):
+        self.root = TrieNode()
+
+    def insert(self, key: str, item):
+        node = self.root
+        for ch in key:
+            node = node.children.setdefault(ch, TrieNode())
+        node.items.append(item)
+
+    def prefix(self, prefix: str, limit: int):
+        node = self.root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        # Breadth first, so shorter completions come out first
+        results = []
+        level = [(prefix, node)]
+        while level and len(results) < limit:
+            next_level = []
+            for key, current in level:
+                for item in current.items:
+                    results.append((key, item))
+                for ch, child in current.children.items():
+                    next_level.append((key + ch, child))
+            level = next_level
+        return results[:limit]
+
+    def fuzzy(self, query: str, max_distance: int, limit: int):
+        """(distance, key, item) for every word within max_distance edits of query"""
+        results = []
+        first_row = list(range(len(query) + 1))
+        # Walk the trie carrying one Levenshtein DP row per node, prune when the
+        # whole row is already over budget
+        stack = [(ch, child, ch, first_row) for ch, child in self.root.children.items()]
+        while stack:
+            ch, node, key, previous_row = stack.pop()
+            row = [previous_row[0] + 1]
+            for column in range(1, len(query) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous_row[column] + 1,
+                    previous_row[column - 1] + (query[column - 1] != ch),
+                ))
+            if row[-1] <= max_distance:
+                for item in node.items:
+                    results.append((row[-1], key, item))
+            if min(row) <= max_distance:
+                for next_ch, child in node.children.items():
+                    stack.append((next_ch, child, key + next_ch, row))
+        results.sort(key=lambda result: (result[0], len(result[1])))
+        return results[:limit]
+
+
+_trie_lock = threading.Lock()
+_trie_cache = {}  # id(snapshot) -> (snapshot, trie), rebuilt when the public cache reloads
+
+
+def public_trie(snapshot: PublicSnapshot) -> VocabTrie:
+    cached = _trie_cache.get(id(snapshot))
+    if cached is not None and cached[0] is snapshot:
+        return cached[1]
+    with _trie_lock:
+        cached = _trie_cache.get(id(snapshot))
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        trie = VocabTrie()
+        for items in snapshot.items.values():
+            for item in items:
+                trie.insert(fold(item["word"]), item)
+        _trie_cache.clear()
+        _trie_cache[id(snapshot)] = (snapshot, trie)
+        return trie
+
+
+def search_public(snapshot: PublicSnapshot, query: str, limit: int):
+    trie = public_trie(snapshot)
+    scored = {}
+    for key, item in trie.prefix(query, limit):
+        scored[item["item_id"]] = (rank(query, key), item)
+    if len(scored) < limit:
+        for distance, key, item in trie.fuzzy(query, max_typos(query), limit):
+            scored.setdefault(item["item_id"], (rank(query, key, distance), item))
+    return [
+        dict({field: item[field] for field in SEARCH_FIELDS}, score=score, public=True)
+        for score, item in scored.values()
+    ]
+
+
+def search_user_items(db: Session, user_id: int, query: str, limit: int, in_definition: bool = False):
+    """Prefix and trigram match over the user's own items, served by the GIN trigram indexes"""
+    word_key = func.vocabulary.f_unaccent(func.lower(vocabItem.word))
+    like_prefix = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    is_prefix = word_key.like(like_prefix)
+    condition = is_prefix | word_key.op("%")(query)
+    similarity = func.similarity(word_key, query)
+    if in_definition:
+        # One condition per table so each hits its own trigram index, the shared
+        # definition only counts for items without an override
+        item_definition = func.vocabulary.f_unaccent(func.lower(vocabItem.definition))
+        word_definition = func.vocabulary.f_unaccent(func.lower(vocabWord.definition))
+        # = ANY(array) runs the words lookup once and probes ix_vocabulary_items_word_id
+        matching_words = cast(select(func.array_agg(vocabWord.word_id))
+                              .where(literal(query).op("<%")(word_definition))
+                              .scalar_subquery(), ARRAY(Integer))
+        condition = (condition
+                     | literal(query).op("<%")(item_definition)
+                     | (vocabItem.definition.is_(None) & (vocabItem.word_id == any_(matching_words))))
+        definition_key = func.vocabulary.f_unaccent(func.lower(item_column("definition")))
+        similarity = func.greatest(similarity, func.word_similarity(query, definition_key))
+
+    rows = (join_words(db.query(*item_columns(SEARCH_FIELDS),
+                                word_key.label("key"),
+                                similarity.label("similarity")))
+            .join(vocabList, vocabList.list_id == vocabItem.list_id)
+            .filter(vocabList.user_id == user_id, vocabList.list_id >= 0, condition)
+            .order_by(case((is_prefix, 0), else_=1), similarity.desc(), func.length(vocabItem.word))
+            .limit(limit)
+            .all())
+    results = []
+    for row in rows:
+        score = rank(query, row.key)
+        if score == 0.0:
+            score = 0.6 * max(row.similarity or 0.0, MIN_SIMILARITY)
+        results.append(dict({field: getattr(row, field) for field in SEARCH_FIELDS}, score=score, public=False))
+    return results
+
+
+def merge_results(limit: int, *result_sets):
+    merged = [result for results in result_sets for result in results]
+    merged.sort(key=lambda result: (-result["score"], len(result["word"])))
+    return merged[:limit]
@@ -0,0 +1,354 @@
+# app/services/vocabulary.py
+import base64
+import codecs
+import csv
+import datetime
+import email.utils
+import hashlib
+import json
+import sys
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import SessionLocal
+from app.models.vocabulary import vocabList, vocabItem, vocabReview
+from app.schemas.vocabulary import VocabImportRow
+from app.services.dictionary import normalize_word
+from app.services.review import LEARNED_INTERVAL_DAYS, adjust_learned_words
+from app.services.words import item_columns, join_words, resolve_words, split_overrides
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+# Fields a client may ask for with ?fields=, item_id is always returned
+ITEM_FIELDS = ("item_id", "list_id", "word", "ipa", "definition", "example", "image_url", "created_at")
+DEFAULT_ITEM_FIELDS = ("item_id", "list_id", "word", "ipa", "definition", "example", "image_url")
+# Columns carried over when items are copied to another list, images are shared by reference
+COPY_COLUMNS = ("word_id", "word", "definition", "example", "ipa", "audio_url_us", "audio_url_uk",
+                "image_url", "difficulty_level")
+
+
+def adjust_total_words(db: Session, list_id: int, delta: int):
+    """total_words += delta evaluated by the database, concurrent writers never lose an update.
+
+    Issue it right before commit: the row lock it takes is held until the transaction ends.
+    """
+    total_words = vocabList.total_words + delta
+    db.execute(
+        update(vocabList)
+        .where(vocabList.list_id == list_id)
+        .values(total_words=total_words,
+                progress=vocabList.learned_words * 100 // func.greatest(total_words, 1),
+                updated_at=datetime.datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_total_words(db: Session, list_ids=None) -> int:
+    """Recompute total_words from the items table in one statement, returns the number of lists fixed"""
+    item_count = (
+        select(func.count(vocabItem.item_id))
+        .where(vocabItem.list_id == vocabList.list_id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(vocabList)
+        .where(vocabList.total_words != item_count)
+        .values(total_words=item_count)
+        .execution_options(synchronize_session=False)
+    )
+    if list_ids:
+        stmt = stmt.where(vocabList.list_id.in_(list_ids))
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+def encode_cursor(created_at: datetime.datetime, item_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(created_at, item_id) of the last item of the previous page, ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(item_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def parse_fields(fields: str = None):
+    if not fields:
+        return DEFAULT_ITEM_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ITEM_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return tuple(["item_id"] + [field for field in requested if field != "item_id"])
+
+
+def list_validators(list_id: int, updated_at: datetime.datetime, total_words: int, *variant):
+    """ETag and Last-Modified of a list page. Every item write bumps vocabList.updated_at,
+    so they can be computed without loading a single item row."""
+    key = ":".join(str(part) for part in (list_id, updated_at.isoformat(), total_words) + variant)
+    etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+    last_modified = email.utils.format_datetime(updated_at.replace(tzinfo=datetime.timezone.utc), usegmt=True)
+    return etag, last_modified
+
+
+def is_not_modified(headers, etag: str, updated_at: datetime.datetime) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        return etag in tags or "*" in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        # HTTP dates have second precision
+        return updated_at.replace(microsecond=0) <= since
+    return False
+
+
+def fetch_item_page(db: Session, list_id: int, limit: int, cursor: str = None, fields=DEFAULT_ITEM_FIELDS):
+    """One page of items ordered by (created_at, item_id), served by ix_items_list_created_item"""
+    columns = item_columns(fields)
+    if "created_at" not in fields:
+        columns.append(vocabItem.created_at)
+    query = (join_words(db.query(*columns))
+             .filter(vocabItem.list_id == list_id)
+             .order_by(vocabItem.created_at, vocabItem.item_id))
+    if cursor:
+        query = query.filter(tuple_(vocabItem.created_at, vocabItem.item_id) > decode_cursor(cursor))
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].item_id)
+    items = [{field: getattr(row, field) for field in fields} for row in rows]
+    return items, next_cursor
+
+
+async def iter_lines(stream):
+    """Decode a byte stream into lines without reading it all first"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in stream:
+        buffer += decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_csv_rows(lines):
+    """Yield (row_number, data, error). The first record is the header.
+
+    A record may span several lines when a quoted field contains a newline,
+    quotes are balanced again once the record is complete.
+    """
+    header = None
+    pending = None
+    row_number = 0
+    async for line in lines:
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, None
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            continue
+        row_number += 1
+        yield row_number, dict(zip(header, values)), None
+    if pending is not None:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+async def iter_jsonl_rows(lines):
+    row_number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if row_number == 1 and isinstance(data, dict) and set(data) == {"list"}:
+            # List header line of a JSONL export
+            row_number = 0
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, data, None
+
+
+def format_validation_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+def _insert_batch(db: Session, list_id: int, batch):
+    """Resolve the batch's shared words, then insert its items. Returns (inserted, errors)"""
+    shared = resolve_words(db, [fields for _, fields in batch], public=list_id < 0)
+    items = []
+    errors = []
+    for row_number, fields in batch:
+        word = shared.get(normalize_word(fields["word"]), {})
+        if not (fields["definition"] or word.get("definition")):
+            errors.append({"row": row_number, "error": "definition: missing and not found in the dictionary"})
+            continue
+        items.append(dict(split_overrides(fields, word),
+                          list_id=list_id, word=fields["word"], example=fields["example"],
+                          word_id=word.get("word_id")))
+    if items:
+        # executemany, SQLAlchemy batches it into multi-row INSERT ... VALUES statements
+        db.execute(insert(vocabItem), items)
+    return len(items), errors
+
+
+async def import_vocab_items(db: Session, list_id: int, rows) -> dict:
+    """Validate rows as they arrive and insert them in batches, updating total_words once"""
+    inserted = 0
+    failed = 0
+    errors = []
+    batch = []
+
+    def report(error: dict):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(error)
+
+    async def flush():
+        nonlocal inserted
+        count, batch_errors = await run_in_threadpool(_insert_batch, db, list_id, batch)
+        inserted += count
+        for error in batch_errors:
+            report(error)
+
+    async for row_number, data, error in rows:
+        if error is None:
+            try:
+                row = VocabImportRow.model_validate(data)
+            except ValidationError as e:
+                error = format_validation_error(e)
+        if error is not None:
+            report({"row": row_number, "error": error})
+            continue
+
+        batch.append((row_number, {
+            "word": row.word,
+            "definition": row.definition or '',
+            "example": row.example or '',
+            "ipa": row.ipa or '',
+        }))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+            batch = []
+
+    if batch:
+        await flush()
+
+    if inserted:
+        adjust_total_words(db, list_id, inserted)
+    db.commit()
+    errors.sort(key=lambda error: error["row"])
+    return {"inserted": inserted, "failed": failed, "errors": errors}
+
+def _item_filter(source_list_id: int, item_ids=None):
+    condition = vocabItem.list_id == source_list_id
+    if item_ids is not None:
+        condition = condition & vocabItem.item_id.in_(item_ids)
+    return condition
+
+
+def lock_lists(db: Session, list_ids):
+    """SELECT ... FOR UPDATE on the list rows in list_id order. A write touching several
+    lists takes its locks here first, two of them in opposite directions can't deadlock."""
+    db.execute(
+        select(vocabList.list_id)
+        .where(vocabList.list_id.in_(list_ids))
+        .order_by(vocabList.list_id)
+        .with_for_update()
+    )
+
+
+def copy_items(db: Session, source_list_id: int, target_list_id: int, item_ids=None) -> int:
+    """Copy items (all of the list when item_ids is None) with one INSERT ... SELECT.
+
+    Copies keep the source order and share the stored image keys, nothing is re-encoded.
+    The caller commits.
+    """
+    columns = [getattr(vocabItem, column) for column in COPY_COLUMNS]
+    source = (
+        select(literal(target_list_id), literal(datetime.datetime.utcnow()), *columns)
+        .where(_item_filter(source_list_id, item_ids))
+        .order_by(vocabItem.created_at, vocabItem.item_id)
+    )
+    result = db.execute(
+        insert(vocabItem).from_select(["list_id", "created_at", *COPY_COLUMNS], source)
+    )
+    if result.rowcount:
+        adjust_total_words(db, target_list_id, result.rowcount)
+    return result.rowcount
+
+
+def move_items(db: Session, user_id: int, source_list_id: int, target_list_id: int, item_ids=None) -> int:
+    """Move items between two of the user's lists with one UPDATE, reviews follow the item_id.
+    The caller commits."""
+    lock_lists(db, [source_list_id, target_list_id])
+    condition = _item_filter(source_list_id, item_ids)
+    learned = db.execute(
+        select(func.count())
+        .select_from(vocabReview)
+        .join(vocabItem, vocabItem.item_id == vocabReview.item_id)
+        .where(condition, vocabReview.user_id == user_id, vocabReview.interval_days >= LEARNED_INTERVAL_DAYS)
+    ).scalar()
+    result = db.execute(
+        update(vocabItem)
+        .where(condition)
+        .values(list_id=target_list_id)
+        .execution_options(synchronize_session=False)
+    )
+    moved = result.rowcount
+    if moved:
+        for list_id, delta in ((source_list_id, -moved), (target_list_id, moved)):
+            adjust_total_words(db, list_id, delta)
+            if learned:
+                adjust_learned_words(db, list_id, learned if delta > 0 else -learned)
+    return moved
+
+
+if __name__ == "__main__":
+    # python -m app.services.vocabulary reconcile [list_id ...]
+    if len(sys.argv) < 2 or sys.argv[1] != "reconcile":
+        print("usage: python -m app.services.vocabulary reconcile [list_id ...]")
+        sys.exit(1)
+    from app.services.review import reconcile_progress
+    db = SessionLocal()
+    try:
+        list_ids = [int(list_id) for list_id in sys.argv[2:]]
+        fixed = reconcile_total_words(db, list_ids)
+        print(f"Reconciled total_words for {fixed} lists")
+        fixed = reconcile_progress(db, list_ids)
+        print(f"Reconciled progress for {fixed} lists")
+    finally:
+        db.close()
@@ -0,0 +1,96 @@
+# app/services/words.py
+import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.vocabulary import vocabItem, vocabList, vocabWord
+from app.services.dictionary import enrich_fields, normalize_word
+
+# Stored once per distinct word, an item keeps its own copy only when the user changed it
+SHARED_FIELDS = ("ipa", "definition", "audio_url_us", "audio_url_uk", "image_url")
+
+
+def item_column(field: str):
+    """The item's override if set, else the shared word's value. Needs join_words().
+
+    Unset overrides are NULL (split_overrides never stores ''), so a plain coalesce
+    is enough. Filter on the item and word columns themselves, not on this: the
+    trigram indexes are on each table's own column.
+    """
+    if field in SHARED_FIELDS:
+        return func.coalesce(getattr(vocabItem, field), getattr(vocabWord, field)).label(field)
+    return getattr(vocabItem, field)
+
+
+def item_columns(fields):
+    return [item_column(field) for field in fields]
+
+
+def join_words(query):
+    return query.outerjoin(vocabWord, vocabWord.word_id == vocabItem.word_id)
+
+
+def resolve_words(db: Session, entries, public: bool = False) -> dict:
+    """normalized word -> {"word_id", shared fields} for the words of entries.
+
+    Missing words are inserted once with values from the offline dictionary.
+    Entries only fill the gaps when they belong to a public list: a user's
+    own definition, ipa or image stays an override on their item and never
+    becomes what everyone else sees. Runs two queries for a whole import
+    batch, the dictionary is only read for new words.
+    """
+    seeds = {}
+    for entry in entries:
+        key = normalize_word(entry.get("word") or "")
+        if key and key not in seeds:
+            seeds[key] = entry
+    if not seeds:
+        return {}
+
+    columns = [vocabWord.word_id, vocabWord.word] + [getattr(vocabWord, field) for field in SHARED_FIELDS]
+    found = {
+        row.word: row._asdict()
+        for row in db.execute(select(*columns).where(vocabWord.word.in_(list(seeds))))
+    }
+    missing = [key for key in seeds if key not in found]
+    if missing:
+        values = []
+        for key in missing:
+            fields = enrich_fields({"word": key, **{field: '' for field in SHARED_FIELDS}})
+            if public:
+                for field in SHARED_FIELDS:
+                    fields[field] = fields[field] or seeds[key].get(field) or ''
+            fields["image_url"] = fields["image_url"] or None
+            values.append(fields)
+        # Concurrent requests may add the same word, the unique index keeps one of them
+        db.execute(insert(vocabWord).on_conflict_do_nothing(index_elements=["word"]), values)
+        for row in db.execute(select(*columns).where(vocabWord.word.in_(missing))):
+            found[row.word] = row._asdict()
+    return found
+
+
+def split_overrides(fields: dict, shared: dict) -> dict:
+    """Item values for the shared fields: None wherever the shared word already has it"""
+    overrides = {}
+    for field in SHARED_FIELDS:
+        value = fields.get(field)
+        overrides[field] = None if not value or value == shared.get(field) else value
+    return overrides
+
+
+def touch_lists(db: Session, word_ids):
+    """Bump updated_at of every list with an item on one of word_ids.
+
+    Items read the shared fields through the join, so a write to vocabulary.words
+    changes those list pages: their ETags and the public cache version must move too.
+    """
+    if not word_ids:
+        return
+    db.execute(
+        update(vocabList)
+        .where(vocabList.list_id.in_(select(vocabItem.list_id).where(vocabItem.word_id.in_(word_ids))))
+        .values(updated_at=datetime.datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
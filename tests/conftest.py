@@ -0,0 +1,40 @@
+# tests/conftest.py
+import datetime
+import os
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+@pytest.fixture
+def content_db():
+    """Session on an in-memory SQLite database with the content schema attached"""
+    from app.models.content import Base
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def attach(dbapi_connection, _):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS content")
+        dbapi_connection.create_function("clock_timestamp", 0,
+                                         lambda: datetime.datetime.utcnow().isoformat(" "))
+
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,79 @@
+# tests/test_dedup.py
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.models.content import Question, QuestionSignature
+from app.services import dedup
+
+PASSAGE = ("The city council approved a new plan to build bicycle lanes across the downtown area, hoping "
+           "to reduce traffic and pollution while encouraging healthier commuting habits among residents. "
+           "Critics argued the cost was too high and that businesses would lose parking spaces.")
+NEAR = PASSAGE.replace("too high", "far too high")
+OTHER = ("Photosynthesis converts light energy into chemical energy stored in glucose, releasing oxygen "
+         "as a by-product in green plants and algae.")
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    index = dedup.LSHIndex()
+    monkeypatch.setattr(dedup, "question_index", index)
+    return index
+
+
+def _insert(db, text: str, commit: bool = False) -> int:
+    question = Question(practice_type="reading", question_type="set", topic=text[:20], difficulty_level="Easy")
+    db.add(question)
+    db.flush()
+    if commit:
+        db.commit()
+    return question.question_id
+
+
+def _store(db, question_id: int, text: str, created_at: datetime.datetime):
+    db.add(QuestionSignature(question_id=question_id, practice_type="reading",
+                             signature=dedup.minhash(text).tobytes(), created_at=created_at))
+    db.commit()
+
+
+def test_rolled_back_signature_is_never_indexed(content_db, fresh_index):
+    question_id = _insert(content_db, PASSAGE)
+    dedup.record_signature(content_db, question_id, "reading", dedup.minhash(PASSAGE))
+    content_db.rollback()
+
+    fresh_index.sync(content_db)
+    assert question_id not in fresh_index.signatures
+    assert dedup.find_duplicate(content_db, "reading", NEAR)[1] is None
+
+
+def test_sync_loads_lower_ids_committed_later(content_db, fresh_index):
+    now = datetime.datetime.utcnow()
+    _store(content_db, 10, PASSAGE, now)
+    assert fresh_index.sync(content_db) == 1
+
+    # Another worker's transaction took id 5 earlier and only commits now
+    _store(content_db, 5, OTHER, now - datetime.timedelta(seconds=10))
+    assert fresh_index.sync(content_db) == 1
+    assert set(fresh_index.signatures) == {5, 10}
+    assert fresh_index.sync(content_db) == 0
+
+
+def test_insert_unique_commits_once(content_db, fresh_index):
+    commits = []
+    event.listen(content_db, "after_commit", lambda session: commits.append(session))
+
+    question_id = dedup.insert_unique(content_db, "reading", PASSAGE, lambda: _insert(content_db, PASSAGE))
+    assert len(commits) == 1
+    assert content_db.get(QuestionSignature, question_id) is not None
+
+    # The committed set is found through the table, not through a local add
+    assert dedup.insert_unique(content_db, "reading", NEAR, lambda: _insert(content_db, NEAR)) == question_id
+    assert len(commits) == 1
+
+
+def test_insert_unique_all_dedups_within_the_transaction(content_db, fresh_index):
+    ids = dedup.insert_unique_all(content_db, "reading", [PASSAGE, NEAR, OTHER], lambda text: text,
+                                  lambda db, text, commit: _insert(db, text, commit))
+    assert ids[0] == ids[1] != ids[2]
+    assert content_db.query(QuestionSignature).count() == 2
@@ -0,0 +1,99 @@
+# tests/test_question_sampling.py
+import pytest
+from sqlalchemy import event
+
+from app.models.content import Question, QuestionView
+from app.services.questions import sample_question_ids
+
+TOPICS = ("travel", "work")
+DIFFICULTIES = ("Easy", "Hard")
+
+
+@pytest.fixture
+def bucket_db(content_db):
+    question_id = 0
+    for practice_type in ("reading", "listening"):
+        for topic in TOPICS:
+            for difficulty in DIFFICULTIES:
+                for _ in range(25):
+                    question_id += 1
+                    content_db.add(Question(question_id=question_id, practice_type=practice_type,
+                                            question_type="set", topic=topic, difficulty_level=difficulty))
+                    # Children share the bucket columns and must never be sampled
+                    content_db.add(Question(question_id=10000 + question_id, practice_type=practice_type,
+                                            question_type="item", topic=topic, difficulty_level=difficulty,
+                                            parent_id=question_id))
+    content_db.commit()
+    return content_db
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"topic": "travel"},
+    {"difficulty": "Hard"},
+    {"topic": "work", "difficulty": "Easy"},
+])
+def test_sample_stays_in_bucket_and_prefers_unseen(bucket_db, filters):
+    size = 25 * (1 if "topic" in filters else len(TOPICS)) * (1 if "difficulty" in filters else len(DIFFICULTIES))
+    seen = set()
+    while len(seen) < size:
+        ids = sample_question_ids(bucket_db, 1, "reading", 5, **filters)
+        assert len(ids) == 5 and len(set(ids)) == 5
+        assert not seen & set(ids)
+        seen.update(ids)
+        bucket_db.add_all(QuestionView(user_id=1, question_id=question_id) for question_id in ids)
+        bucket_db.commit()
+
+    questions = bucket_db.query(Question).filter(Question.question_id.in_(seen)).all()
+    assert len(questions) == size
+    for q in questions:
+        assert q.parent_id is None and q.practice_type == "reading"
+        assert q.topic == filters.get("topic", q.topic)
+        assert q.difficulty_level == filters.get("difficulty", q.difficulty_level)
+
+    # Everything seen: the seen questions come back rather than nothing
+    assert len(sample_question_ids(bucket_db, 1, "reading", 5, **filters)) == 5
+
+
+def test_sample_by_cefr_level(bucket_db):
+    for q in bucket_db.query(Question).filter(Question.question_id <= 20):
+        q.cefr_level = "B2"
+    bucket_db.commit()
+
+    ids = sample_question_ids(bucket_db, 1, "reading", 50, cefr="b2")
+    assert sorted(ids) == list(range(1, 21))
+
+
+def test_sample_empty_bucket(bucket_db):
+    assert sample_question_ids(bucket_db, 1, "reading", 5, topic="nowhere") == []
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"topic": "travel"},
+    {"difficulty": "Hard"},
+    {"topic": "work", "difficulty": "Easy"},
+])
+def test_probes_walk_an_index_instead_of_sorting(bucket_db, filters):
+    statements = []
+    engine = bucket_db.get_bind()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "random_key" in statement:
+            statements.append((statement, parameters))
+
+    sample_question_ids(bucket_db, 1, "reading", 3, **filters)
+    event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+    for statement, parameters in statements:
+        plan = _plan(bucket_db, statement, parameters)
+        assert "TEMP B-TREE" not in plan
+        assert "ix_questions_bucket_random" in plan or "ix_questions_type_random" in plan
+
+
+def _plan(db, statement, parameters) -> str:
+    cursor = db.connection().connection.cursor()
+    rows = cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    return " | ".join(row[-1] for row in rows)
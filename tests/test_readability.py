@@ -0,0 +1,86 @@
+# tests/test_readability.py
+from app.models.content import Question, QuestionContent
+from app.services.questions import SCORES_VERSION, measured_difficulty, score_questions, store_payload
+from app.services.readability import CEFR_LEVELS, MIN_READABILITY_WORDS, score_text, score_texts
+
+SIMPLE = ("Tom has a small dog. The dog is brown and it likes to play in the park. Every morning Tom and "
+          "his dog go for a walk. They see many friends there. Tom likes his dog very much and the dog "
+          "likes Tom too. After the walk they go home and eat breakfast. Tom drinks milk and the dog "
+          "drinks water. Then Tom goes to school by bus and the dog sleeps in the sun all day long. ")
+ACADEMIC = ("Contemporary epistemological frameworks increasingly scrutinize the methodological "
+            "assumptions underpinning empirical investigations, particularly where ostensibly objective "
+            "quantification obscures interpretive contingencies. Consequently, scholars advocate "
+            "reflexive paradigms acknowledging the sociohistorical embeddedness of ostensibly neutral "
+            "instruments, thereby problematizing conventional demarcations between descriptive and "
+            "normative inquiry. Such heterodox perspectives nonetheless encounter substantial resistance "
+            "from entrenched disciplinary orthodoxies prioritizing replicability and parsimony. ")
+
+
+def test_level_follows_the_text():
+    simple, academic = score_texts([SIMPLE * 2, ACADEMIC * 2])
+    assert simple["words"] >= MIN_READABILITY_WORDS and academic["words"] >= MIN_READABILITY_WORDS
+    assert CEFR_LEVELS.index(simple["cefr_level"]) <= 1
+    assert CEFR_LEVELS.index(academic["cefr_level"]) >= 4
+    assert simple["flesch_reading_ease"] > academic["flesch_reading_ease"]
+    assert simple["bands"]["K1"] > academic["bands"]["K1"]
+
+
+def test_short_text_falls_back_to_the_lexical_level():
+    score = score_text("Describe a place you visited recently.")
+    assert score["words"] < MIN_READABILITY_WORDS
+    assert score["readability_level"] is None
+    assert score["cefr_level"] == score["lexical_level"]
+
+
+def test_empty_text_has_no_level():
+    assert score_text("")["cefr_level"] is None
+    assert score_texts([]) == []
+
+
+def test_names_inside_a_sentence_are_not_vocabulary():
+    assert score_text("I met Zyxwabble at the park.")["words"] == 5
+
+
+def _store_set(db, difficulty: str, text: str) -> int:
+    root = Question(practice_type="reading", question_type="reading_passage", topic="pets",
+                    difficulty_level=difficulty)
+    db.add(root)
+    db.flush()
+    db.add(QuestionContent(question_id=root.question_id, question_text="Reading Passage", passage_text=text))
+    child = Question(practice_type="reading", question_type="multiple_choice", topic="pets",
+                     difficulty_level=difficulty, parent_id=root.question_id)
+    db.add(child)
+    db.flush()
+    db.add(QuestionContent(question_id=child.question_id, question_text="What does Tom drink?"))
+    store_payload(db, root.question_id)
+    db.commit()
+    return root.question_id
+
+
+def test_scoring_keeps_the_requested_difficulty(content_db):
+    _store_set(content_db, "Advanced", SIMPLE * 2)
+
+    root, child = content_db.query(Question).order_by(Question.question_id).all()
+    assert root.difficulty_level == child.difficulty_level == "Advanced"
+    assert CEFR_LEVELS.index(root.cefr_level) <= 1
+    assert root.payload[0]["difficulty"] == "Advanced"
+    assert root.payload[0]["cefr_level"] == root.cefr_level
+
+
+def test_sets_without_text_are_marked_scored(content_db):
+    root = Question(practice_type="reading", question_type="reading_passage", topic="pets",
+                    difficulty_level="Advanced")
+    content_db.add(root)
+    content_db.flush()
+    store_payload(content_db, root.question_id)
+    content_db.commit()
+
+    assert root.cefr_level is None and root.readability is None
+    assert root.readability_version == SCORES_VERSION
+    assert score_questions(content_db) == 0
+
+
+def test_measured_difficulty_follows_the_level():
+    assert measured_difficulty(SIMPLE * 2) == "Easy"
+    assert measured_difficulty(ACADEMIC * 2) == "Hard"
+    assert measured_difficulty("") == "Medium"
@@ -0,0 +1,51 @@
+# tests/test_reading_chunks.py
+import asyncio
+
+from app.ai.ReadingQuestion import CHUNK_WORDS, OVERLAP_WORDS, ReadingContentGenerator, chunk_passages
+
+
+def _text(sentences: int, words: int = 60) -> str:
+    return " ".join(" ".join(["word"] * words) + "." for _ in range(sentences))
+
+
+def _lengths(text: str) -> list:
+    return [len(chunk.split()) for chunk in chunk_passages(text)]
+
+
+def test_short_content_is_one_chunk():
+    assert _lengths(_text(3)) == [180]
+    assert chunk_passages("") == []
+
+
+def test_chunks_overlap():
+    lengths = _lengths(_text(30))
+    assert len(lengths) > 1
+    assert all(length >= CHUNK_WORDS for length in lengths[:-1])
+    # Every chunk after the first opens with the tail of the one before
+    assert sum(lengths) > 30 * 60
+
+
+def test_no_chunk_made_of_overlap_only():
+    # 12 sentences fill one chunk exactly, its 120-word tail has nothing new after it
+    assert _lengths(_text(12)) == [720]
+    assert _lengths(_text(13)) == [720, 120 + 60]
+    assert OVERLAP_WORDS <= 120
+
+
+class _Generator:
+    def generate_question(self, inputs):
+        return {"title": "Rivers", "topic": inputs["topic"], "difficulty_level": "Beginner", "questions": []}
+
+
+def test_sync_entry_point_inside_a_running_loop():
+    generator = ReadingContentGenerator()
+    generator.question_generator = generator.chunk_generator = _Generator()
+    long_text = _text(30)
+
+    async def caller():
+        return generator.generate_from_user_content(long_text, "text", topic="rivers")
+
+    # Long content maps the chunks on an event loop, the caller's one is already running
+    practice = asyncio.run(caller())
+    assert practice["content"]["passage"] == long_text
+    assert generator.generate_from_user_content(_text(3), "text", topic="rivers")["topic"] == "rivers"
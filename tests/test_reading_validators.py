@@ -0,0 +1,70 @@
+# tests/test_reading_validators.py
+import pytest
+from pydantic import ValidationError
+
+from app.ai.QuestionGenerator import QuestionGenerator
+from app.ai.ReadingQuestion import QuestionContent, ReadingPractice
+
+
+def _options(count: int, correct: int = 1):
+    return [{"option": f"option {i}", "is_correct": i < correct} for i in range(count)]
+
+
+def _question(question_type: str, **fields):
+    return dict({"question_type": question_type, "question_text": "Why?", "explanation": "Because."}, **fields)
+
+
+@pytest.mark.parametrize("question", [
+    _question("multiple_choice", options=_options(4)),
+    _question("true_false", options=_options(2)),
+    _question("short_answer", sample_answer="the river"),
+    _question("short_answer", options=None, sample_answer="the river"),
+])
+def test_valid_questions(question):
+    QuestionContent.model_validate(question)
+
+
+@pytest.mark.parametrize("question, message", [
+    (_question("multiple_choice", options=_options(3)), "exactly 4 options"),
+    (_question("multiple_choice", options=_options(4, correct=2)), "Exactly one option"),
+    (_question("multiple_choice", options=_options(4, correct=0)), "Exactly one option"),
+    (_question("true_false", options=_options(4)), "exactly 2 options"),
+    (_question("multiple_choice"), "options are required"),
+    (_question("true_false", options=None), "options are required"),
+    (_question("short_answer", options=_options(2), sample_answer="x"), "should not have options"),
+    (_question("short_answer"), "sample_answer is required"),
+])
+def test_invalid_questions(question, message):
+    with pytest.raises(ValidationError, match=message):
+        QuestionContent.model_validate(question)
+
+
+class _ReaskChain:
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs)
+        return {"items": self.items}
+
+
+def test_invalid_question_is_replaced_not_the_set():
+    practice = {
+        "metadata": {"source_type": "article", "topic": "rivers", "difficulty_level": "Beginner"},
+        "content": {"title": "Rivers", "passage": "Rivers flow to the sea.", "questions": [
+            _question("multiple_choice", options=_options(4)),
+            _question("multiple_choice", options=_options(3)),
+            _question("short_answer", sample_answer="the sea"),
+        ]},
+    }
+    generator = QuestionGenerator.__new__(QuestionGenerator)
+    generator.schema = ReadingPractice
+    chain = _ReaskChain([_question("true_false", options=_options(2))])
+    generator.reask_chains = {QuestionContent: chain}
+
+    result = generator.repair(practice)
+
+    assert [q.question_type for q in result.content.questions] == ["multiple_choice", "short_answer", "true_false"]
+    assert len(chain.calls) == 1 and chain.calls[0]["count"] == 1
+    assert "exactly 4 options" in chain.calls[0]["rejected"]